@@ -68,6 +68,53 @@ DATABASES = {
     }
 }
 
+# =========================
+# Cache (compartilhado entre processos)
+# =========================
+# As chaves de versão (preços, regras, decks, classificação ao vivo), as
+# páginas cacheadas e a matriz de similaridade precisam ser as mesmas para
+# todos os workers do gunicorn e para o run_jobs. Com REDIS_URL usa Redis;
+# sem, a tabela de cache no banco (criada com createcachetable no build).
+#
+# As chaves de versão (prices/rules/public_decks/matrix version,
+# cooc-card-version:*, collection_version:*, tournament_results_version:*) e
+# a matriz são gravadas sem expiração e dividem o cache com páginas, textos
+# de exportação e probabilidades. Elas NÃO podem ser descartadas por falta de
+# espaço: uma versão perdida faz remontar tudo ou reaproveitar entradas
+# gravadas com a versão vazia.
+# - Redis: use maxmemory-policy volatile-lru (ou noeviction), que só descarta
+#   chaves com timeout; allkeys-lru descarta as versões.
+# - Banco: o DatabaseCache apaga 1/CULL_FREQUENCY das chaves (em ordem
+#   alfabética, sem olhar o timeout) quando passa de MAX_ENTRIES; o padrão do
+#   Django (300) estoura com poucas páginas. CACHE_MAX_ENTRIES precisa ficar
+#   bem acima do total de chaves vivas (as entradas com timeout expiram
+#   sozinhas e são as primeiras a sair no cull).
+REDIS_URL = os.getenv("REDIS_URL", "").strip()
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1000000"))
+if REDIS_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "brickado_cache",
+            "OPTIONS": {"MAX_ENTRIES": CACHE_MAX_ENTRIES},
+        }
+    }
+
+# =========================
+# Tarefas adiadas (core.jobs)
+# =========================
+# Recálculos pesados vão para a fila e são processados pelo worker
+# (python manage.py run_jobs --loop). True = roda na hora, no commit
+# (útil em desenvolvimento sem o worker).
+JOBS_EAGER = os.getenv("JOBS_EAGER", "False").lower() == "true"
+
 # =========================
 # Autenticação
 # =========================
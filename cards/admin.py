@@ -12,6 +12,8 @@ from django.shortcuts import render, redirect
 from django.urls import path
 from django.utils import timezone
 
+from decks.pricing import refresh_prices_for_cardnumbers
+
 from .models import (
     DigimonCard,
     CardPrice,
@@ -431,6 +433,7 @@ class CardPriceAdmin(admin.ModelAdmin):
             updated = 0
             skipped = 0
             errors = []
+            changed_cardnumbers = set()
 
             for idx, row in enumerate(reader, start=2):
                 cardnumber = (row.get(lower_map["cardnumber"]) or "").strip().upper()
@@ -472,11 +475,15 @@ class CardPriceAdmin(admin.ModelAdmin):
                         "in_stock": in_stock,
                     },
                 )
+                changed_cardnumbers.add(cardnumber)
                 if was_created:
                     created += 1
                 else:
                     updated += 1
 
+            # recalcula o resumo de preço só dos decks que usam as cartas alteradas
+            refresh_prices_for_cardnumbers(changed_cardnumbers)
+
             if errors:
                 for e in errors[:8]:
                     messages.warning(request, e)
@@ -495,28 +502,44 @@ class CardPriceAdmin(admin.ModelAdmin):
         }
         return render(request, "admin/cards/cardprice_upload.html", context)
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_prices_for_cardnumbers([obj.cardnumber])
+
+    def delete_model(self, request, obj):
+        cardnumber = obj.cardnumber
+        super().delete_model(request, obj)
+        refresh_prices_for_cardnumbers([cardnumber])
+
+    def delete_queryset(self, request, queryset):
+        cardnumbers = list(queryset.values_list("cardnumber", flat=True))
+        super().delete_queryset(request, queryset)
+        refresh_prices_for_cardnumbers(cardnumbers)
+
 
 # =========================
 # Regras: exceções de cópias / banlist / pair-ban
 # =========================
 @admin.register(CardCopyRule)
 class CardCopyRuleAdmin(admin.ModelAdmin):
-    list_display = ("cardnumber", "max_copies", "notes")
+    list_display = ("cardnumber", "max_copies", "effective_from", "effective_to", "notes")
+    list_filter = ("effective_from",)
     search_fields = ("cardnumber", "notes")
-    ordering = ("cardnumber",)
+    ordering = ("cardnumber", "effective_from")
 
 
 @admin.register(BanlistRule)
 class BanlistRuleAdmin(admin.ModelAdmin):
-    list_display = ("cardnumber", "status", "notes")
-    list_filter = ("status",)
+    list_display = ("cardnumber", "status", "effective_from", "effective_to", "notes")
+    list_filter = ("status", "effective_from")
     search_fields = ("cardnumber", "notes")
-    ordering = ("cardnumber",)
+    ordering = ("cardnumber", "effective_from")
 
 
 @admin.register(PairBanRule)
 class PairBanRuleAdmin(admin.ModelAdmin):
-    list_display = ("card_a", "card_b", "notes")
+    list_display = ("card_a", "card_b", "effective_from", "effective_to", "notes")
+    list_filter = ("effective_from",)
     search_fields = ("card_a", "card_b", "notes")
-    ordering = ("card_a", "card_b")
+    ordering = ("card_a", "card_b", "effective_from")
 # =========================
\ No newline at end of file
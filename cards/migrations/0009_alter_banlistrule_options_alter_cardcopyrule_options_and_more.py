@@ -0,0 +1,81 @@
+# Generated by Django 6.0 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0008_banlistrule_cardcopyrule_pairbanrule_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='banlistrule',
+            options={'ordering': ('cardnumber', 'effective_from')},
+        ),
+        migrations.AlterModelOptions(
+            name='cardcopyrule',
+            options={'ordering': ('cardnumber', 'effective_from')},
+        ),
+        migrations.AlterModelOptions(
+            name='pairbanrule',
+            options={'ordering': ('card_a', 'card_b', 'effective_from')},
+        ),
+        migrations.RemoveConstraint(
+            model_name='pairbanrule',
+            name='uniq_pairban_a_b',
+        ),
+        migrations.AddField(
+            model_name='banlistrule',
+            name='effective_from',
+            field=models.DateField(blank=True, db_index=True, help_text='Vale a partir desta data (vazio = desde sempre).', null=True),
+        ),
+        migrations.AddField(
+            model_name='banlistrule',
+            name='effective_to',
+            field=models.DateField(blank=True, db_index=True, help_text='Último dia de validade (vazio = sem prazo).', null=True),
+        ),
+        migrations.AddField(
+            model_name='cardcopyrule',
+            name='effective_from',
+            field=models.DateField(blank=True, db_index=True, help_text='Vale a partir desta data (vazio = desde sempre).', null=True),
+        ),
+        migrations.AddField(
+            model_name='cardcopyrule',
+            name='effective_to',
+            field=models.DateField(blank=True, db_index=True, help_text='Último dia de validade (vazio = sem prazo).', null=True),
+        ),
+        migrations.AddField(
+            model_name='pairbanrule',
+            name='effective_from',
+            field=models.DateField(blank=True, db_index=True, help_text='Vale a partir desta data (vazio = desde sempre).', null=True),
+        ),
+        migrations.AddField(
+            model_name='pairbanrule',
+            name='effective_to',
+            field=models.DateField(blank=True, db_index=True, help_text='Último dia de validade (vazio = sem prazo).', null=True),
+        ),
+        migrations.AlterField(
+            model_name='banlistrule',
+            name='cardnumber',
+            field=models.CharField(db_index=True, max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='cardcopyrule',
+            name='cardnumber',
+            field=models.CharField(db_index=True, max_length=32),
+        ),
+        migrations.AddConstraint(
+            model_name='banlistrule',
+            constraint=models.UniqueConstraint(fields=('cardnumber', 'effective_from'), name='uniq_banlist_card_from'),
+        ),
+        migrations.AddConstraint(
+            model_name='cardcopyrule',
+            constraint=models.UniqueConstraint(fields=('cardnumber', 'effective_from'), name='uniq_copyrule_card_from'),
+        ),
+        migrations.AddConstraint(
+            model_name='pairbanrule',
+            constraint=models.UniqueConstraint(fields=('card_a', 'card_b', 'effective_from'), name='uniq_pairban_a_b_from'),
+        ),
+    ]
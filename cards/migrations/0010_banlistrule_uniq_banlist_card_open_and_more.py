@@ -0,0 +1,45 @@
+# Generated by Django 6.0 on 2026-10-19 19:54
+
+from django.db import migrations, models
+
+
+def drop_duplicate_open_rules(apps, schema_editor):
+    # antes do unique parcial: mantém só a regra "desde sempre" mais recente (maior id)
+    for model_name, fields in (
+        ("CardCopyRule", ("cardnumber",)),
+        ("BanlistRule", ("cardnumber",)),
+        ("PairBanRule", ("card_a", "card_b")),
+    ):
+        Model = apps.get_model("cards", model_name)
+        seen = set()
+        stale = []
+        rows = Model.objects.filter(effective_from__isnull=True).order_by("-id").values_list("id", *fields)
+        for pk, *key in rows:
+            key = tuple(key)
+            if key in seen:
+                stale.append(pk)
+            seen.add(key)
+        Model.objects.filter(id__in=stale).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0009_alter_banlistrule_options_alter_cardcopyrule_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_open_rules, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='banlistrule',
+            constraint=models.UniqueConstraint(condition=models.Q(('effective_from__isnull', True)), fields=('cardnumber',), name='uniq_banlist_card_open'),
+        ),
+        migrations.AddConstraint(
+            model_name='cardcopyrule',
+            constraint=models.UniqueConstraint(condition=models.Q(('effective_from__isnull', True)), fields=('cardnumber',), name='uniq_copyrule_card_open'),
+        ),
+        migrations.AddConstraint(
+            model_name='pairbanrule',
+            constraint=models.UniqueConstraint(condition=models.Q(('effective_from__isnull', True)), fields=('card_a', 'card_b'), name='uniq_pairban_a_b_open'),
+        ),
+    ]
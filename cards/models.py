@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from decimal import Decimal
+from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils import timezone
 
@@ -103,21 +104,87 @@ class CardPrice(models.Model):
         return f"{label} - R$ {self.price}"
 
 
+class RuleQuerySet(models.QuerySet):
+    """
+    Regras com vigência (effective_from / effective_to, ambos inclusivos e opcionais).
+    """
+
+    def active_on(self, day=None):
+        day = day or timezone.localdate()
+        return self.filter(
+            models.Q(effective_from__isnull=True) | models.Q(effective_from__lte=day),
+            models.Q(effective_to__isnull=True) | models.Q(effective_to__gte=day),
+        )
+
+    def overlapping(self, start=None, end=None):
+        """
+        Regras cuja vigência cruza o período [start, end] (None = sem limite).
+        """
+        qs = self
+        if end is not None:
+            qs = qs.filter(models.Q(effective_from__isnull=True) | models.Q(effective_from__lte=end))
+        if start is not None:
+            qs = qs.filter(models.Q(effective_to__isnull=True) | models.Q(effective_to__gte=start))
+        return qs
+
+    def latest_first(self):
+        # a vigência mais recente primeiro; id desempata (ordem determinística)
+        return self.order_by(models.F("effective_from").desc(nulls_last=True), "-id")
+
+
+def validate_rule_period(rule, same_rule_qs, label: str) -> None:
+    """
+    clean() das regras com vigência: período válido e sem sobreposição com
+    outra regra da mesma carta/par (senão a regra vigente num dia é ambígua).
+    """
+    start, end = rule.effective_from, rule.effective_to
+    if start and end and end < start:
+        raise ValidationError({"effective_to": "O fim da vigência não pode ser antes do início."})
+    if rule.pk:
+        same_rule_qs = same_rule_qs.exclude(pk=rule.pk)
+    clash = same_rule_qs.overlapping(start, end).order_by("effective_from").first()
+    if clash:
+        since = clash.effective_from.strftime("%d/%m/%Y") if clash.effective_from else "sempre"
+        until = clash.effective_to.strftime("%d/%m/%Y") if clash.effective_to else "sem prazo"
+        raise ValidationError(f"Já existe regra para {label} vigente nesse período ({since} até {until}).")
+
+
 class CardCopyRule(models.Model):
     """
     Exceções de cópias por carta (default lógico é 4, mas aqui você cadastra só as exceções).
     Ex: cardnumber X pode ter 50 cópias.
     """
-    cardnumber = models.CharField(max_length=32, unique=True, db_index=True)
+    cardnumber = models.CharField(max_length=32, db_index=True)
     max_copies = models.PositiveIntegerField(default=4)
     notes = models.CharField(max_length=255, blank=True, default="")
+    effective_from = models.DateField(
+        null=True, blank=True, db_index=True,
+        help_text="Vale a partir desta data (vazio = desde sempre).",
+    )
+    effective_to = models.DateField(
+        null=True, blank=True, db_index=True,
+        help_text="Último dia de validade (vazio = sem prazo).",
+    )
+
+    objects = RuleQuerySet.as_manager()
 
     class Meta:
-        ordering = ("cardnumber",)
+        ordering = ("cardnumber", "effective_from")
+        constraints = [
+            models.UniqueConstraint(fields=["cardnumber", "effective_from"], name="uniq_copyrule_card_from"),
+            # NULL não conflita com NULL no unique acima: só uma regra "desde sempre" por carta
+            models.UniqueConstraint(
+                fields=["cardnumber"], condition=models.Q(effective_from__isnull=True), name="uniq_copyrule_card_open"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.cardnumber} (max {self.max_copies})"
 
+    def clean(self):
+        cn = (self.cardnumber or "").strip()
+        validate_rule_period(self, CardCopyRule.objects.filter(cardnumber__iexact=cn), cn.upper())
+
 
 class BanlistRule(models.Model):
     """
@@ -139,16 +206,36 @@ class BanlistRule(models.Model):
         (LIMITED_3, "Limitada a 3"),
     ]
 
-    cardnumber = models.CharField(max_length=32, unique=True, db_index=True)
+    cardnumber = models.CharField(max_length=32, db_index=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=BANNED)
     notes = models.CharField(max_length=255, blank=True, default="")
+    effective_from = models.DateField(
+        null=True, blank=True, db_index=True,
+        help_text="Vale a partir desta data (vazio = desde sempre).",
+    )
+    effective_to = models.DateField(
+        null=True, blank=True, db_index=True,
+        help_text="Último dia de validade (vazio = sem prazo).",
+    )
+
+    objects = RuleQuerySet.as_manager()
 
     class Meta:
-        ordering = ("cardnumber",)
+        ordering = ("cardnumber", "effective_from")
+        constraints = [
+            models.UniqueConstraint(fields=["cardnumber", "effective_from"], name="uniq_banlist_card_from"),
+            models.UniqueConstraint(
+                fields=["cardnumber"], condition=models.Q(effective_from__isnull=True), name="uniq_banlist_card_open"
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.cardnumber} - {self.status}"
 
+    def clean(self):
+        cn = (self.cardnumber or "").strip()
+        validate_rule_period(self, BanlistRule.objects.filter(cardnumber__iexact=cn), cn.upper())
+
     @property
     def max_allowed(self) -> int:
         if self.status == self.BANNED:
@@ -170,16 +257,37 @@ class PairBanRule(models.Model):
     card_a = models.CharField(max_length=32, db_index=True)
     card_b = models.CharField(max_length=32, db_index=True)
     notes = models.CharField(max_length=255, blank=True, default="")
+    effective_from = models.DateField(
+        null=True, blank=True, db_index=True,
+        help_text="Vale a partir desta data (vazio = desde sempre).",
+    )
+    effective_to = models.DateField(
+        null=True, blank=True, db_index=True,
+        help_text="Último dia de validade (vazio = sem prazo).",
+    )
+
+    objects = RuleQuerySet.as_manager()
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(fields=["card_a", "card_b"], name="uniq_pairban_a_b")
+            models.UniqueConstraint(fields=["card_a", "card_b", "effective_from"], name="uniq_pairban_a_b_from"),
+            models.UniqueConstraint(
+                fields=["card_a", "card_b"], condition=models.Q(effective_from__isnull=True), name="uniq_pairban_a_b_open"
+            ),
         ]
-        ordering = ("card_a", "card_b")
+        ordering = ("card_a", "card_b", "effective_from")
 
     def __str__(self) -> str:
         return f"{self.card_a} + {self.card_b} (pair ban)"
 
+    def clean(self):
+        self.card_a, self.card_b = self.normalize_pair(self.card_a, self.card_b)
+        validate_rule_period(
+            self,
+            PairBanRule.objects.filter(card_a=self.card_a, card_b=self.card_b),
+            f"{self.card_a} + {self.card_b}",
+        )
+
     @staticmethod
     def normalize_pair(a: str, b: str) -> tuple[str, str]:
         a = (a or "").strip().upper()
@@ -206,7 +314,7 @@ def effective_max_copies(cardnumber: str) -> int:
     cn = (cardnumber or "").strip().upper()
     if not cn:
         return 4
-    rule = CardCopyRule.objects.filter(cardnumber__iexact=cn).first()
+    rule = CardCopyRule.objects.active_on().filter(cardnumber__iexact=cn).latest_first().first()
     return int(rule.max_copies) if rule else 4
 
 
@@ -217,7 +325,7 @@ def effective_ban_limit(cardnumber: str) -> int | None:
     cn = (cardnumber or "").strip().upper()
     if not cn:
         return None
-    rule = BanlistRule.objects.filter(cardnumber__iexact=cn).first()
+    rule = BanlistRule.objects.active_on().filter(cardnumber__iexact=cn).latest_first().first()
     return rule.max_allowed if rule else None
 
 
@@ -249,7 +357,7 @@ def is_pair_banned(cardnumbers_in_deck: list[str], candidate: str) -> bool:
     existing_set = {((c or "").strip().upper()) for c in cardnumbers_in_deck if c}
 
     # Busca regras onde candidate aparece
-    qs = PairBanRule.objects.filter(
+    qs = PairBanRule.objects.active_on().filter(
         models.Q(card_a__iexact=cand) | models.Q(card_b__iexact=cand)
     )
 
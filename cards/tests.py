@@ -1 +1,54 @@
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
 from django.test import TestCase
+
+from .models import BanlistRule, CardCopyRule, PairBanRule, effective_ban_limit
+
+
+class RulePeriodTests(TestCase):
+    """
+    Vigência das regras: sem duplicata "desde sempre" e sem períodos sobrepostos.
+    """
+
+    def test_open_ended_duplicate_is_rejected_by_the_database(self):
+        CardCopyRule.objects.create(cardnumber="BT6-085", max_copies=50)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            CardCopyRule.objects.create(cardnumber="BT6-085", max_copies=10)
+
+    def test_open_ended_pair_duplicate_is_rejected_by_the_database(self):
+        PairBanRule.objects.create(card_a="BT1-001", card_b="BT1-002")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PairBanRule.objects.create(card_a="BT1-002", card_b="BT1-001")
+
+    def test_clean_rejects_overlapping_periods(self):
+        BanlistRule.objects.create(cardnumber="BT1-010", effective_from=date(2026, 1, 1), effective_to=date(2026, 6, 30))
+
+        overlap = BanlistRule(cardnumber="bt1-010", effective_from=date(2026, 6, 1))
+        with self.assertRaises(ValidationError):
+            overlap.full_clean()
+
+        after = BanlistRule(cardnumber="BT1-010", effective_from=date(2026, 7, 1))
+        after.full_clean()
+
+    def test_clean_rejects_open_ended_rule_over_dated_one(self):
+        CardCopyRule.objects.create(cardnumber="BT6-085", max_copies=50, effective_from=date(2026, 1, 1))
+        with self.assertRaises(ValidationError):
+            CardCopyRule(cardnumber="BT6-085", max_copies=10).full_clean()
+
+    def test_clean_rejects_end_before_start(self):
+        rule = CardCopyRule(cardnumber="BT6-085", effective_from=date(2026, 2, 1), effective_to=date(2026, 1, 1))
+        with self.assertRaises(ValidationError):
+            rule.full_clean()
+
+    def test_editing_a_rule_does_not_clash_with_itself(self):
+        rule = PairBanRule.objects.create(card_a="BT1-001", card_b="BT1-002")
+        rule.notes = "ajuste"
+        rule.full_clean()
+
+    def test_latest_rule_wins_when_periods_overlap(self):
+        # carga direta (sem clean): a vigência mais recente decide, sempre a mesma
+        BanlistRule.objects.create(cardnumber="BT1-010", status=BanlistRule.LIMITED_1, effective_from=date(2025, 1, 1))
+        BanlistRule.objects.create(cardnumber="BT1-010", status=BanlistRule.BANNED)
+        self.assertEqual(effective_ban_limit("BT1-010"), 1)
@@ -1,5 +1,7 @@
 from django.shortcuts import render, get_object_or_404
 
+from decks.card_index import public_decks_using
+
 from .models import DigimonCard
 
 
@@ -12,7 +14,8 @@ def card_list(request):
 def card_detail(request, cardnumber):
     """Detalhe de uma carta específica pelo cardnumber (ex: BT24-008)."""
     card = get_object_or_404(DigimonCard, cardnumber=cardnumber)
-    return render(request, "cards/card_detail.html", {"card": card})
+    used_in = public_decks_using(card.cardnumber)
+    return render(request, "cards/card_detail.html", {"card": card, "used_in": used_in})
 
 
 def card_detail_by_number(request, cardnumber):
@@ -0,0 +1,189 @@
+# core/jobs.py
+"""
+Fila de tarefas adiadas (tabela PendingJob).
+
+Recálculos caros (dados derivados dos decks, revalidação, rankings, matriz de
+similaridade) não rodam dentro do request: quem altera dados só grava as
+chaves afetadas (deck, carta, jogador...) no commit, e o worker
+`manage.py run_jobs --loop` processa em lote. A mesma chave pendente vira uma
+linha só, então 10 edições no mesmo deck antes do worker passar = 1 recálculo.
+
+O worker apaga as linhas que vai processar antes de processar: uma mudança
+que chegue no meio grava uma linha nova e é processada na rodada seguinte.
+Se o handler falhar, as chaves voltam para a fila (até MAX_ATTEMPTS).
+
+JOBS_EAGER = True no settings processa na hora, no commit (testes, ou
+desenvolvimento sem o worker rodando).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import PendingJob
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+MAX_ATTEMPTS = 5
+RETRY_DELAY = 60            # segundos, multiplicado pela tentativa
+
+Handler = Callable[[List[str]], None]
+
+# tipo -> (função que processa um lote de chaves, tamanho do lote)
+_handlers: Dict[str, Tuple[Handler, int]] = {}
+
+
+def job(kind: str, batch_size: int = DEFAULT_BATCH_SIZE):
+    """
+    Registra a função que processa um lote de chaves do tipo `kind`.
+    Os módulos com handlers são importados no ready() de cada app.
+    """
+    def decorator(func: Handler) -> Handler:
+        _handlers[kind] = (func, batch_size)
+        return func
+    return decorator
+
+
+def registered_kinds() -> List[str]:
+    return sorted(_handlers)
+
+
+# ----------------------------
+# Enfileirar (no commit da transação atual)
+# ----------------------------
+class _PendingBatch:
+    """
+    Chaves enfileiradas numa transação, gravadas por um único callback no
+    commit. Se a transação sofrer rollback o callback some junto com as chaves.
+    """
+
+    def __init__(self):
+        self.jobs: Dict[Tuple[str, str], float] = {}
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        _flush(self.jobs)
+
+
+_pending = threading.local()
+
+
+def _current_batch() -> _PendingBatch:
+    conn = transaction.get_connection()
+    batch = getattr(_pending, "batch", None)
+    if not conn.in_atomic_block:
+        return _PendingBatch()
+    if batch is None or batch.done or not any(entry[1] is batch for entry in conn.run_on_commit):
+        batch = _pending.batch = _PendingBatch()
+        transaction.on_commit(batch)
+    return batch
+
+
+def _flush(jobs: Dict[Tuple[str, str], float]) -> None:
+    if not jobs:
+        return
+
+    if getattr(settings, "JOBS_EAGER", False):
+        by_kind: Dict[str, List[str]] = {}
+        for kind, key in jobs:
+            by_kind.setdefault(kind, []).append(key)
+        for kind, keys in by_kind.items():
+            _run(kind, keys)
+        return
+
+    now = timezone.now()
+    PendingJob.objects.bulk_create(
+        [
+            PendingJob(kind=kind, key=key, run_after=now + timedelta(seconds=delay))
+            for (kind, key), delay in jobs.items()
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+def enqueue(kind: str, keys: Iterable, delay: float = 0) -> None:
+    """
+    Agenda o processamento das `keys` para quando a transação atual terminar
+    (na hora, se não houver transação). `delay` adia a execução: como a chave
+    já pendente não é regravada, serve para juntar mudanças (ex: matriz de
+    similaridade remontada no máximo a cada N segundos).
+    """
+    keys = [str(key) for key in keys if key is not None and key != ""]
+    if not keys:
+        return
+    batch = _current_batch()
+    for key in keys:
+        batch.jobs.setdefault((kind, key), delay)
+    if not transaction.get_connection().in_atomic_block:
+        batch()
+
+
+# ----------------------------
+# Processar (worker)
+# ----------------------------
+def _run(kind: str, keys: List[str]) -> None:
+    handler, batch_size = _handlers[kind]
+    for start in range(0, len(keys), batch_size):
+        handler(keys[start:start + batch_size])
+
+
+def _claim(kind: str, limit: int) -> List[Tuple[int, str, int]]:
+    """
+    Tira da fila até `limit` chaves prontas do tipo (id, chave, tentativas).
+    """
+    with transaction.atomic():
+        qs = PendingJob.objects.filter(kind=kind, run_after__lte=timezone.now()).order_by("id")
+        if connection.features.has_select_for_update_skip_locked:
+            qs = qs.select_for_update(skip_locked=True)
+        claimed = list(qs.values_list("id", "key", "attempts")[:limit])
+        if claimed:
+            PendingJob.objects.filter(id__in=[row[0] for row in claimed]).delete()
+    return claimed
+
+
+def _retry(kind: str, claimed: List[Tuple[int, str, int]]) -> None:
+    now = timezone.now()
+    retry = []
+    for _, key, attempts in claimed:
+        if attempts + 1 >= MAX_ATTEMPTS:
+            logger.error("Job %s:%s descartado depois de %d tentativas", kind, key, attempts + 1)
+            continue
+        retry.append(PendingJob(
+            kind=kind,
+            key=key,
+            attempts=attempts + 1,
+            run_after=now + timedelta(seconds=RETRY_DELAY * (attempts + 1)),
+        ))
+    PendingJob.objects.bulk_create(retry, ignore_conflicts=True)
+
+
+def run_pending(kinds: Optional[Iterable[str]] = None) -> int:
+    """
+    Processa tudo que está pronto na fila (dos tipos informados ou de todos).
+    Retorna quantas chaves foram processadas com sucesso.
+    """
+    done = 0
+    for kind in kinds or registered_kinds():
+        handler, batch_size = _handlers[kind]
+        while True:
+            claimed = _claim(kind, batch_size)
+            if not claimed:
+                break
+            try:
+                handler([key for _, key, _ in claimed])
+            except Exception:
+                logger.exception("Falha no job %s (%d chave(s))", kind, len(claimed))
+                _retry(kind, claimed)
+                # o resto deste tipo fica para a próxima rodada
+                break
+            done += len(claimed)
+    return done
@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from core.jobs import registered_kinds, run_pending
+
+
+class Command(BaseCommand):
+    help = (
+        "Processa a fila de tarefas adiadas (dados derivados dos decks, revalidação,\n"
+        "rankings, matriz de similaridade). Em produção rode com --loop num processo\n"
+        "separado (worker do Procfile); sem --loop processa o que estiver pronto e sai."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Continua rodando, verificando a fila")
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=2.0,
+            help="Segundos de espera quando a fila está vazia (padrão: 2)",
+        )
+        parser.add_argument(
+            "--kind",
+            action="append",
+            dest="kinds",
+            help="Processa só este tipo (pode repetir). Sem isso, todos.",
+        )
+
+    def handle(self, *args, **options):
+        kinds = options["kinds"]
+        unknown = sorted(set(kinds or []) - set(registered_kinds()))
+        if unknown:
+            raise CommandError(f"Tipo(s) desconhecido(s): {', '.join(unknown)}. Use: {', '.join(registered_kinds())}")
+
+        interval = max(0.1, options["interval"])
+        while True:
+            done = run_pending(kinds)
+            if done:
+                self.stdout.write(f"{done} tarefa(s) processada(s).")
+            if not options["loop"]:
+                break
+            close_old_connections()
+            if not done:
+                try:
+                    time.sleep(interval)
+                except KeyboardInterrupt:
+                    break
+
+        if not options["loop"]:
+            self.stdout.write(self.style.SUCCESS("Fila processada."))
@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 19:49
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_remove_userprofile_allow_news_email_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=40)),
+                ('key', models.CharField(max_length=200)),
+                ('attempts', models.PositiveSmallIntegerField(default=0)),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('id',),
+                'indexes': [models.Index(fields=['kind', 'run_after'], name='pendingjob_kind_run_idx')],
+                'constraints': [models.UniqueConstraint(fields=('kind', 'key'), name='uniq_pendingjob_kind_key')],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 
 def avatar_upload_path(instance, filename):
@@ -34,3 +35,27 @@ class UserProfile(models.Model):
 
     def __str__(self) -> str:
         return self.full_name or self.user.username
+
+
+class PendingJob(models.Model):
+    """
+    Tarefa adiada (ver core.jobs): uma linha por (tipo, chave) pendente.
+    Processada e apagada pelo worker `manage.py run_jobs`.
+    """
+    kind = models.CharField(max_length=40)
+    key = models.CharField(max_length=200)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    run_after = models.DateTimeField(default=timezone.now)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("id",)
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "key"], name="uniq_pendingjob_kind_key")
+        ]
+        indexes = [
+            models.Index(fields=["kind", "run_after"], name="pendingjob_kind_run_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{self.key}"
@@ -8,6 +8,7 @@ from django.shortcuts import redirect, render
 from loyalty.models import LoyaltyEvent
 from decks.models import Deck
 from news.models import NewsPost
+from tournaments.models import TournamentPlayer
 
 from .forms import ProfileForm
 from .models import UserProfile
@@ -75,7 +76,7 @@ def profile(request):
         or 0
     )
     total_decks = Deck.objects.filter(user=request.user).count()
-    tournaments_played = 0  # placeholder
+    tournaments_played = TournamentPlayer.objects.filter(player__user=request.user).count()
     recent_events = LoyaltyEvent.objects.filter(user=request.user).order_by("-criado_em")[:10]
 
     context = {
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Deck, DeckCard, Archetype
+from .models import Collection, Deck, DeckCard, Archetype
 
 
 @admin.register(Archetype)
@@ -20,7 +20,17 @@ class DeckCardInline(admin.TabularInline):
 
 @admin.register(Deck)
 class DeckAdmin(admin.ModelAdmin):
-    list_display = ("nome", "user", "jogo", "publico", "criado_em")
-    list_filter = ("jogo", "publico", "criado_em")
+    list_display = ("nome", "user", "jogo", "publico", "legal", "criado_em")
+    list_filter = ("jogo", "publico", "legal", "cor_principal", "criado_em")
+    readonly_fields = (
+        "fingerprint", "legal", "violacoes", "legalidade_verificada_em",
+        "estatisticas", "cor_principal", "dp_medio",
+    )
     search_fields = ("nome", "arquetipo__name", "arquetipo_nome", "user__username")
     inlines = [DeckCardInline]
+
+
+@admin.register(Collection)
+class CollectionAdmin(admin.ModelAdmin):
+    list_display = ("cardnumber", "quantidade", "user", "atualizado_em")
+    search_fields = ("cardnumber", "user__username")
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class DecksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "decks"
+
+    def ready(self):
+        from . import jobs, signals  # noqa: F401
@@ -0,0 +1,160 @@
+# decks/browse.py
+from __future__ import annotations
+
+import base64
+import hashlib
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .decklist_io import normalize_cardnumber
+from .models import Deck, DeckCardIndex
+
+PAGE_SIZE = 30
+SCAN_CHUNK = PAGE_SIZE * 2          # linhas lidas por query ao montar a página
+MAX_SCAN_ROWS = PAGE_SIZE * 10      # teto de linhas por página (muitos decks repetidos)
+MAX_CARD_FILTERS = 5
+PAGE_CACHE_TIMEOUT = 60 * 5
+UPDATED_WITHIN_CHOICES = (7, 30, 90, 365)
+
+# Versão das páginas: sobe só quando um deck público (ou que deixou de ser)
+# muda; edições em decks privados não invalidam o cache do explorador.
+PUBLIC_DECKS_VERSION_CACHE_KEY = "public_decks_version"
+
+
+def bump_public_decks_version() -> None:
+    cache.set(PUBLIC_DECKS_VERSION_CACHE_KEY, time.time(), timeout=None)
+
+
+@dataclass(frozen=True)
+class PublicDeckFilters:
+    """
+    Filtros do explorador de decks públicos (todos opcionais).
+    """
+    arquetipo: str = ""                 # slug do Archetype
+    cartas: Tuple[str, ...] = ()        # deck precisa ter todas
+    cor: str = ""                       # Deck.cor_principal
+    only_legal: bool = False
+    dias: Optional[int] = None          # atualizados nos últimos N dias
+
+    @classmethod
+    def from_querydict(cls, data) -> "PublicDeckFilters":
+        cartas = []
+        for raw in data.getlist("carta"):
+            for part in raw.split(","):
+                cn = normalize_cardnumber(part)
+                if cn and cn not in cartas:
+                    cartas.append(cn)
+
+        dias = (data.get("dias") or "").strip()
+        return cls(
+            arquetipo=(data.get("arquetipo") or "").strip(),
+            cartas=tuple(cartas[:MAX_CARD_FILTERS]),
+            cor=(data.get("cor") or "").strip(),
+            only_legal=data.get("legal") == "1",
+            dias=int(dias) if dias.isdigit() and int(dias) in UPDATED_WITHIN_CHOICES else None,
+        )
+
+    def cache_key(self) -> str:
+        return "|".join([self.arquetipo, ",".join(sorted(self.cartas)), self.cor, str(self.only_legal), str(self.dias)])
+
+    def apply(self, qs):
+        if self.arquetipo:
+            qs = qs.filter(arquetipo__slug=self.arquetipo)
+        for cn in self.cartas:
+            # um semi-join no índice invertido por carta (unique em cardnumber, deck)
+            qs = qs.filter(id__in=DeckCardIndex.objects.filter(cardnumber=cn).values("deck_id"))
+        if self.cor:
+            qs = qs.filter(cor_principal=self.cor)
+        if self.only_legal:
+            qs = qs.filter(legal=True)
+        if self.dias:
+            qs = qs.filter(atualizado_em__gte=timezone.now() - timedelta(days=self.dias))
+        return qs
+
+
+# ----------------------------
+# Cursor (keyset em atualizado_em DESC, id DESC)
+# ----------------------------
+def encode_cursor(deck: Deck) -> str:
+    raw = f"{deck.atualizado_em.isoformat()}|{deck.id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[datetime, int]]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        ts, deck_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(ts), int(deck_id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+def _page_ids(filters: PublicDeckFilters, cursor: str) -> Tuple[List[int], str]:
+    """
+    IDs de uma página. Decks com conteúdo idêntico (mesmo fingerprint)
+    aparecem uma vez por página: as linhas são lidas em blocos até completar
+    PAGE_SIZE decks distintos (no máximo MAX_SCAN_ROWS linhas por página).
+    """
+    base = filters.apply(Deck.objects.filter(publico=True)).order_by("-atualizado_em", "-id")
+    position = decode_cursor(cursor)
+
+    ids, seen = [], set()
+    last = None
+    has_next = False
+    scanned = 0
+    while True:
+        qs = base
+        if position:
+            ts, deck_id = position
+            qs = qs.filter(Q(atualizado_em__lt=ts) | Q(atualizado_em=ts, id__lt=deck_id))
+        rows = list(qs.values_list("id", "atualizado_em", "fingerprint")[:SCAN_CHUNK])
+
+        for row in rows:
+            if len(ids) == PAGE_SIZE or scanned == MAX_SCAN_ROWS:
+                has_next = True
+                break
+            scanned += 1
+            last = row
+            deck_id, _, fp = row
+            if fp and fp in seen:
+                continue
+            seen.add(fp)
+            ids.append(deck_id)
+
+        if has_next or len(rows) < SCAN_CHUNK:
+            break
+        position = (last[1], last[0])
+
+    next_cursor = ""
+    if has_next:
+        last_id, last_ts, _ = last
+        next_cursor = encode_cursor(Deck(id=last_id, atualizado_em=last_ts))
+    return ids, next_cursor
+
+
+def public_deck_page(filters: PublicDeckFilters, cursor: str = "") -> Tuple[List[Deck], str]:
+    """
+    Uma página do explorador: (decks, cursor da próxima página ou "").
+    Os IDs da página ficam em cache pela versão dos decks públicos; os decks
+    em si vêm numa query por PK.
+    """
+    version = cache.get(PUBLIC_DECKS_VERSION_CACHE_KEY)
+    digest = hashlib.sha1(f"{filters.cache_key()}#{cursor}".encode("utf-8")).hexdigest()
+    key = f"public-decks:{version}:{digest}"
+
+    page = cache.get(key)
+    if page is None:
+        page = _page_ids(filters, cursor)
+        cache.set(key, page, PAGE_CACHE_TIMEOUT)
+
+    ids, next_cursor = page
+    by_id = Deck.objects.select_related("user", "arquetipo").in_bulk(ids)
+    return [by_id[i] for i in ids if i in by_id], next_cursor
@@ -0,0 +1,117 @@
+# decks/bulk_import.py
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Set, Tuple
+
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from cards.models import DigimonCard
+
+from .bulk_parse import ParsedDecklist
+from .decklist_io import normalize_cardnumber
+from .fingerprint import compute_fingerprint
+from .models import Archetype, Deck, DeckCard
+from .rules import is_egg_card
+from .services import refresh_decks
+
+CARD_LOOKUP_CHUNK = 500
+REFRESH_CHUNK = 200
+
+
+def resolve_cards(cardnumbers: Iterable[str]) -> Dict[str, DigimonCard]:
+    """
+    cardnumber normalizado -> DigimonCard, em lotes de CARD_LOOKUP_CHUNK (1 query por lote).
+    """
+    wanted = sorted({normalize_cardnumber(cn) for cn in cardnumbers if cn})
+    found: Dict[str, DigimonCard] = {}
+    for start in range(0, len(wanted), CARD_LOOKUP_CHUNK):
+        chunk = wanted[start:start + CARD_LOOKUP_CHUNK]
+        for card in DigimonCard.objects.filter(cardnumber__in=chunk).only("id", "cardnumber", "name", "card_type"):
+            found[normalize_cardnumber(card.cardnumber)] = card
+    return found
+
+
+@dataclass
+class BulkImportResult:
+    decks: List[Deck]
+    lines: int
+    unresolved: Set[str]
+
+
+def bulk_create_decks(
+    user: User,
+    entries: List[ParsedDecklist],
+    publico: bool = False,
+    default_name: str = "",
+    batch_size: int = 1000,
+) -> BulkImportResult:
+    """
+    Cria Decks + DeckCards com bulk_create (sem signals). Quem chama deve rodar
+    refresh_decks() nos IDs criados depois do commit (ver refresh_created_decks).
+    Cardnumbers sem carta no cache entram só com codigo_carta e vão para `unresolved`.
+    """
+    entries = [e for e in entries if e.lines and not e.error]
+    cards = resolve_cards(cn for e in entries for _, _, cn in e.lines)
+    archetypes = {a.name.casefold(): a for a in Archetype.objects.all()}
+
+    unresolved: Set[str] = set()
+    decks, deck_cards = [], []
+    for e in entries:
+        rows = []
+        for qty, name, cn in e.lines:
+            card = cards.get(cn)
+            if card is None:
+                unresolved.add(cn)
+            rows.append(DeckCard(
+                card=card,
+                codigo_carta=cn,
+                nome_carta=(name or (card.name if card else ""))[:255],
+                quantidade=qty,
+                section=DeckCard.SECTION_EGG if card and is_egg_card(card) else DeckCard.SECTION_MAIN,
+            ))
+        deck_cards.append(rows)
+
+        archetype = archetypes.get(e.archetype.casefold()) if e.archetype else None
+        name = e.deck_name or (f"{e.player} - {default_name}" if e.player and default_name else e.player or e.label)
+        decks.append(Deck(
+            user=user,
+            nome=name[:100],
+            publico=publico,
+            arquetipo=archetype,
+            arquetipo_nome="" if archetype else e.archetype[:120],
+            # já sai com o fingerprint: caches por conteúdo valem antes do refresh
+            fingerprint=compute_fingerprint((dc.section, dc.codigo_carta, dc.quantidade) for dc in rows),
+        ))
+
+    with transaction.atomic():
+        Deck.objects.bulk_create(decks, batch_size=batch_size)
+        for deck, rows in zip(decks, deck_cards):
+            for dc in rows:
+                dc.deck = deck
+        DeckCard.objects.bulk_create([dc for rows in deck_cards for dc in rows], batch_size=batch_size)
+
+    lines = sum(len(rows) for rows in deck_cards)
+    return BulkImportResult(decks=decks, lines=lines, unresolved=unresolved)
+
+
+def refresh_created_decks(deck_ids: List[int], chunk: int = REFRESH_CHUNK) -> None:
+    for start in range(0, len(deck_ids), chunk):
+        refresh_decks(deck_ids[start:start + chunk])
+
+
+def deck_text(value) -> str:
+    """
+    Campo "deck" de um JSONL pode vir como texto ou como lista (JSON/TTS);
+    devolve sempre texto para o parse_decklist detectar o formato.
+    """
+    return value if isinstance(value, str) else json.dumps(value)
+
+
+def player_key(name: str) -> str:
+    """
+    Chave para casar nomes de jogador (sem caixa e com espaços normalizados).
+    """
+    return " ".join((name or "").split()).casefold()
@@ -0,0 +1,42 @@
+# decks/bulk_parse.py
+"""
+Parte do import em lote que roda nos processos do pool (import_decklists).
+Só Python puro + decklist_io: nada de Django aqui, para os workers
+funcionarem também com spawn/forkserver (onde o Django não está configurado).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+from .decklist_io import normalize_cardnumber, parse_decklist
+
+
+@dataclass
+class ParsedDecklist:
+    """
+    Uma decklist já lida (feito nos processos do pool; só tipos simples, para pickle).
+    """
+    label: str                      # arquivo / linha de origem (para o relatório)
+    player: str = ""
+    deck_name: str = ""
+    archetype: str = ""
+    lines: List[Tuple[int, str, str]] = field(default_factory=list)  # (qty, name, cardnumber)
+    format: str = ""
+    error: str = ""
+
+
+def parse_entry(entry: Tuple[str, str, str, str, str]) -> ParsedDecklist:
+    """
+    Função do worker: (label, player, deck_name, archetype, texto) -> ParsedDecklist.
+    Não toca no banco.
+    """
+    label, player, deck_name, archetype, text = entry
+    result = ParsedDecklist(label=label, player=player, deck_name=deck_name, archetype=archetype)
+    try:
+        lines, result.format = parse_decklist(text)
+    except ValueError as exc:
+        result.error = str(exc)
+        return result
+    result.lines = [(dl.qty, dl.name, normalize_cardnumber(dl.cardnumber)) for dl in lines]
+    return result
@@ -0,0 +1,114 @@
+# decks/buylist.py
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db.models import Max
+
+from cards.models import DigimonCard
+
+from .collection import collection_version, owned_counts
+from .jobs import any_refresh_pending
+from .models import Deck, DeckCardIndex
+from .pricing import load_prices, prices_version
+
+CACHE_TIMEOUT = 60 * 60
+
+
+@dataclass
+class BuyListLine:
+    cardnumber: str
+    name: str
+    needed: int         # máximo de cópias pedido por algum dos decks
+    owned: int
+    qty: int            # a comprar
+    unit: Optional[Decimal] = None
+    subtotal: Optional[Decimal] = None
+    url: str = ""
+    in_stock: bool = True
+
+
+@dataclass
+class BuyList:
+    lines: List[BuyListLine] = field(default_factory=list)
+    total: Decimal = Decimal("0.00")
+    copies: int = 0
+    unpriced: int = 0       # sem CardPrice
+    out_of_stock: int = 0   # com CardPrice, mas in_stock=False (fora do total)
+
+
+def decks_union(deck_ids: Iterable[int]) -> Dict[str, int]:
+    """
+    cardnumber -> maior quantidade entre os decks (as cópias servem para
+    qualquer um deles, já que só se joga um por vez). 1 query no índice invertido.
+    """
+    return dict(
+        DeckCardIndex.objects.filter(deck_id__in=list(deck_ids))
+        .values("cardnumber").order_by().annotate(qty=Max("quantidade"))
+        .values_list("cardnumber", "qty")
+    )
+
+
+def _cache_key(user, fingerprints: List[str]) -> str:
+    digest = hashlib.sha1(",".join(sorted(fingerprints)).encode("utf-8")).hexdigest()
+    return f"buylist:v1:{user.pk}:{collection_version(user.pk)}:{prices_version()}:{digest}"
+
+
+def build_buy_list(user, deck_ids: Iterable[int]) -> BuyList:
+    """
+    Lista de compras para jogar qualquer um dos decks escolhidos (do usuário):
+    união por máximo de cópias - coleção, com preço do CardPrice. Cartas sem
+    estoque aparecem na lista mas ficam fora do total.
+    Cacheado pelos fingerprints dos decks + versão da coleção + versão dos preços.
+    O fingerprint muda na hora da edição, mas o índice invertido só no worker:
+    com recálculo na fila a lista é montada sem cache, para não gravar o
+    conteúdo antigo sob o fingerprint novo.
+    """
+    fingerprints = dict(Deck.objects.filter(user=user, id__in=list(deck_ids)).values_list("id", "fingerprint"))
+    if not fingerprints:
+        return BuyList()
+
+    cacheable = all(fingerprints.values()) and not any_refresh_pending(fingerprints.keys())
+    key = _cache_key(user, list(fingerprints.values())) if cacheable else ""
+    if cacheable:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    union = decks_union(fingerprints.keys())
+    owned = owned_counts(user, union.keys())
+    wanted = {cn: qty - owned.get(cn, 0) for cn, qty in union.items() if qty > owned.get(cn, 0)}
+    prices = load_prices(wanted)
+    names = dict(DigimonCard.objects.filter(cardnumber__in=wanted).values_list("cardnumber", "name"))
+
+    result = BuyList()
+    for cn in sorted(wanted):
+        line = BuyListLine(
+            cardnumber=cn,
+            name=names.get(cn, ""),
+            needed=union[cn],
+            owned=owned.get(cn, 0),
+            qty=wanted[cn],
+        )
+        price = prices.get(cn)
+        if price is None:
+            result.unpriced += 1
+        elif not price.in_stock:
+            line.in_stock = False
+            line.url = price.product_url
+            result.out_of_stock += 1
+        else:
+            line.unit = price.price or Decimal("0.00")
+            line.subtotal = line.unit * line.qty
+            line.url = price.product_url
+            result.total += line.subtotal
+        result.copies += line.qty
+        result.lines.append(line)
+
+    if cacheable:
+        cache.set(key, result, CACHE_TIMEOUT)
+    return result
@@ -0,0 +1,75 @@
+# decks/card_index.py
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+from .decklist_io import normalize_cardnumber
+from .models import Deck, DeckCard, DeckCardIndex
+
+
+def deck_card_counts(deck_ids: Iterable[int]) -> Dict[int, Dict[str, int]]:
+    """
+    Conteúdo dos decks como {deck_id: {cardnumber_normalizado: qtd}}, em 1 query.
+    Linhas sem codigo_carta usam o cardnumber da carta vinculada.
+    """
+    ids = list(deck_ids)
+    counts: Dict[int, Dict[str, int]] = {deck_id: defaultdict(int) for deck_id in ids}
+    if not ids:
+        return {}
+
+    rows = DeckCard.objects.filter(deck_id__in=ids).values_list(
+        "deck_id", "codigo_carta", "card__cardnumber", "quantidade"
+    )
+    for deck_id, codigo, card_cn, qty in rows:
+        cn = normalize_cardnumber(codigo or card_cn)
+        if cn and qty:
+            counts[deck_id][cn] += int(qty)
+
+    return {deck_id: dict(c) for deck_id, c in counts.items()}
+
+
+def rebuild_card_index(deck_ids: Iterable[int]) -> None:
+    """
+    Regrava as linhas do índice invertido dos decks informados.
+    """
+    ids = list(Deck.objects.filter(id__in=list(deck_ids)).values_list("id", flat=True))
+    if not ids:
+        return
+
+    counts = deck_card_counts(ids)
+    DeckCardIndex.objects.filter(deck_id__in=ids).delete()
+    DeckCardIndex.objects.bulk_create(
+        [
+            DeckCardIndex(cardnumber=cn, deck_id=deck_id, quantidade=qty)
+            for deck_id, cards in counts.items()
+            for cn, qty in cards.items()
+        ],
+        batch_size=1000,
+    )
+
+
+def decks_using_cardnumbers(cardnumbers: Iterable[str]) -> List[int]:
+    """
+    IDs dos decks que contêm algum dos cardnumbers (custo proporcional aos decks afetados).
+    """
+    wanted = {normalize_cardnumber(cn) for cn in cardnumbers if cn}
+    if not wanted:
+        return []
+    return list(
+        DeckCardIndex.objects.filter(cardnumber__in=wanted)
+        .values_list("deck_id", flat=True)
+        .distinct()
+    )
+
+
+def public_decks_using(cardnumber: str, limit: int = 20):
+    """
+    Decks públicos que usam a carta, com a quantidade (para o card_detail).
+    """
+    cn = normalize_cardnumber(cardnumber)
+    return (
+        DeckCardIndex.objects.filter(cardnumber=cn, deck__publico=True)
+        .select_related("deck", "deck__user", "deck__arquetipo")
+        .order_by("-deck__atualizado_em")[:limit]
+    )
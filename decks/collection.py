@@ -0,0 +1,189 @@
+# decks/collection.py
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .decklist_io import DecklistSource, normalize_cardnumber, parse_decklist
+from .models import Collection, DeckCardIndex
+from .pricing import load_prices
+
+UPSERT_BATCH_SIZE = 1000
+
+
+def collection_version_key(user_id: int) -> str:
+    return f"collection_version:{user_id}"
+
+
+def bump_collection_version(user_id: int) -> None:
+    cache.set(collection_version_key(user_id), time.time(), timeout=None)
+
+
+def collection_version(user_id: int):
+    return cache.get(collection_version_key(user_id))
+
+
+def owned_counts(user, cardnumbers: Optional[Iterable[str]] = None) -> Dict[str, int]:
+    """
+    cardnumber -> cópias na coleção (toda a coleção ou só os cardnumbers pedidos).
+    """
+    qs = Collection.objects.filter(user=user)
+    if cardnumbers is not None:
+        qs = qs.filter(cardnumber__in={normalize_cardnumber(cn) for cn in cardnumbers if cn})
+    return dict(qs.values_list("cardnumber", "quantidade"))
+
+
+# ----------------------------
+# Import (CSV / qualquer formato de decklist) com upsert em lote
+# ----------------------------
+@dataclass
+class CollectionImportResult:
+    cards: int
+    copies: int
+    removed: int
+    format: str
+
+
+def upsert_collection(user, counts: Dict[str, int], add: bool = False, replace: bool = False) -> int:
+    """
+    Grava {cardnumber: qtd} na coleção com bulk_create(update_conflicts=True).
+    add=True soma às cópias que já existem; replace=True apaga o resto da coleção.
+    Quantidade 0 (sem add) remove a carta. Retorna quantas linhas saíram.
+    """
+    counts = {normalize_cardnumber(cn): int(qty) for cn, qty in counts.items() if cn}
+    if add:
+        for cn, qty in owned_counts(user, counts.keys()).items():
+            counts[cn] += qty
+
+    keep = {cn: qty for cn, qty in counts.items() if qty > 0}
+    with transaction.atomic():
+        if replace:
+            removed, _ = Collection.objects.filter(user=user).exclude(cardnumber__in=keep.keys()).delete()
+        else:
+            drop = [cn for cn, qty in counts.items() if qty <= 0]
+            removed, _ = Collection.objects.filter(user=user, cardnumber__in=drop).delete() if drop else (0, None)
+
+        Collection.objects.bulk_create(
+            [Collection(user=user, cardnumber=cn, quantidade=qty) for cn, qty in keep.items()],
+            batch_size=UPSERT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["user", "cardnumber"],
+            update_fields=["quantidade", "atualizado_em"],
+        )
+
+    bump_collection_version(user.pk)
+    return removed
+
+
+def import_collection(
+    user, source: DecklistSource, add: bool = False, replace: bool = False, fmt: Optional[str] = None
+) -> CollectionImportResult:
+    """
+    Lê um CSV (cardnumber/quantidade) ou decklist em qualquer formato aceito
+    pelo parse_decklist (lido em pedaços) e grava na coleção. Levanta ValueError
+    se o formato não conseguir ler a entrada.
+    """
+    lines, fmt = parse_decklist(source, fmt)
+    counts: Dict[str, int] = {}
+    for dl in lines:
+        counts[normalize_cardnumber(dl.cardnumber)] = dl.qty
+    removed = upsert_collection(user, counts, add=add, replace=replace)
+    return CollectionImportResult(cards=len(counts), copies=sum(counts.values()), removed=removed, format=fmt)
+
+
+# ----------------------------
+# "Cartas que faltam" para um deck / para todos os decks do usuário
+# ----------------------------
+@dataclass
+class MissingCards:
+    rows: List[dict] = field(default_factory=list)
+    copies: int = 0
+    cost: Decimal = Decimal("0.00")
+    unpriced: int = 0
+
+
+def missing_cards(deck, user, price_rows: Iterable[dict]) -> MissingCards:
+    """
+    O que falta na coleção para montar o deck. A diferença (deck - coleção) sai
+    de uma query só no índice invertido; preço, nome e link vêm das linhas de
+    preço gravadas no deck (stored_price_summary).
+    """
+    owned = Collection.objects.filter(user=user, cardnumber=OuterRef("cardnumber")).values("quantidade")[:1]
+    needed = (
+        DeckCardIndex.objects.filter(deck=deck)
+        .annotate(falta=F("quantidade") - Coalesce(Subquery(owned), 0, output_field=IntegerField()))
+        .filter(falta__gt=0)
+        .order_by("cardnumber")
+        .values_list("cardnumber", "falta")
+    )
+
+    by_cn = {normalize_cardnumber(r["cardnumber"]): r for r in price_rows}
+    result = MissingCards()
+    for cn, qty in needed:
+        row = by_cn.get(cn, {})
+        unit = row.get("unit")
+        subtotal = unit * qty if unit is not None else None
+        result.rows.append({
+            "qty": qty,
+            "cardnumber": cn,
+            "name": row.get("name", ""),
+            "unit": unit,
+            "subtotal": subtotal,
+            "url": row.get("url", ""),
+        })
+        result.copies += qty
+        if subtotal is None:
+            result.unpriced += 1
+        else:
+            result.cost += subtotal
+    return result
+
+
+def missing_by_deck(user, deck_ids: Iterable[int]) -> Dict[int, MissingCards]:
+    """
+    Resumo (cópias que faltam, custo, sem preço) de vários decks de uma vez:
+    1 query no índice invertido + coleção + preços, e a conta é vetorizada
+    (uma linha por (deck, carta) no NumPy). As MissingCards voltam sem `rows`.
+    """
+    ids = list(deck_ids)
+    rows = list(DeckCardIndex.objects.filter(deck_id__in=ids).values_list("deck_id", "cardnumber", "quantidade"))
+    result = {deck_id: MissingCards() for deck_id in ids}
+    if not rows:
+        return result
+
+    deck_col, cn_col, qty_col = zip(*rows)
+    sorted_ids = np.unique(np.array(ids, dtype=np.int64))
+    deck_pos = np.searchsorted(sorted_ids, np.array(deck_col, dtype=np.int64))
+    cardnumbers, card_pos = np.unique(np.array(cn_col, dtype=object), return_inverse=True)
+    cardnumbers = cardnumbers.tolist()
+
+    owned = owned_counts(user, cardnumbers)
+    prices = load_prices(cardnumbers)
+    owned_vec = np.array([owned.get(cn, 0) for cn in cardnumbers], dtype=np.int64)
+    # centavos em int64 para não perder precisão no somatório
+    price_vec = np.array(
+        [int(prices[cn].price * 100) if cn in prices else 0 for cn in cardnumbers], dtype=np.int64
+    )
+    has_price = np.array([cn in prices for cn in cardnumbers], dtype=bool)
+
+    need = np.maximum(np.array(qty_col, dtype=np.int64) - owned_vec[card_pos], 0)
+    n_decks = len(sorted_ids)
+    copies = np.bincount(deck_pos, weights=need, minlength=n_decks).astype(np.int64)
+    cents = np.bincount(deck_pos, weights=need * price_vec[card_pos], minlength=n_decks).astype(np.int64)
+    unpriced = np.bincount(deck_pos, weights=(need > 0) & ~has_price[card_pos], minlength=n_decks).astype(np.int64)
+
+    for pos, deck_id in enumerate(sorted_ids.tolist()):
+        result[deck_id] = MissingCards(
+            copies=int(copies[pos]),
+            cost=Decimal(int(cents[pos])).scaleb(-2),
+            unpriced=int(unpriced[pos]),
+        )
+    return result
@@ -0,0 +1,245 @@
+# decks/cooccurrence.py
+from __future__ import annotations
+
+import hashlib
+import time
+from collections import defaultdict
+from itertools import combinations
+from typing import Dict, Iterable, List, Set, Tuple
+
+import numpy as np
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+
+from .models import CardCooccurrence, Deck, DeckCardIndex
+
+COOC_VERSION_CACHE_KEY = "decks_cooccurrence_version"
+PARTNERS_PER_CARD = 50
+CACHE_TIMEOUT = 60 * 60
+
+
+def eligible_decks():
+    """
+    Decks que entram na matriz: públicos ou usados em torneio.
+    """
+    return Deck.objects.filter(Q(publico=True) | Q(tournamentplayer__isnull=False)).distinct()
+
+
+# Invalidação: a versão global só muda no rebuild completo; no incremental
+# sobe só a versão das cartas que entraram no delta (as listas de parceiros
+# das outras cartas continuam valendo no cache).
+def _bump_version() -> None:
+    cache.set(COOC_VERSION_CACHE_KEY, time.time(), timeout=None)
+
+
+def _version():
+    version = cache.get(COOC_VERSION_CACHE_KEY)
+    if version is None:
+        version = time.time()
+        cache.set(COOC_VERSION_CACHE_KEY, version, timeout=None)
+    return version
+
+
+def _card_version_key(cardnumber: str) -> str:
+    return f"cooc-card-version:{cardnumber}"
+
+
+def _bump_cards(cardnumbers: Iterable[str]) -> None:
+    now = time.time()
+    cache.set_many({_card_version_key(cn): now for cn in cardnumbers}, timeout=None)
+
+
+def _card_versions(cardnumbers: Iterable[str]) -> Dict[str, object]:
+    cards = list(cardnumbers)
+    found = cache.get_many([_card_version_key(cn) for cn in cards])
+    return {cn: found.get(_card_version_key(cn), 0) for cn in cards}
+
+
+def _write_pairs(counts: Dict[Tuple[str, str], int]) -> None:
+    CardCooccurrence.objects.bulk_create(
+        [
+            CardCooccurrence(card_a=a, card_b=b, decks=n)
+            for (x, y), n in counts.items()
+            for a, b in ((x, y), (y, x))
+            if n > 0
+        ],
+        batch_size=2000,
+    )
+
+
+# ----------------------------
+# Rebuild completo (batch job)
+# ----------------------------
+def rebuild_cooccurrence() -> int:
+    """
+    Recalcula a matriz inteira a partir do índice invertido.
+    Pares gerados por deck com NumPy (triu_indices) e contados com np.unique.
+    Retorna quantos pares distintos foram gravados.
+    """
+    deck_ids = list(eligible_decks().values_list("id", flat=True))
+    eligible = set(deck_ids)
+
+    cards_by_deck: Dict[int, List[str]] = defaultdict(list)
+    rows = DeckCardIndex.objects.filter(deck_id__in=deck_ids).values_list("deck_id", "cardnumber")
+    for deck_id, cn in rows.iterator(chunk_size=5000):
+        cards_by_deck[deck_id].append(cn)
+
+    vocab = sorted({cn for cards in cards_by_deck.values() for cn in cards})
+    col = {cn: i for i, cn in enumerate(vocab)}
+    n_cols = max(len(vocab), 1)
+
+    codes = []
+    for cards in cards_by_deck.values():
+        idx = np.unique(np.fromiter((col[cn] for cn in cards), dtype=np.int64, count=len(cards)))
+        if len(idx) < 2:
+            continue
+        a, b = np.triu_indices(len(idx), 1)
+        codes.append(idx[a] * n_cols + idx[b])
+
+    counts: Dict[Tuple[str, str], int] = {}
+    if codes:
+        uniq, freq = np.unique(np.concatenate(codes), return_counts=True)
+        for code, n in zip(uniq.tolist(), freq.tolist()):
+            counts[(vocab[code // n_cols], vocab[code % n_cols])] = n
+
+    with transaction.atomic():
+        CardCooccurrence.objects.all().delete()
+        _write_pairs(counts)
+
+        decks = list(Deck.objects.only("id", "coocorrencia_cartas"))
+        for deck in decks:
+            deck.coocorrencia_cartas = sorted(set(cards_by_deck.get(deck.id, []))) if deck.id in eligible else []
+        Deck.objects.bulk_update(decks, ["coocorrencia_cartas"], batch_size=1000)
+
+    _bump_version()
+    return len(counts)
+
+
+# ----------------------------
+# Atualização incremental (chamada no refresh_decks)
+# ----------------------------
+def _pairs(cards: Iterable[str]) -> Set[Tuple[str, str]]:
+    return set(combinations(sorted(set(cards)), 2))
+
+
+def _apply_delta(delta: Dict[Tuple[str, str], int]) -> None:
+    """
+    Soma o delta direto no banco (nos dois sentidos de cada par), sem carregar
+    as linhas: upsert para os pares que ganharam decks, UPDATE para os que
+    perderam e limpeza dos que zeraram. ON CONFLICT funciona no SQLite e no Postgres.
+    """
+    qn = connection.ops.quote_name
+    table = qn(CardCooccurrence._meta.db_table)
+    a, b, n = qn("card_a"), qn("card_b"), qn("decks")
+
+    gained = [(x, y, d) for (p, q), d in delta.items() if d > 0 for x, y in ((p, q), (q, p))]
+    lost = [(-d, x, y) for (p, q), d in delta.items() if d < 0 for x, y in ((p, q), (q, p))]
+
+    with connection.cursor() as cursor:
+        if gained:
+            cursor.executemany(
+                f"INSERT INTO {table} ({a}, {b}, {n}) VALUES (%s, %s, %s) "
+                f"ON CONFLICT ({a}, {b}) DO UPDATE SET {n} = {table}.{n} + excluded.{n}",
+                gained,
+            )
+        if lost:
+            cursor.executemany(
+                f"UPDATE {table} SET {n} = CASE WHEN {n} > %s THEN {n} - %s ELSE 0 END WHERE {a} = %s AND {b} = %s",
+                [(d, d, x, y) for d, x, y in lost],
+            )
+            CardCooccurrence.objects.filter(decks=0, card_a__in={x for _, x, _ in lost}).delete()
+
+
+def update_cooccurrence(deck_ids: Iterable[int]) -> None:
+    """
+    Aplica só a diferença entre o conjunto de cartas já contado de cada deck
+    (Deck.coocorrencia_cartas) e o atual (índice invertido).
+    """
+    ids = list(deck_ids)
+    if not ids:
+        return
+
+    decks = list(Deck.objects.filter(id__in=ids).only("id", "coocorrencia_cartas"))
+    if not decks:
+        return
+
+    eligible = set(eligible_decks().filter(id__in=ids).values_list("id", flat=True))
+    current: Dict[int, List[str]] = defaultdict(list)
+    for deck_id, cn in DeckCardIndex.objects.filter(deck_id__in=ids).values_list("deck_id", "cardnumber"):
+        current[deck_id].append(cn)
+
+    delta: Dict[Tuple[str, str], int] = defaultdict(int)
+    changed = []
+    for deck in decks:
+        old = set(deck.coocorrencia_cartas or [])
+        new = set(current.get(deck.id, [])) if deck.id in eligible else set()
+        if old == new:
+            continue
+        old_pairs, new_pairs = _pairs(old), _pairs(new)
+        for pair in old_pairs - new_pairs:
+            delta[pair] -= 1
+        for pair in new_pairs - old_pairs:
+            delta[pair] += 1
+        deck.coocorrencia_cartas = sorted(new)
+        changed.append(deck)
+
+    delta = {pair: n for pair, n in delta.items() if n}
+    if not changed:
+        return
+
+    with transaction.atomic():
+        if delta:
+            _apply_delta(delta)
+        Deck.objects.bulk_update(changed, ["coocorrencia_cartas"])
+
+    if delta:
+        _bump_cards({cn for pair in delta for cn in pair})
+
+
+# ----------------------------
+# Recomendação (deck builder)
+# ----------------------------
+def _partners(cardnumber: str, version, card_version) -> List[Tuple[str, int]]:
+    key = f"cooc:{version}:{cardnumber}:{card_version}"
+    partners = cache.get(key)
+    if partners is None:
+        partners = list(
+            CardCooccurrence.objects.filter(card_a=cardnumber)
+            .order_by("-decks")
+            .values_list("card_b", "decks")[:PARTNERS_PER_CARD]
+        )
+        cache.set(key, partners, CACHE_TIMEOUT)
+    return partners
+
+
+def recommend_cards(deck: Deck, k: int = 10) -> List[Tuple[str, int]]:
+    """
+    Cartas que mais aparecem junto com as do deck (e que ele ainda não tem).
+    Soma as listas top-N já cacheadas de cada carta; o resultado fica em cache
+    pelo conjunto de cartas do deck + versão de cada uma delas, então só muda
+    quando uma das cartas do deck entrou num delta da matriz.
+    """
+    own = set(DeckCardIndex.objects.filter(deck=deck).values_list("cardnumber", flat=True))
+    if not own:
+        return []
+
+    version = _version()
+    versions = _card_versions(own)
+    digest = hashlib.sha1(
+        "|".join(f"{cn}:{versions[cn]}" for cn in sorted(own)).encode("utf-8")
+    ).hexdigest()
+    key = f"cooc-rec:{version}:{digest}:{k}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    scores: Dict[str, int] = defaultdict(int)
+    for cn in own:
+        for partner, n in _partners(cn, version, versions[cn]):
+            if partner not in own:
+                scores[partner] += n
+
+    result = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+    cache.set(key, result, CACHE_TIMEOUT)
+    return result
@@ -1,11 +1,23 @@
+import base64
+import csv
+import io
+import json
 import re
 from dataclasses import dataclass
-from typing import Iterable, List
+from itertools import chain
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 
 CARDNUMBER_RE = re.compile(r"^[A-Z0-9]+-\d{3}$")
 
 
+def normalize_cardnumber(cardnumber: str) -> str:
+    """
+    Forma canônica do cardnumber usada em índices/caches (ex: ' bt14-084' -> 'BT14-084').
+    """
+    return (cardnumber or "").strip().upper()
+
+
 @dataclass
 class DecklistLine:
     qty: int
@@ -13,6 +25,23 @@ class DecklistLine:
     cardnumber: str
 
 
+def _parse_official_line(line: str) -> Optional[DecklistLine]:
+    parts = line.split()
+    if len(parts) < 3:
+        return None
+    try:
+        qty = int(parts[0])
+    except ValueError:
+        return None
+
+    cardnumber = parts[-1].strip()
+    # cardnumber fora do CARDNUMBER_RE ainda é aceito (promos, variantes etc.)
+    name = " ".join(parts[1:-1]).strip()
+    if qty > 0 and cardnumber:
+        return DecklistLine(qty=qty, name=name, cardnumber=cardnumber)
+    return None
+
+
 def parse_decklist_text(text: str) -> List[DecklistLine]:
     """
     Lê um texto no formato:
@@ -24,52 +53,432 @@ def parse_decklist_text(text: str) -> List[DecklistLine]:
 
     e devolve uma lista de DecklistLine.
     Linhas em branco ou que começam com '//' são ignoradas.
+    Para outros formatos (JSON, TTS, CSV, untap...) use parse_decklist().
+    """
+    return list(_iter_official(_iter_chunks(text or "")))
+
+
+def build_decklist_text(lines: Iterable[DecklistLine], title: str = "// Digimon DeckList") -> str:
+    """
+    Monta o texto padrão de decklist a partir de uma lista de DecklistLine.
+    """
+    lines = list(lines)
+    if not lines:
+        return title + "\n\n"
+
+    max_name = max(len(dl.name or "") for dl in lines)
+    body = []
+    for dl in lines:
+        name = dl.name or ""
+        body.append(f"{dl.qty} {name:<{max_name}}  {dl.cardnumber}")
+
+    return title + "\n\n" + "\n".join(body) + "\n"
+
+
+# ----------------------------
+# Código compacto do deck (link curto para compartilhar)
+# ----------------------------
+# Layout (antes do base64url sem padding), tudo em varint:
+#   versão | nº de coleções | para cada coleção: len(nome), nome ASCII, nº de cartas,
+#            e por carta: (número - número anterior na coleção), quantidade
+#   | nº de cartas fora do padrão XXX-000 | para cada: len, cardnumber, quantidade
+# O nome da coleção ("BT24") é gravado uma vez só; números e quantidades
+# ocupam 1 byte na prática.
+DECK_CODE_VERSION = 1
+MAX_DECK_CODE_LENGTH = 2048
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    if value < 0:
+        raise ValueError("varint negativo")
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        if pos >= len(data) or shift > 28:
+            raise ValueError("código de deck truncado")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+def _write_str(out: bytearray, value: str) -> None:
+    raw = value.encode("ascii")
+    _write_varint(out, len(raw))
+    out += raw
+
+
+def _read_str(data: bytes, pos: int) -> Tuple[str, int]:
+    size, pos = _read_varint(data, pos)
+    if pos + size > len(data):
+        raise ValueError("código de deck truncado")
+    return data[pos:pos + size].decode("ascii"), pos + size
+
+
+def encode_deck_code(lines: Iterable[DecklistLine]) -> str:
+    """
+    Gera o código compacto (base64url) de uma decklist. Só cardnumber e
+    quantidade entram no código; nomes e seção (Main/Egg) vêm do cache de cartas.
+    """
+    totals: Dict[str, int] = {}
+    for dl in lines:
+        cn = normalize_cardnumber(dl.cardnumber)
+        if cn and dl.qty > 0:
+            totals[cn] = totals.get(cn, 0) + int(dl.qty)
+
+    by_set: Dict[str, List[Tuple[int, int]]] = {}
+    extras: List[Tuple[str, int]] = []
+    for cn, qty in sorted(totals.items()):
+        if CARDNUMBER_RE.match(cn) and cn.isascii():
+            prefix, number = cn.rsplit("-", 1)
+            by_set.setdefault(prefix, []).append((int(number), qty))
+        elif cn.isascii():
+            extras.append((cn, qty))
+
+    out = bytearray()
+    _write_varint(out, DECK_CODE_VERSION)
+    _write_varint(out, len(by_set))
+    for prefix in sorted(by_set):
+        cards = sorted(by_set[prefix])
+        _write_str(out, prefix)
+        _write_varint(out, len(cards))
+        previous = 0
+        for number, qty in cards:
+            _write_varint(out, number - previous)
+            _write_varint(out, qty)
+            previous = number
+    _write_varint(out, len(extras))
+    for cn, qty in extras:
+        _write_str(out, cn)
+        _write_varint(out, qty)
+
+    return base64.urlsafe_b64encode(bytes(out)).decode("ascii").rstrip("=")
+
+
+def decode_deck_code(code: str) -> List[DecklistLine]:
     """
+    Lê um código gerado por encode_deck_code. Levanta ValueError se for inválido.
+    As linhas voltam sem nome (resolva pelo DigimonCard se precisar).
+    """
+    code = (code or "").strip()
+    if not code or len(code) > MAX_DECK_CODE_LENGTH:
+        raise ValueError("código de deck vazio ou grande demais")
+    try:
+        data = base64.urlsafe_b64decode(code + "=" * (-len(code) % 4))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("código de deck inválido") from exc
+
+    version, pos = _read_varint(data, 0)
+    if version != DECK_CODE_VERSION:
+        raise ValueError(f"versão de código de deck desconhecida: {version}")
+
     lines: List[DecklistLine] = []
+    sets, pos = _read_varint(data, pos)
+    for _ in range(sets):
+        prefix, pos = _read_str(data, pos)
+        count, pos = _read_varint(data, pos)
+        number = 0
+        for _ in range(count):
+            step, pos = _read_varint(data, pos)
+            qty, pos = _read_varint(data, pos)
+            if qty <= 0:
+                raise ValueError("código de deck com quantidade zero")
+            number += step
+            lines.append(DecklistLine(qty=qty, name="", cardnumber=f"{prefix}-{number:03d}"))
+
+    extras, pos = _read_varint(data, pos)
+    for _ in range(extras):
+        cn, pos = _read_str(data, pos)
+        qty, pos = _read_varint(data, pos)
+        if qty <= 0:
+            raise ValueError("código de deck com quantidade zero")
+        lines.append(DecklistLine(qty=qty, name="", cardnumber=cn))
+
+    if pos != len(data):
+        raise ValueError("código de deck com bytes sobrando")
+    return lines
+
+
+# ----------------------------
+# Leitura em streaming + registro de formatos
+# ----------------------------
+# Fonte aceita por parse_decklist: texto já em memória ou arquivo aberto
+# (ex: upload, io.TextIOWrapper). Arquivos são lidos em blocos; nada é
+# carregado inteiro e cada caractere é visto um número constante de vezes.
+DecklistSource = Union[str, IO[str]]
+
+READ_CHUNK_SIZE = 64 * 1024
+DETECT_HEAD_SIZE = 4096
+
+
+def _iter_chunks(source: DecklistSource) -> Iterator[str]:
+    if isinstance(source, str):
+        for start in range(0, len(source), READ_CHUNK_SIZE):
+            yield source[start:start + READ_CHUNK_SIZE]
+        return
+    while True:
+        chunk = source.read(READ_CHUNK_SIZE)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_lines(source: Union[DecklistSource, Iterable[str]]) -> Iterator[str]:
+    """
+    Linhas (sem espaços nas pontas) de um texto/arquivo, sem montar a lista inteira.
+    """
+    chunks = source if not isinstance(source, str) and not hasattr(source, "read") else _iter_chunks(source)
+    pending = ""
+    for chunk in chunks:
+        parts = (pending + chunk).split("\n")
+        pending = parts.pop()
+        for part in parts:
+            yield part.strip()
+    if pending:
+        yield pending.strip()
 
-    for raw in (text or "").splitlines():
-        line = (raw or "").strip()
-        if not line:
+
+def iter_json_array(chunks: Iterable[str]) -> Iterator[object]:
+    """
+    Elementos de um array JSON no topo do documento, um por vez.
+    Usa raw_decode no buffer e só lê mais quando o elemento atual está incompleto.
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    started = False
+
+    def more() -> bool:
+        nonlocal buffer, pos
+        chunk = next(chunks, None)
+        if chunk is None:
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,\ufeff":
+            pos += 1
+        if pos >= len(buffer):
+            if not more():
+                raise ValueError("JSON terminou antes do fim do array")
             continue
-        if line.startswith("//"):
+
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("esperava um array JSON")
+            started = True
+            pos += 1
             continue
+        if buffer[pos] == "]":
+            return
 
-        parts = line.split()
-        if len(parts) < 3:
+        try:
+            value, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if not more():
+                raise ValueError("JSON inválido")
+            continue
+        # número no fim do buffer pode estar cortado ("12" de "123"): garante um delimitador depois
+        if end == len(buffer) and more():
             continue
+        pos = end
+        yield value
+
+
+@dataclass(frozen=True)
+class DecklistFormat:
+    name: str
+    label: str
+    detect: Callable[[str], bool]                          # recebe o começo do texto
+    parse: Callable[[Iterable[str]], Iterator[DecklistLine]]  # recebe os blocos de texto
+
+
+DECKLIST_FORMATS: Dict[str, DecklistFormat] = {}
+
+
+def register_format(name: str, label: str, detect: Callable[[str], bool]):
+    """
+    Decorator para registrar um parser. A ordem de registro é a ordem de detecção;
+    o formato oficial (texto) fica por último como fallback.
+    """
+    def decorator(parse):
+        DECKLIST_FORMATS[name] = DecklistFormat(name=name, label=label, detect=detect, parse=parse)
+        return parse
+    return decorator
+
+
+def _first_line(head: str) -> str:
+    for line in head.lstrip("\ufeff").splitlines():
+        if line.strip() and not line.strip().startswith("//"):
+            return line.strip()
+    return ""
+
+
+def _first_json_element(head: str) -> str:
+    body = head.lstrip("\ufeff \t\r\n")
+    return body[1:].lstrip(" \t\r\n")[:1] if body.startswith("[") else ""
+
+
+# --- JSON de deck builders: [{"id": "BT1-010", "count": 4, "name": "..."}, ...]
+_JSON_CN_KEYS = ("cardnumber", "card_number", "cardNumber", "number", "id", "code", "cn")
+_JSON_QTY_KEYS = ("count", "qty", "quantity", "amount", "copies")
+
+
+def _json_card(item) -> Optional[DecklistLine]:
+    if not isinstance(item, dict):
+        return None
+    cn = next((str(item[k]) for k in _JSON_CN_KEYS if item.get(k)), "")
+    qty_raw = next((item[k] for k in _JSON_QTY_KEYS if item.get(k) is not None), 1)
+    try:
+        qty = int(qty_raw)
+    except (TypeError, ValueError):
+        return None
+    if not cn or qty <= 0:
+        return None
+    return DecklistLine(qty=qty, name=str(item.get("name") or "").strip(), cardnumber=cn.strip())
+
+
+@register_format("json", "JSON (deck builders)", lambda head: _first_json_element(head) in ("{", "]"))
+def _iter_json(chunks: Iterable[str]) -> Iterator[DecklistLine]:
+    for item in iter_json_array(chunks):
+        line = _json_card(item)
+        if line:
+            yield line
+
+
+# --- Tabletop Simulator: ["Exported from ...", "BT1-010", "BT1-010", ...] (1 entrada por cópia)
+@register_format("tts", "Tabletop Simulator", lambda head: _first_json_element(head) == '"')
+def _iter_tts(chunks: Iterable[str]) -> Iterator[DecklistLine]:
+    for item in iter_json_array(chunks):
+        cn = normalize_cardnumber(str(item)) if isinstance(item, str) else ""
+        if CARDNUMBER_RE.match(cn):
+            yield DecklistLine(qty=1, name="", cardnumber=cn)
+
 
-        qty_str = parts[0]
+# --- CSV com cabeçalho: cardnumber,qty[,name] (aceita ; como separador)
+_CSV_CN_HEADERS = {"cardnumber", "card_number", "number", "id", "code", "codigo", "carta"}
+_CSV_QTY_HEADERS = {"qty", "quantity", "count", "quantidade", "qtd", "amount"}
+
+
+def _looks_like_csv(head: str) -> bool:
+    first = _first_line(head).lower()
+    if "," not in first and ";" not in first:
+        return False
+    cells = {c.strip().strip('"') for c in re.split(r"[,;]", first)}
+    return bool(cells & _CSV_CN_HEADERS) and bool(cells & _CSV_QTY_HEADERS)
+
+
+@register_format("csv", "CSV", _looks_like_csv)
+def _iter_csv(chunks: Iterable[str]) -> Iterator[DecklistLine]:
+    lines = (line for line in iter_lines(chunks) if line and not line.startswith("//"))
+    first = next(lines, "")
+    delimiter = ";" if first.count(";") > first.count(",") else ","
+    header = [h.strip().strip('"').lower() for h in next(csv.reader([first], delimiter=delimiter), [])]
+
+    cn_col = next((i for i, h in enumerate(header) if h in _CSV_CN_HEADERS), None)
+    qty_col = next((i for i, h in enumerate(header) if h in _CSV_QTY_HEADERS), None)
+    name_col = next((i for i, h in enumerate(header) if h in ("name", "nome", "card_name")), None)
+    if cn_col is None or qty_col is None:
+        return
+
+    for row in csv.reader(lines, delimiter=delimiter):
         try:
-            qty = int(qty_str)
-        except ValueError:
+            qty = int((row[qty_col] or "").strip())
+            cn = row[cn_col].strip()
+        except (IndexError, ValueError):
             continue
+        name = row[name_col].strip() if name_col is not None and name_col < len(row) else ""
+        if qty > 0 and cn:
+            yield DecklistLine(qty=qty, name=name, cardnumber=cn)
 
-        cardnumber = parts[-1].strip()
-        if not CARDNUMBER_RE.match(cardnumber):
-            # se não bater o formato, ainda assim podemos aceitar
-            # mas você pode trocar para `continue` se quiser mais rígido
-            pass
 
-        name = " ".join(parts[1:-1]).strip()
+# --- untap / listas com cardnumber entre parênteses: "4 Agumon (BT1-010)"
+UNTAP_LINE_RE = re.compile(r"^(\d+)x?\s+(.*?)\s*\(([A-Za-z0-9]+-\d{3}[A-Za-z0-9_]*)\)\s*$")
 
-        if qty > 0 and cardnumber:
-            lines.append(DecklistLine(qty=qty, name=name, cardnumber=cardnumber))
 
-    return lines
+@register_format("untap", "untap", lambda head: bool(UNTAP_LINE_RE.match(_first_line(head))))
+def _iter_untap(chunks: Iterable[str]) -> Iterator[DecklistLine]:
+    for line in iter_lines(chunks):
+        match = UNTAP_LINE_RE.match(line)
+        if match and int(match.group(1)) > 0:
+            yield DecklistLine(qty=int(match.group(1)), name=match.group(2).strip(), cardnumber=match.group(3))
 
 
-def build_decklist_text(lines: Iterable[DecklistLine], title: str = "// Digimon DeckList") -> str:
+# --- código compacto (encode_deck_code) colado no lugar da lista
+DECK_CODE_RE = re.compile(r"^[A-Za-z0-9_-]{4,%d}$" % MAX_DECK_CODE_LENGTH)
+
+
+def _looks_like_deck_code(head: str) -> bool:
+    text = head.strip()
+    if not DECK_CODE_RE.match(text):
+        return False
+    try:
+        decode_deck_code(text)
+    except ValueError:
+        return False
+    return True
+
+
+@register_format("code", "Código de deck", _looks_like_deck_code)
+def _iter_code(chunks: Iterable[str]) -> Iterator[DecklistLine]:
+    yield from decode_deck_code("".join(chunks))
+
+
+# --- formato oficial em texto (fallback)
+@register_format("oficial", "Texto oficial (// Digimon DeckList)", lambda head: True)
+def _iter_official(chunks: Iterable[str]) -> Iterator[DecklistLine]:
+    for line in iter_lines(chunks):
+        if not line or line.startswith("//"):
+            continue
+        parsed = _parse_official_line(line)
+        if parsed:
+            yield parsed
+
+
+def detect_format(head: str) -> DecklistFormat:
+    for fmt in DECKLIST_FORMATS.values():
+        if fmt.detect(head):
+            return fmt
+    return DECKLIST_FORMATS["oficial"]
+
+
+def parse_decklist(source: DecklistSource, fmt: Optional[str] = None) -> Tuple[List[DecklistLine], str]:
     """
-    Monta o texto padrão de decklist a partir de uma lista de DecklistLine.
+    Lê uma decklist em qualquer formato registrado (detecta pelo começo do texto,
+    ou força com `fmt`). Linhas repetidas do mesmo cardnumber são somadas.
+    Retorna (linhas, nome do formato). Levanta ValueError se o formato
+    escolhido não conseguir ler a entrada (ex: JSON quebrado).
     """
-    lines = list(lines)
-    if not lines:
-        return title + "\n\n"
+    chunks = _iter_chunks(source)
+    head = ""
+    for chunk in chunks:
+        head += chunk
+        if len(head) >= DETECT_HEAD_SIZE:
+            break
 
-    max_name = max(len(dl.name or "") for dl in lines)
-    body = []
-    for dl in lines:
-        name = dl.name or ""
-        body.append(f"{dl.qty} {name:<{max_name}}  {dl.cardnumber}")
+    parser = DECKLIST_FORMATS[fmt] if fmt else detect_format(head[:DETECT_HEAD_SIZE])
 
-    return title + "\n\n" + "\n".join(body) + "\n"
+    totals: Dict[str, DecklistLine] = {}
+    for line in parser.parse(chain([head], chunks)):
+        key = normalize_cardnumber(line.cardnumber)
+        if key in totals:
+            totals[key].qty += line.qty
+            totals[key].name = totals[key].name or line.name
+        else:
+            totals[key] = DecklistLine(qty=line.qty, name=line.name, cardnumber=line.cardnumber.strip())
+    return list(totals.values()), parser.name
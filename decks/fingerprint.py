@@ -0,0 +1,105 @@
+# decks/fingerprint.py
+from __future__ import annotations
+
+import hashlib
+from collections import defaultdict
+from typing import Dict, Iterable, List, Tuple
+
+from cards.models import DigimonCard
+
+from .decklist_io import DecklistLine, normalize_cardnumber
+from .models import Deck, DeckCard
+from .rules import is_egg_card
+
+FINGERPRINT_BATCH_SIZE = 500
+
+
+def compute_fingerprint(entries: Iterable[Tuple[str, str, int]]) -> str:
+    """
+    Hash canônico (sha256) do conteúdo do deck, independente da ordem das linhas.
+    `entries` = (section, cardnumber, qty); linhas repetidas são somadas.
+    Deck vazio -> "" (para não agrupar todos os decks vazios como iguais).
+    """
+    totals: Dict[Tuple[str, str], int] = defaultdict(int)
+    for section, cardnumber, qty in entries:
+        cn = normalize_cardnumber(cardnumber)
+        qty = int(qty or 0)
+        if cn and qty > 0:
+            totals[((section or DeckCard.SECTION_MAIN).upper(), cn)] += qty
+
+    if not totals:
+        return ""
+
+    canonical = "\n".join(f"{section}|{cn}|{qty}" for (section, cn), qty in sorted(totals.items()))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def deck_fingerprint(deck_id: int) -> str:
+    """
+    Fingerprint atual de um deck, direto dos DeckCards (1 query pequena).
+    Usado no signal de DeckCard, na mesma transação da edição.
+    """
+    rows = DeckCard.objects.filter(deck_id=deck_id).values_list(
+        "section", "codigo_carta", "card__cardnumber", "quantidade"
+    )
+    return compute_fingerprint((section, codigo or card_cn, qty) for section, codigo, card_cn, qty in rows)
+
+
+def refresh_fingerprints(deck_ids: Iterable[int]) -> None:
+    """
+    Recalcula Deck.fingerprint dos decks informados (1 query de DeckCard por lote).
+    """
+    ids = sorted({int(i) for i in deck_ids if i})
+
+    for start in range(0, len(ids), FINGERPRINT_BATCH_SIZE):
+        batch = list(Deck.objects.filter(id__in=ids[start:start + FINGERPRINT_BATCH_SIZE]).only("id", "fingerprint"))
+        if not batch:
+            continue
+
+        entries: Dict[int, List[Tuple[str, str, int]]] = {d.id: [] for d in batch}
+        rows = DeckCard.objects.filter(deck_id__in=entries.keys()).values_list(
+            "deck_id", "section", "codigo_carta", "card__cardnumber", "quantidade"
+        )
+        for deck_id, section, codigo, card_cn, qty in rows:
+            entries[deck_id].append((section, codigo or card_cn, qty))
+
+        changed = []
+        for deck in batch:
+            fp = compute_fingerprint(entries[deck.id])
+            if fp != deck.fingerprint:
+                deck.fingerprint = fp
+                changed.append(deck)
+
+        if changed:
+            Deck.objects.bulk_update(changed, ["fingerprint"])
+
+
+def fingerprint_for_lines(lines: Iterable[DecklistLine]) -> str:
+    """
+    Fingerprint de uma decklist em texto (ex: decklist de torneio), resolvendo
+    a seção (MAIN/EGG) pelo tipo da carta em cache (1 query).
+    """
+    lines = list(lines)
+    cardnumbers = {normalize_cardnumber(dl.cardnumber) for dl in lines}
+    eggs = {
+        normalize_cardnumber(c.cardnumber)
+        for c in DigimonCard.objects.filter(cardnumber__in=cardnumbers).only("cardnumber", "card_type")
+        if is_egg_card(c)
+    }
+    return compute_fingerprint(
+        (
+            DeckCard.SECTION_EGG if normalize_cardnumber(dl.cardnumber) in eggs else DeckCard.SECTION_MAIN,
+            dl.cardnumber,
+            dl.qty,
+        )
+        for dl in lines
+    )
+
+
+def decks_with_fingerprint(fingerprint: str):
+    """
+    Decks com exatamente o mesmo conteúdo (lookup indexado).
+    """
+    if not fingerprint:
+        return Deck.objects.none()
+    return Deck.objects.filter(fingerprint=fingerprint)
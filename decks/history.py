@@ -0,0 +1,234 @@
+# decks/history.py
+from __future__ import annotations
+
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max, Q
+
+from cards.models import DigimonCard
+
+from .decklist_io import normalize_cardnumber
+from .models import Deck, DeckCard, DeckVersion
+
+# Snapshot completo nas versões 1, 11, 21...; as demais guardam só o delta.
+# Reconstruir qualquer versão = 1 snapshot + no máximo SNAPSHOT_EVERY-1 deltas (1 query).
+SNAPSHOT_EVERY = 10
+RECORD_ATTEMPTS = 3
+
+# conteúdo do deck: "SECTION|CARDNUMBER" -> quantidade
+Content = Dict[str, int]
+
+
+def content_key(section: str, cardnumber: str) -> str:
+    return f"{(section or DeckCard.SECTION_MAIN).upper()}|{normalize_cardnumber(cardnumber)}"
+
+
+def split_key(key: str) -> Tuple[str, str]:
+    section, cardnumber = key.split("|", 1)
+    return section, cardnumber
+
+
+def current_contents(deck_ids: Iterable[int]) -> Dict[int, Content]:
+    contents: Dict[int, Content] = defaultdict(dict)
+    rows = DeckCard.objects.filter(deck_id__in=list(deck_ids)).values_list(
+        "deck_id", "section", "codigo_carta", "card__cardnumber", "quantidade"
+    )
+    for deck_id, section, codigo, card_cn, qty in rows:
+        cn = codigo or card_cn
+        if not cn or not qty:
+            continue
+        key = content_key(section, cn)
+        contents[deck_id][key] = contents[deck_id].get(key, 0) + qty
+    return contents
+
+
+def make_delta(old: Content, new: Content) -> Content:
+    """
+    Só as chaves que mudaram, com a quantidade nova (0 = carta saiu).
+    """
+    delta = {key: qty for key, qty in new.items() if old.get(key) != qty}
+    delta.update({key: 0 for key in old if key not in new})
+    return delta
+
+
+def apply_delta(content: Content, delta: Content) -> Content:
+    result = dict(content)
+    for key, qty in delta.items():
+        if qty:
+            result[key] = qty
+        else:
+            result.pop(key, None)
+    return result
+
+
+def is_snapshot_number(numero: int) -> bool:
+    return (numero - 1) % SNAPSHOT_EVERY == 0
+
+
+def _snapshot_number(numero: int) -> int:
+    return numero - (numero - 1) % SNAPSHOT_EVERY
+
+
+def versions_contents(wanted: Dict[int, int]) -> Dict[int, Content]:
+    """
+    Conteúdo de várias versões de uma vez ({deck_id: numero}), numa query só:
+    de cada deck vêm o snapshot anterior + os deltas até a versão pedida.
+    Versão inexistente (ou sem snapshot) fica de fora do resultado.
+    """
+    if not wanted:
+        return {}
+
+    # agrupa por número do snapshot para a query ter poucos ORs
+    by_start: Dict[int, List[int]] = defaultdict(list)
+    for deck_id, numero in wanted.items():
+        by_start[_snapshot_number(numero)].append(deck_id)
+    cond = Q()
+    for start, deck_ids in by_start.items():
+        cond |= Q(deck_id__in=deck_ids, numero__gte=start)
+
+    rows: Dict[int, list] = defaultdict(list)
+    for deck_id, numero, snapshot, delta in (
+        DeckVersion.objects.filter(cond).order_by("deck_id", "numero").values_list("deck_id", "numero", "snapshot", "delta")
+    ):
+        if numero <= wanted[deck_id]:
+            rows[deck_id].append((numero, snapshot, delta))
+
+    contents: Dict[int, Content] = {}
+    for deck_id, versions in rows.items():
+        if versions[-1][0] != wanted[deck_id] or versions[0][1] is None:
+            continue
+        content: Content = {}
+        for _, snapshot, delta in versions:
+            content = dict(snapshot) if snapshot is not None else apply_delta(content, delta or {})
+        contents[deck_id] = content
+    return contents
+
+
+def version_contents(deck_id: int, numero: int) -> Optional[Content]:
+    """
+    Reconstrói o conteúdo da versão `numero` (snapshot anterior + deltas).
+    """
+    return versions_contents({deck_id: numero}).get(deck_id)
+
+
+def count_changes(previous: Content, delta: Content) -> Tuple[int, int]:
+    """
+    (cartas adicionadas, cartas removidas) de um delta sobre o conteúdo anterior.
+    """
+    added = removed = 0
+    for key, qty in delta.items():
+        change = qty - previous.get(key, 0)
+        if change > 0:
+            added += change
+        else:
+            removed -= change
+    return added, removed
+
+
+# ----------------------------
+# Gravação (chamada no refresh_decks)
+# ----------------------------
+def record_versions(deck_ids: Iterable[int]) -> None:
+    """
+    Cria uma DeckVersion para cada deck cujo fingerprint mudou desde a última
+    versão gravada. Depende do Deck.fingerprint já atualizado.
+    Dois workers no mesmo deck: as linhas do Deck ficam travadas até o fim da
+    gravação; onde não há lock (SQLite), o unique (deck, numero) estoura e a
+    gravação é refeita lendo a versão que o outro gravou.
+    """
+    ids = sorted({int(i) for i in deck_ids if i})
+    if not ids:
+        return
+
+    for attempt in range(RECORD_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                _record_versions(ids)
+            return
+        except IntegrityError:
+            if attempt == RECORD_ATTEMPTS - 1:
+                raise
+
+
+def _record_versions(ids: List[int]) -> None:
+    fingerprints = dict(
+        Deck.objects.select_for_update().filter(id__in=ids).order_by("id").values_list("id", "fingerprint")
+    )
+    last_numbers = dict(
+        DeckVersion.objects.filter(deck_id__in=fingerprints.keys())
+        .values("deck_id").order_by().annotate(n=Max("numero")).values_list("deck_id", "n")
+    )
+    # numero__in também pega versões antigas de outros decks; refiltra no Python
+    last_fps = {
+        deck_id: fp
+        for deck_id, numero, fp in DeckVersion.objects.filter(
+            deck_id__in=last_numbers.keys(), numero__in=set(last_numbers.values())
+        ).order_by().values_list("deck_id", "numero", "fingerprint")
+        if last_numbers[deck_id] == numero
+    } if last_numbers else {}
+
+    changed = [
+        deck_id for deck_id, fp in fingerprints.items()
+        if (deck_id in last_numbers and last_fps.get(deck_id) != fp) or (deck_id not in last_numbers and fp)
+    ]
+    if not changed:
+        return
+
+    contents = current_contents(changed)
+    previous_contents = versions_contents({d: last_numbers[d] for d in changed if d in last_numbers})
+    new_versions = []
+    for deck_id in changed:
+        content = contents.get(deck_id, {})
+        numero = last_numbers.get(deck_id, 0) + 1
+        previous = previous_contents.get(deck_id, {})
+        delta = make_delta(previous, content)
+        added, removed = count_changes(previous, delta)
+
+        version = DeckVersion(
+            deck_id=deck_id,
+            numero=numero,
+            fingerprint=fingerprints[deck_id],
+            cartas_adicionadas=added,
+            cartas_removidas=removed,
+        )
+        if is_snapshot_number(numero):
+            version.snapshot = content
+        else:
+            version.delta = delta
+        new_versions.append(version)
+
+    DeckVersion.objects.bulk_create(new_versions)
+
+
+# ----------------------------
+# Diff (entre versões ou entre decks)
+# ----------------------------
+@dataclass
+class DiffRow:
+    section: str
+    cardnumber: str
+    name: str
+    qty_a: int
+    qty_b: int
+
+    @property
+    def change(self) -> int:
+        return self.qty_b - self.qty_a
+
+
+def diff_contents(a: Content, b: Content, only_changes: bool = True) -> List[DiffRow]:
+    keys = sorted(set(a) | set(b))
+    if only_changes:
+        keys = [k for k in keys if a.get(k, 0) != b.get(k, 0)]
+
+    cardnumbers = {split_key(k)[1] for k in keys}
+    names = dict(DigimonCard.objects.filter(cardnumber__in=cardnumbers).values_list("cardnumber", "name"))
+
+    rows = []
+    for key in keys:
+        section, cn = split_key(key)
+        rows.append(DiffRow(section, cn, names.get(cn, ""), a.get(key, 0), b.get(key, 0)))
+    return rows
@@ -0,0 +1,104 @@
+# decks/jobs.py
+"""
+Tarefas adiadas dos decks (fila em core.jobs, processada pelo run_jobs).
+Os handlers importam os serviços só na hora de rodar: pricing/signals
+enfileiram daqui sem criar import circular com services.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, time
+from typing import Iterable, List, Optional
+
+from django.utils import timezone
+
+from core.jobs import enqueue, job
+from core.models import PendingJob
+
+DECK_REFRESH = "decks.refresh"      # chave = deck_id
+PRICE_REFRESH = "decks.prices"      # chave = cardnumber cujo preço mudou
+REVALIDATE = "decks.revalidate"     # chave = cardnumber cuja regra mudou
+MATRIX_BUILD = "decks.matrix"       # chave única: matriz de similaridade inteira
+RULES_ROLLOVER = "decks.rollover"   # chave = data ISO em que uma vigência começa/termina
+
+# a matriz é remontada no máximo uma vez a cada MATRIX_DELAY segundos: enquanto
+# o job estiver na fila, novos pedidos caem na mesma linha
+MATRIX_DELAY = 60
+
+
+def schedule_refresh(deck_ids: Iterable[int]) -> None:
+    """
+    Recalcula os dados derivados dos decks (índice, fingerprint, histórico,
+    preço, estatísticas, legalidade, coocorrência) fora do request.
+    """
+    enqueue(DECK_REFRESH, deck_ids)
+
+
+def refresh_pending(deck_id: int) -> bool:
+    """Se o deck ainda tem recálculo na fila (resumo de preço etc. desatualizado)."""
+    return PendingJob.objects.filter(kind=DECK_REFRESH, key=str(deck_id)).exists()
+
+
+def any_refresh_pending(deck_ids: Iterable[int]) -> bool:
+    """Se algum dos decks ainda tem recálculo na fila (índice invertido desatualizado)."""
+    return PendingJob.objects.filter(kind=DECK_REFRESH, key__in=[str(i) for i in deck_ids]).exists()
+
+
+def schedule_price_refresh(cardnumbers: Iterable[str]) -> None:
+    enqueue(PRICE_REFRESH, cardnumbers)
+
+
+def schedule_revalidate(cardnumbers: Iterable[str]) -> None:
+    enqueue(REVALIDATE, cardnumbers)
+
+
+def schedule_matrix_build(delay: float = MATRIX_DELAY) -> None:
+    enqueue(MATRIX_BUILD, ["all"], delay=delay)
+
+
+def schedule_rule_rollover(days: Iterable[Optional[date]]) -> None:
+    """
+    Agenda a revalidação para a meia-noite (hora local) de cada virada de
+    vigência futura: a banlist que entra em vigor daqui a um mês marca os
+    decks como ilegais no dia, sem cron. Viradas já passadas são ignoradas.
+    """
+    now = timezone.now()
+    for day in {d for d in days if d}:
+        start = timezone.make_aware(datetime.combine(day, time.min))
+        if start > now:
+            enqueue(RULES_ROLLOVER, [day.isoformat()], delay=(start - now).total_seconds())
+
+
+@job(DECK_REFRESH, batch_size=200)
+def _refresh_decks(keys: List[str]) -> None:
+    from .services import refresh_decks
+
+    refresh_decks(int(key) for key in keys)
+
+
+@job(PRICE_REFRESH, batch_size=500)
+def _refresh_prices(keys: List[str]) -> None:
+    from .card_index import decks_using_cardnumbers
+    from .pricing import refresh_price_summaries
+
+    refresh_price_summaries(decks_using_cardnumbers(keys))
+
+
+@job(REVALIDATE, batch_size=500)
+def _revalidate(keys: List[str]) -> None:
+    from .legality import revalidate_for_cardnumbers
+
+    revalidate_for_cardnumbers(keys)
+
+
+@job(RULES_ROLLOVER, batch_size=50)
+def _rollover(keys: List[str]) -> None:
+    from .legality import revalidate_rollovers
+
+    revalidate_rollovers(date.fromisoformat(key) for key in keys)
+
+
+@job(MATRIX_BUILD, batch_size=1)
+def _build_matrix(keys: List[str]) -> None:
+    from .similarity import publish_matrix
+
+    publish_matrix()
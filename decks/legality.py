@@ -0,0 +1,132 @@
+# decks/legality.py
+from __future__ import annotations
+
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from .browse import bump_public_decks_version
+from .card_index import decks_using_cardnumbers
+from .decklist_io import normalize_cardnumber
+from .jobs import schedule_revalidate
+from .models import Deck, DeckCard
+from .rules import RuleSet, bump_rules_version, get_ruleset, get_timeline
+
+# Decks revalidados por lote (1 query de DeckCard + 1 bulk_update por lote)
+REVALIDATE_BATCH_SIZE = 200
+
+
+def _deck_contents(deck_ids: List[int]) -> Dict[int, dict]:
+    contents = {
+        deck_id: {"main": 0, "egg": 0, "counts": defaultdict(int)}
+        for deck_id in deck_ids
+    }
+    rows = DeckCard.objects.filter(deck_id__in=deck_ids).values_list(
+        "deck_id", "section", "codigo_carta", "card__cardnumber", "quantidade"
+    )
+    for deck_id, section, codigo, card_cn, qty in rows:
+        qty = int(qty or 0)
+        entry = contents[deck_id]
+        if (section or "").upper() == DeckCard.SECTION_EGG:
+            entry["egg"] += qty
+        else:
+            entry["main"] += qty
+        cn = normalize_cardnumber(codigo or card_cn)
+        if cn:
+            entry["counts"][cn] += qty
+    return contents
+
+
+def revalidate_decks(deck_ids: Iterable[int], ruleset: Optional[RuleSet] = None) -> int:
+    """
+    Recalcula Deck.legal / Deck.violacoes dos decks informados, em lotes.
+    Se algum deck público mudou de legal para ilegal (ou o contrário), invalida
+    o cache do explorador (filtro "só legais") depois do commit.
+    Retorna quantos decks foram gravados.
+    """
+    ids = sorted({int(i) for i in deck_ids if i})
+    if not ids:
+        return 0
+
+    ruleset = ruleset or get_ruleset()
+    updated = 0
+    public_flipped = False
+
+    for start in range(0, len(ids), REVALIDATE_BATCH_SIZE):
+        batch = list(Deck.objects.filter(id__in=ids[start:start + REVALIDATE_BATCH_SIZE]).only("id", "legal", "publico"))
+        if not batch:
+            continue
+
+        contents = _deck_contents([d.id for d in batch])
+        now = timezone.now()
+        for deck in batch:
+            entry = contents[deck.id]
+            problems = ruleset.violations(entry["main"], entry["egg"], entry["counts"])
+            if deck.publico and deck.legal == bool(problems):
+                public_flipped = True
+            deck.legal = not problems
+            deck.violacoes = problems
+            deck.legalidade_verificada_em = now
+
+        Deck.objects.bulk_update(batch, ["legal", "violacoes", "legalidade_verificada_em"])
+        updated += len(batch)
+
+    if public_flipped:
+        transaction.on_commit(bump_public_decks_version)
+    return updated
+
+
+def violations_on(deck_ids: Iterable[int], day) -> Dict[int, List[str]]:
+    """
+    Valida decks com as regras vigentes em `day` (ex: data de um torneio),
+    sem gravar nada. Retorna {deck_id: [violações]}.
+    """
+    ids = sorted({int(i) for i in deck_ids if i})
+    ruleset = get_ruleset(day)
+    contents = _deck_contents(ids)
+    return {
+        deck_id: ruleset.violations(entry["main"], entry["egg"], entry["counts"])
+        for deck_id, entry in contents.items()
+    }
+
+
+def revalidate_for_cardnumbers(cardnumbers: Iterable[str]) -> int:
+    """
+    Revalida só os decks que contêm as cartas afetadas por uma mudança de regra.
+    """
+    return revalidate_decks(decks_using_cardnumbers(cardnumbers))
+
+
+def revalidate_rollovers(days: Iterable[date]) -> Tuple[Set[str], int]:
+    """
+    Revalida os decks com as cartas cuja regra muda em alguma das datas
+    (início de vigência ou dia seguinte ao fim). Datas que não são virada na
+    linha do tempo atual (regra editada/apagada depois do agendamento) não
+    mudam nada. Retorna (cartas afetadas, decks revalidados).
+    """
+    timeline = get_timeline()
+    cardnumbers: Set[str] = set()
+    for day in set(days):
+        idx = timeline.index_for(day)
+        if timeline.starts[idx] == day:
+            cardnumbers |= timeline.changed_cardnumbers(idx)
+    if not cardnumbers:
+        return cardnumbers, 0
+    return cardnumbers, revalidate_for_cardnumbers(cardnumbers)
+
+
+def schedule_revalidation(cardnumbers: Iterable[str]) -> None:
+    """
+    Depois do commit da regra: invalida os snapshots de regras e enfileira a
+    revalidação dos decks com as cartas afetadas (job "decks.revalidate",
+    processado pelo worker), para o admin não esperar o processamento dos lotes.
+    """
+    wanted = sorted({normalize_cardnumber(cn) for cn in cardnumbers if cn})
+    if not wanted:
+        return
+
+    transaction.on_commit(bump_rules_version)
+    schedule_revalidate(wanted)
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from decks.cooccurrence import rebuild_cooccurrence
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula do zero a matriz de coocorrência de cartas (decks públicos e de torneio).\n"
+        "No dia a dia ela é mantida incrementalmente pelo refresh dos decks."
+    )
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE("Montando matriz de coocorrência..."))
+        started = time.monotonic()
+        pairs = rebuild_cooccurrence()
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"Concluído: {pairs} par(es) de cartas em {elapsed:.1f}s."))
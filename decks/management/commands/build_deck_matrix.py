@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from decks.similarity import publish_matrix
+
+
+class Command(BaseCommand):
+    help = (
+        "Monta a matriz de similaridade de decks e publica no cache compartilhado.\n"
+        "O worker (run_jobs) já faz isso depois das alterações de decks; use após "
+        "deploy ou cargas feitas fora do app."
+    )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        matrix = publish_matrix()
+        self.stdout.write(self.style.SUCCESS(
+            f"Matriz publicada: {len(matrix.deck_ids)} deck(s), {matrix.n_cols} carta(s), "
+            f"{len(matrix.archetype_ids)} arquétipo(s) em {time.monotonic() - started:.2f}s."
+        ))
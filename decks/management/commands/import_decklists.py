@@ -0,0 +1,158 @@
+import json
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from decks.bulk_import import (
+    bulk_create_decks,
+    deck_text,
+    player_key,
+    refresh_created_decks,
+)
+from decks.bulk_parse import parse_entry
+from tournaments.jobs import schedule_archetype_classification
+from tournaments.models import Tournament, TournamentPlayer
+from tournaments.rankings import schedule_ranking_update
+
+DECKLIST_SUFFIXES = {".txt", ".json", ".csv", ".dek"}
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa várias decklists de uma vez (ex: dump de um torneio).\n\n"
+        "Origem aceita:\n"
+        "- pasta ou .zip: um arquivo por deck (.txt/.json/.csv); nome do arquivo = jogador\n"
+        "- .jsonl: um deck por linha {\"player\", \"deck\", \"name\"?, \"archetype\"?}\n"
+        "O formato de cada decklist é detectado sozinho (texto oficial, JSON, TTS, CSV, untap)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", type=str, help="Pasta, arquivo .zip ou .jsonl")
+        parser.add_argument("--user", required=True, help="Username dono dos decks criados")
+        parser.add_argument("--tournament", type=int, help="ID do torneio para vincular TournamentPlayer.deck")
+        parser.add_argument("--public", action="store_true", help="Cria os decks como públicos")
+        parser.add_argument("--workers", type=int, default=None, help="Processos para o parse (padrão: nº de CPUs)")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Tamanho dos lotes de bulk_create")
+
+    def handle(self, *args, **options):
+        source = Path(options["source"])
+        if not source.exists():
+            raise CommandError(f"Origem não encontrada: {source}")
+
+        user = User.objects.filter(username=options["user"]).first()
+        if user is None:
+            raise CommandError(f"Usuário não encontrado: {options['user']}")
+
+        tournament = None
+        if options["tournament"]:
+            tournament = Tournament.objects.filter(pk=options["tournament"]).first()
+            if tournament is None:
+                raise CommandError(f"Torneio não encontrado: {options['tournament']}")
+
+        started = time.monotonic()
+        entries = list(self._read_entries(source))
+        self.stdout.write(self.style.NOTICE(f"Lendo {len(entries)} decklist(s) de {source}..."))
+
+        with ProcessPoolExecutor(max_workers=options["workers"]) as pool:
+            parsed = list(pool.map(parse_entry, entries, chunksize=max(1, len(entries) // 64)))
+
+        for p in parsed:
+            if p.error:
+                self.stderr.write(f"  {p.label}: {p.error}")
+            elif not p.lines:
+                self.stderr.write(f"  {p.label}: nenhuma linha válida")
+        parsed_at = time.monotonic()
+
+        result = bulk_create_decks(
+            user,
+            parsed,
+            publico=options["public"],
+            default_name=tournament.name if tournament else "",
+            batch_size=max(1, options["batch_size"]),
+        )
+        linked = self._link_players(tournament, parsed, result.decks) if tournament else 0
+
+        refresh_created_decks([d.id for d in result.decks])
+        if linked:
+            # inscrições sem arquétipo na decklist: classificadas pelo worker
+            schedule_archetype_classification([tournament.pk])
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            f"Parse: {parsed_at - started:.2f}s • gravação + refresh: {elapsed - (parsed_at - started):.2f}s"
+        )
+        if result.unresolved:
+            self.stdout.write(self.style.WARNING(
+                f"{len(result.unresolved)} cardnumber(s) sem carta no cache: "
+                + ", ".join(sorted(result.unresolved)[:50])
+                + (" ..." if len(result.unresolved) > 50 else "")
+            ))
+        if tournament:
+            self.stdout.write(f"Jogadores vinculados em {tournament.name}: {linked}/{len(result.decks)}")
+        rate = result.lines / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Concluído: {len(result.decks)} deck(s), {result.lines} linha(s) em {elapsed:.2f}s ({rate:.0f} linhas/s)."
+        ))
+
+    # ---------- Origens ----------
+
+    def _read_entries(self, source: Path):
+        """
+        Gera (label, jogador, nome do deck, arquétipo, texto) para o pool.
+        """
+        if source.is_dir():
+            for path in sorted(source.rglob("*")):
+                if path.is_file() and path.suffix.lower() in DECKLIST_SUFFIXES:
+                    yield str(path), path.stem, "", "", path.read_text(encoding="utf-8-sig", errors="replace")
+        elif source.suffix.lower() == ".zip":
+            with zipfile.ZipFile(source) as zf:
+                for info in sorted(zf.infolist(), key=lambda i: i.filename):
+                    path = Path(info.filename)
+                    if info.is_dir() or path.suffix.lower() not in DECKLIST_SUFFIXES:
+                        continue
+                    text = zf.read(info).decode("utf-8-sig", errors="replace")
+                    yield f"{source.name}:{info.filename}", path.stem, "", "", text
+        elif source.suffix.lower() == ".jsonl":
+            with source.open(encoding="utf-8-sig") as fh:
+                for number, raw in enumerate(fh, start=1):
+                    if not raw.strip():
+                        continue
+                    label = f"{source.name}:{number}"
+                    try:
+                        row = json.loads(raw)
+                    except ValueError as exc:
+                        self.stderr.write(f"  {label}: JSON inválido ({exc})")
+                        continue
+                    yield (
+                        label,
+                        str(row.get("player") or ""),
+                        str(row.get("name") or ""),
+                        str(row.get("archetype") or ""),
+                        deck_text(row.get("deck") or ""),
+                    )
+        else:
+            raise CommandError("Use uma pasta, um .zip ou um .jsonl.")
+
+    def _link_players(self, tournament, parsed, decks) -> int:
+        players = {player_key(tp.player_name): tp for tp in TournamentPlayer.objects.filter(tournament=tournament)}
+
+        linked = []
+        valid = [p for p in parsed if p.lines and not p.error]
+        for p, deck in zip(valid, decks):
+            tp = players.get(player_key(p.player))
+            if tp is None:
+                self.stderr.write(f"  {p.label}: jogador '{p.player}' não está no torneio")
+                continue
+            tp.deck = deck
+            if p.archetype and not tp.deck_archtype_name:
+                tp.deck_archtype_name = p.archetype[:120]
+            linked.append(tp)
+
+        TournamentPlayer.objects.bulk_update(linked, ["deck", "deck_archtype_name"], batch_size=500)
+        # bulk_update não dispara sinais: arquétipos preenchidos aqui entram no ranking
+        schedule_ranking_update(tournament.pk, archetypes={tp.deck_archtype_name for tp in linked})
+        return len(linked)
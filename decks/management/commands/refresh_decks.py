@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from decks.models import Deck
+from decks.services import refresh_decks
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula os dados derivados dos decks (índice de cartas, fingerprint, preço, estatísticas, legalidade).\n"
+        "Útil depois de migrations ou cargas feitas fora do app."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--deck",
+            type=int,
+            action="append",
+            dest="deck_ids",
+            help="ID do deck (pode repetir). Sem isso, recalcula todos.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Quantos decks processar por lote (padrão: 500)",
+        )
+
+    def handle(self, *args, **options):
+        deck_ids = options["deck_ids"]
+        batch_size = max(1, options["batch_size"])
+
+        if not deck_ids:
+            deck_ids = list(Deck.objects.order_by("id").values_list("id", flat=True))
+
+        total = len(deck_ids)
+        self.stdout.write(self.style.NOTICE(f"Recalculando {total} deck(s)..."))
+
+        for start in range(0, total, batch_size):
+            refresh_decks(deck_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f"Concluído: {total} deck(s) recalculados."))
@@ -0,0 +1,44 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from decks.jobs import schedule_rule_rollover
+from decks.legality import revalidate_rollovers
+from decks.rules import get_timeline
+
+
+class Command(BaseCommand):
+    help = (
+        "Revalida os decks afetados por banlists que entraram/saíram de vigência.\n"
+        "No dia a dia quem faz isso é o worker (job decks.rollover, agendado ao salvar\n"
+        "a regra). Rode depois do deploy e sempre que o worker ficou parado: reprocessa\n"
+        "as viradas desde --since e reagenda as viradas futuras."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help="Considera viradas de vigência depois desta data (YYYY-MM-DD). Padrão: ontem.",
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        since = today - timedelta(days=1)
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("Data inválida em --since (use YYYY-MM-DD).")
+
+        starts = get_timeline().starts
+        schedule_rule_rollover(start for start in starts if start > today)
+        cardnumbers, updated = revalidate_rollovers(start for start in starts if since < start <= today)
+
+        if not cardnumbers:
+            self.stdout.write(self.style.SUCCESS("Nenhuma mudança de vigência no período."))
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(cardnumbers)} carta(s) com regra alterada, {updated} deck(s) revalidados."
+        ))
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-19 10:12
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decks', '0007_archetype_deck_arquetipo_nome_alter_deckcard_deck_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deck',
+            name='cartas_sem_estoque',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='cartas_sem_preco',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='preco_atualizado_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='preco_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=10),
+        ),
+    ]
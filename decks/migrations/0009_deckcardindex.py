@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-19 18:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def build_index(apps, schema_editor):
+    DeckCard = apps.get_model("decks", "DeckCard")
+    DeckCardIndex = apps.get_model("decks", "DeckCardIndex")
+
+    counts = {}
+    rows = DeckCard.objects.values_list("deck_id", "codigo_carta", "card__cardnumber", "quantidade")
+    for deck_id, codigo, card_cn, qty in rows.iterator():
+        cn = (codigo or card_cn or "").strip().upper()
+        if cn and qty:
+            key = (cn, deck_id)
+            counts[key] = counts.get(key, 0) + int(qty)
+
+    DeckCardIndex.objects.bulk_create(
+        [DeckCardIndex(cardnumber=cn, deck_id=deck_id, quantidade=qty) for (cn, deck_id), qty in counts.items()],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decks', '0008_deck_cartas_sem_estoque_deck_cartas_sem_preco_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeckCardIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cardnumber', models.CharField(max_length=50)),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('deck', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='card_index', to='decks.deck')),
+            ],
+            options={
+                'ordering': ('cardnumber', 'deck'),
+                'constraints': [models.UniqueConstraint(fields=('cardnumber', 'deck'), name='uniq_deckcardindex_card_deck')],
+            },
+        ),
+        migrations.RunPython(build_index, migrations.RunPython.noop),
+    ]
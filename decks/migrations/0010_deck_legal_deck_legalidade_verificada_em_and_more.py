@@ -0,0 +1,83 @@
+# Generated by Django 6.0 on 2026-10-19 18:53
+
+from django.conf import settings
+from collections import defaultdict
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def fill_legality(apps, schema_editor):
+    # sem isso todo deck existente apareceria como "Não legal" (default False)
+    from decks.rules import RuleSet, _ban_status_limit
+
+    Deck = apps.get_model("decks", "Deck")
+    DeckCard = apps.get_model("decks", "DeckCard")
+    CardCopyRule = apps.get_model("cards", "CardCopyRule")
+    BanlistRule = apps.get_model("cards", "BanlistRule")
+    PairBanRule = apps.get_model("cards", "PairBanRule")
+
+    ruleset = RuleSet(
+        copy_limits={
+            (cn or "").strip().upper(): int(max_copies)
+            for cn, max_copies in CardCopyRule.objects.values_list("cardnumber", "max_copies")
+        },
+        ban_limits={
+            (cn or "").strip().upper(): _ban_status_limit(status)
+            for cn, status in BanlistRule.objects.values_list("cardnumber", "status")
+        },
+        pair_bans=frozenset(
+            tuple(sorted(((a or "").strip().upper(), (b or "").strip().upper())))
+            for a, b in PairBanRule.objects.values_list("card_a", "card_b")
+        ),
+    )
+
+    contents = defaultdict(lambda: {"main": 0, "egg": 0, "counts": defaultdict(int)})
+    rows = DeckCard.objects.values_list("deck_id", "section", "codigo_carta", "card__cardnumber", "quantidade")
+    for deck_id, section, codigo, card_cn, qty in rows.iterator():
+        entry = contents[deck_id]
+        entry["egg" if (section or "").upper() == "EGG" else "main"] += int(qty or 0)
+        cn = (codigo or card_cn or "").strip().upper()
+        if cn:
+            entry["counts"][cn] += int(qty or 0)
+
+    now = timezone.now()
+    decks = list(Deck.objects.only("id"))
+    for deck in decks:
+        entry = contents[deck.id]
+        deck.violacoes = ruleset.violations(entry["main"], entry["egg"], entry["counts"])
+        deck.legal = not deck.violacoes
+        deck.legalidade_verificada_em = now
+    Deck.objects.bulk_update(decks, ["legal", "violacoes", "legalidade_verificada_em"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cards', '0008_banlistrule_cardcopyrule_pairbanrule_and_more'),
+        ('decks', '0009_deckcardindex'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deck',
+            name='legal',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='legalidade_verificada_em',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='violacoes',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddIndex(
+            model_name='deck',
+            index=models.Index(fields=['publico', 'legal'], name='decks_deck_publico_54d03e_idx'),
+        ),
+        migrations.RunPython(fill_legality, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-19 18:55
+
+from django.db import migrations, models
+
+
+def fill_fingerprints(apps, schema_editor):
+    from decks.fingerprint import compute_fingerprint
+
+    Deck = apps.get_model("decks", "Deck")
+    DeckCard = apps.get_model("decks", "DeckCard")
+
+    entries = {}
+    rows = DeckCard.objects.values_list("deck_id", "section", "codigo_carta", "card__cardnumber", "quantidade")
+    for deck_id, section, codigo, card_cn, qty in rows.iterator():
+        entries.setdefault(deck_id, []).append((section, codigo or card_cn, qty))
+
+    decks = list(Deck.objects.filter(id__in=entries.keys()).only("id"))
+    for deck in decks:
+        deck.fingerprint = compute_fingerprint(entries[deck.id])
+    Deck.objects.bulk_update(decks, ["fingerprint"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decks', '0010_deck_legal_deck_legalidade_verificada_em_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deck',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.RunPython(fill_fingerprints, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-19 18:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decks', '0011_deck_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deck',
+            name='coocorrencia_cartas',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='CardCooccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('card_a', models.CharField(max_length=50)),
+                ('card_b', models.CharField(max_length=50)),
+                ('decks', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ('card_a', '-decks'),
+                'indexes': [models.Index(fields=['card_a', '-decks'], name='cooc_card_a_decks_idx')],
+                'constraints': [models.UniqueConstraint(fields=('card_a', 'card_b'), name='uniq_cooccurrence_a_b')],
+            },
+        ),
+    ]
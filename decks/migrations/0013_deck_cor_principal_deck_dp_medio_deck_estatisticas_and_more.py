@@ -0,0 +1,61 @@
+# Generated by Django 6.0 on 2026-10-19 19:02
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def fill_stats(apps, schema_editor):
+    from decks.stats import compute_stats, main_color
+
+    Deck = apps.get_model("decks", "Deck")
+    DeckCard = apps.get_model("decks", "DeckCard")
+
+    rows = {}
+    grouped = (
+        DeckCard.objects.values_list(
+            "deck_id", "section", "card__play_cost", "card__level", "card__color", "card__card_type", "card__dp"
+        )
+        .order_by()
+        .annotate(qty=Sum("quantidade"))
+    )
+    for deck_id, *row in grouped.iterator():
+        rows.setdefault(deck_id, []).append(tuple(row))
+
+    decks = list(Deck.objects.filter(id__in=rows.keys()).only("id"))
+    for deck in decks:
+        deck.estatisticas = compute_stats(rows[deck.id])
+        deck.cor_principal = main_color(deck.estatisticas)
+        deck.dp_medio = deck.estatisticas["dp_medio"]
+    Deck.objects.bulk_update(decks, ["estatisticas", "cor_principal", "dp_medio"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decks', '0012_deck_coocorrencia_cartas_cardcooccurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deck',
+            name='cor_principal',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=40),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='dp_medio',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='deck',
+            name='estatisticas',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddIndex(
+            model_name='deck',
+            index=models.Index(fields=['publico', 'cor_principal'], name='decks_deck_publico_797f35_idx'),
+        ),
+        migrations.RunPython(fill_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-19 19:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decks', '0013_deck_cor_principal_deck_dp_medio_deck_estatisticas_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='deck',
+            name='decks_deck_publico_54d03e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='deck',
+            name='decks_deck_publico_797f35_idx',
+        ),
+        migrations.AddIndex(
+            model_name='deck',
+            index=models.Index(condition=models.Q(('publico', True)), fields=['-atualizado_em', '-id'], name='deck_public_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deck',
+            index=models.Index(condition=models.Q(('publico', True)), fields=['legal', '-atualizado_em', '-id'], name='deck_public_legal_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deck',
+            index=models.Index(condition=models.Q(('publico', True)), fields=['cor_principal', '-atualizado_em', '-id'], name='deck_public_color_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deck',
+            index=models.Index(condition=models.Q(('publico', True)), fields=['arquetipo', '-atualizado_em', '-id'], name='deck_public_arch_idx'),
+        ),
+    ]
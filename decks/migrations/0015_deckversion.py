@@ -0,0 +1,66 @@
+# Generated by Django 6.0 on 2026-10-19 19:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def first_versions(apps, schema_editor):
+    from decks.history import content_key
+
+    Deck = apps.get_model("decks", "Deck")
+    DeckCard = apps.get_model("decks", "DeckCard")
+    DeckVersion = apps.get_model("decks", "DeckVersion")
+
+    contents = {}
+    rows = DeckCard.objects.values_list("deck_id", "section", "codigo_carta", "card__cardnumber", "quantidade")
+    for deck_id, section, codigo, card_cn, qty in rows.iterator():
+        cn = codigo or card_cn
+        if cn and qty:
+            content = contents.setdefault(deck_id, {})
+            key = content_key(section, cn)
+            content[key] = content.get(key, 0) + qty
+
+    fingerprints = dict(Deck.objects.filter(id__in=contents.keys()).values_list("id", "fingerprint"))
+    DeckVersion.objects.bulk_create(
+        [
+            DeckVersion(
+                deck_id=deck_id,
+                numero=1,
+                fingerprint=fingerprints[deck_id],
+                snapshot=content,
+                cartas_adicionadas=sum(content.values()),
+            )
+            for deck_id, content in contents.items()
+            if deck_id in fingerprints
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decks', '0014_remove_deck_decks_deck_publico_54d03e_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeckVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero', models.PositiveIntegerField()),
+                ('fingerprint', models.CharField(blank=True, default='', max_length=64)),
+                ('snapshot', models.JSONField(blank=True, null=True)),
+                ('delta', models.JSONField(blank=True, null=True)),
+                ('cartas_adicionadas', models.PositiveIntegerField(default=0)),
+                ('cartas_removidas', models.PositiveIntegerField(default=0)),
+                ('criado_em', models.DateTimeField(auto_now_add=True)),
+                ('deck', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='versions', to='decks.deck')),
+            ],
+            options={
+                'ordering': ('deck', '-numero'),
+                'constraints': [models.UniqueConstraint(fields=('deck', 'numero'), name='uniq_deckversion_deck_numero')],
+            },
+        ),
+        migrations.RunPython(first_versions, migrations.RunPython.noop),
+    ]
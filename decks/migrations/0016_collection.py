@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-19 19:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('decks', '0015_deckversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Collection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cardnumber', models.CharField(max_length=50)),
+                ('quantidade', models.PositiveIntegerField(default=0)),
+                ('atualizado_em', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='collection', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ('user', 'cardnumber'),
+                'constraints': [models.UniqueConstraint(fields=('user', 'cardnumber'), name='uniq_collection_user_card')],
+            },
+        ),
+    ]
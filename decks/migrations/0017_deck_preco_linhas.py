@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-19 19:49
+
+from django.db import migrations, models
+
+
+def enqueue_refresh(apps, schema_editor):
+    # as linhas de preço são montadas pelo refresh do deck: põe todos os decks
+    # na fila do worker (job "decks.refresh", ver decks/jobs.py)
+    Deck = apps.get_model("decks", "Deck")
+    PendingJob = apps.get_model("core", "PendingJob")
+    PendingJob.objects.bulk_create(
+        [PendingJob(kind="decks.refresh", key=str(deck_id)) for deck_id in Deck.objects.values_list("id", flat=True)],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_pendingjob'),
+        ('decks', '0016_collection'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='deck',
+            name='preco_linhas',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.RunPython(enqueue_refresh, migrations.RunPython.noop),
+    ]
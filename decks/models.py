@@ -1,4 +1,7 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import Q
 from django.contrib.auth.models import User
 from django.utils.text import slugify
 
@@ -55,8 +58,49 @@ class Deck(models.Model):
     criado_em = models.DateTimeField(auto_now_add=True)
     atualizado_em = models.DateTimeField(auto_now=True)
 
+    # Resumo de preço (mantido por decks.pricing quando o deck ou os preços mudam)
+    preco_total = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal("0.00"))
+    cartas_sem_preco = models.PositiveIntegerField(default=0)
+    cartas_sem_estoque = models.PositiveIntegerField(default=0)
+    preco_atualizado_em = models.DateTimeField(null=True, blank=True)
+    # linhas da tabela de preço do deck_detail (valores em texto: JSON não tem Decimal)
+    preco_linhas = models.JSONField(default=list, blank=True)
+
+    # Hash canônico do conteúdo (section, cardnumber, qty) -> chave de caches e dedupe
+    fingerprint = models.CharField(max_length=64, blank=True, default="", db_index=True)
+
+    # Estatísticas do Main Deck (mantidas por decks.stats): curva, levels, cores, tipos
+    estatisticas = models.JSONField(default=dict, blank=True)
+    cor_principal = models.CharField(max_length=40, blank=True, default="", db_index=True)
+    dp_medio = models.PositiveIntegerField(null=True, blank=True)
+
+    # Cartas deste deck já somadas em CardCooccurrence (vazio = deck não conta)
+    coocorrencia_cartas = models.JSONField(default=list, blank=True)
+
+    # Legalidade sob as regras atuais (mantida por decks.legality)
+    legal = models.BooleanField(default=False, db_index=True)
+    violacoes = models.JSONField(default=list, blank=True)
+    legalidade_verificada_em = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         ordering = ("-criado_em",)
+        indexes = [
+            # explorador de decks públicos: keyset em (atualizado_em, id) por filtro.
+            # Índices parciais (só publico=True): menores e usáveis pelo SQLite,
+            # que não trata "WHERE publico" como igualdade num índice composto.
+            models.Index(
+                fields=["-atualizado_em", "-id"], condition=Q(publico=True), name="deck_public_recent_idx"
+            ),
+            models.Index(
+                fields=["legal", "-atualizado_em", "-id"], condition=Q(publico=True), name="deck_public_legal_idx"
+            ),
+            models.Index(
+                fields=["cor_principal", "-atualizado_em", "-id"], condition=Q(publico=True), name="deck_public_color_idx"
+            ),
+            models.Index(
+                fields=["arquetipo", "-atualizado_em", "-id"], condition=Q(publico=True), name="deck_public_arch_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nome} ({self.jogo})"
@@ -116,3 +160,92 @@ class DeckCard(models.Model):
     @property
     def quantity(self) -> int:
         return int(self.quantidade or 0)
+
+
+class DeckCardIndex(models.Model):
+    """
+    Índice invertido cardnumber -> decks.
+    Uma linha por (carta, deck) com a quantidade somada (MAIN + EGG).
+    Mantido por decks.card_index sempre que os DeckCards do deck mudam;
+    responde "quais decks usam BT14-084?" sem varrer DeckCard.
+    """
+    cardnumber = models.CharField(max_length=50)
+    deck = models.ForeignKey(Deck, on_delete=models.CASCADE, related_name="card_index")
+    quantidade = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ("cardnumber", "deck")
+        constraints = [
+            models.UniqueConstraint(fields=["cardnumber", "deck"], name="uniq_deckcardindex_card_deck")
+        ]
+
+    def __str__(self):
+        return f"{self.cardnumber} x{self.quantidade} [{self.deck_id}]"
+
+
+class DeckVersion(models.Model):
+    """
+    Histórico do conteúdo do deck (mantido por decks.history).
+    A cada SNAPSHOT_EVERY versões guarda o conteúdo inteiro em `snapshot`;
+    nas outras, só `delta` ({"SECTION|CARDNUMBER": qtd nova, 0 = saiu}).
+    """
+    deck = models.ForeignKey(Deck, on_delete=models.CASCADE, related_name="versions")
+    numero = models.PositiveIntegerField()
+    fingerprint = models.CharField(max_length=64, blank=True, default="")
+    snapshot = models.JSONField(null=True, blank=True)
+    delta = models.JSONField(null=True, blank=True)
+    cartas_adicionadas = models.PositiveIntegerField(default=0)
+    cartas_removidas = models.PositiveIntegerField(default=0)
+    criado_em = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ("deck", "-numero")
+        constraints = [
+            models.UniqueConstraint(fields=["deck", "numero"], name="uniq_deckversion_deck_numero")
+        ]
+
+    def __str__(self):
+        return f"{self.deck_id} v{self.numero}"
+
+
+class CardCooccurrence(models.Model):
+    """
+    Em quantos decks (públicos ou de torneio) as cartas A e B aparecem juntas.
+    Guardado nos dois sentidos (A,B) e (B,A) para o lookup "jogada com A" ser
+    um range scan em (card_a, -decks). Mantido por decks.cooccurrence.
+    """
+    card_a = models.CharField(max_length=50)
+    card_b = models.CharField(max_length=50)
+    decks = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ("card_a", "-decks")
+        constraints = [
+            models.UniqueConstraint(fields=["card_a", "card_b"], name="uniq_cooccurrence_a_b")
+        ]
+        indexes = [
+            models.Index(fields=["card_a", "-decks"], name="cooc_card_a_decks_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.card_a} + {self.card_b}: {self.decks}"
+
+
+class Collection(models.Model):
+    """
+    Coleção do usuário: quantas cópias de cada cardnumber ele tem.
+    Mantida por decks.collection (import em lote com upsert).
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="collection")
+    cardnumber = models.CharField(max_length=50)
+    quantidade = models.PositiveIntegerField(default=0)
+    atualizado_em = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("user", "cardnumber")
+        constraints = [
+            models.UniqueConstraint(fields=["user", "cardnumber"], name="uniq_collection_user_card")
+        ]
+
+    def __str__(self):
+        return f"{self.cardnumber} x{self.quantidade} [{self.user_id}]"
@@ -0,0 +1,188 @@
+# decks/pricing.py
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from cards.models import CardPrice
+
+from .decklist_io import normalize_cardnumber
+from .jobs import schedule_price_refresh
+from .models import Deck, DeckCard
+
+# Quantos decks recalcular por vez (1 query de DeckCard + 1 de CardPrice por lote)
+REFRESH_BATCH_SIZE = 200
+
+# sobe sempre que a tabela de preços muda (caches que dependem de CardPrice)
+PRICES_VERSION_CACHE_KEY = "card_prices_version"
+
+
+@dataclass
+class PriceSummary:
+    rows: List[dict] = field(default_factory=list)
+    total: Decimal = Decimal("0.00")
+    missing: int = 0
+    out_of_stock: int = 0
+
+
+def deckcard_cardnumber(dc: DeckCard) -> str:
+    """
+    Cardnumber de uma linha do deck: codigo_carta ou, se vazio, o da carta vinculada.
+    """
+    cn = (dc.codigo_carta or "").strip()
+    if not cn and dc.card_id:
+        cn = (dc.card.cardnumber or "").strip()
+    return cn
+
+
+def load_prices(cardnumbers: Iterable[str]) -> Dict[str, CardPrice]:
+    """
+    Busca os preços de uma vez só, indexados por cardnumber normalizado.
+    """
+    wanted = {normalize_cardnumber(cn) for cn in cardnumbers if cn}
+    if not wanted:
+        return {}
+    return {
+        normalize_cardnumber(p.cardnumber): p
+        for p in CardPrice.objects.filter(cardnumber__in=wanted)
+    }
+
+
+def build_price_summary(deck_cards: Iterable[DeckCard], prices: Dict[str, CardPrice]) -> PriceSummary:
+    """
+    Monta as linhas de preço (usadas no deck_detail) e os totais do deck.
+    `deck_cards` deve vir com select_related("card").
+    """
+    summary = PriceSummary()
+
+    for dc in deck_cards:
+        qty = dc.quantidade or 1
+        cn = deckcard_cardnumber(dc)
+        name = (dc.nome_carta or "").strip()
+        if not name and dc.card_id:
+            name = dc.card.name or ""
+
+        price_obj = prices.get(normalize_cardnumber(cn))
+        if price_obj:
+            unit = price_obj.price or Decimal("0.00")
+            subtotal = unit * Decimal(qty)
+            summary.total += subtotal
+            if not price_obj.in_stock:
+                summary.out_of_stock += 1
+            summary.rows.append(
+                {
+                    "qty": qty,
+                    "cardnumber": cn,
+                    "name": name,
+                    "unit": unit,
+                    "subtotal": subtotal,
+                    "url": price_obj.product_url,
+                    "in_stock": price_obj.in_stock,
+                }
+            )
+        else:
+            summary.missing += 1
+            summary.rows.append(
+                {
+                    "qty": qty,
+                    "cardnumber": cn,
+                    "name": name,
+                    "unit": None,
+                    "subtotal": None,
+                    "url": "",
+                    "in_stock": True,
+                }
+            )
+
+    return summary
+
+
+def _stored_row(row: dict) -> dict:
+    return {
+        **row,
+        "unit": None if row["unit"] is None else str(row["unit"]),
+        "subtotal": None if row["subtotal"] is None else str(row["subtotal"]),
+    }
+
+
+def stored_price_summary(deck: Deck) -> PriceSummary:
+    """
+    Resumo de preço gravado no deck pelo último refresh (sem query), no mesmo
+    formato do build_price_summary.
+    """
+    rows = [
+        {
+            **row,
+            "unit": None if row.get("unit") is None else Decimal(row["unit"]),
+            "subtotal": None if row.get("subtotal") is None else Decimal(row["subtotal"]),
+        }
+        for row in deck.preco_linhas or []
+    ]
+    return PriceSummary(
+        rows=rows,
+        total=deck.preco_total,
+        missing=deck.cartas_sem_preco,
+        out_of_stock=deck.cartas_sem_estoque,
+    )
+
+
+def refresh_price_summaries(deck_ids: Iterable[int]) -> int:
+    """
+    Recalcula e grava o resumo de preço (total / sem preço / sem estoque e as
+    linhas da tabela) dos decks informados, em lotes. Retorna quantos decks foram atualizados.
+    """
+    ids = sorted({int(i) for i in deck_ids if i})
+    updated = 0
+
+    for start in range(0, len(ids), REFRESH_BATCH_SIZE):
+        batch = ids[start:start + REFRESH_BATCH_SIZE]
+        decks = {d.id: d for d in Deck.objects.filter(id__in=batch).only("id")}
+        if not decks:
+            continue
+
+        by_deck: Dict[int, List[DeckCard]] = {deck_id: [] for deck_id in decks}
+        for dc in DeckCard.objects.filter(deck_id__in=decks.keys()).select_related("card"):
+            by_deck[dc.deck_id].append(dc)
+
+        prices = load_prices(
+            deckcard_cardnumber(dc) for rows in by_deck.values() for dc in rows
+        )
+
+        now = timezone.now()
+        for deck_id, deck in decks.items():
+            summary = build_price_summary(by_deck[deck_id], prices)
+            deck.preco_total = summary.total
+            deck.cartas_sem_preco = summary.missing
+            deck.cartas_sem_estoque = summary.out_of_stock
+            deck.preco_linhas = [_stored_row(row) for row in summary.rows]
+            deck.preco_atualizado_em = now
+
+        Deck.objects.bulk_update(
+            decks.values(),
+            ["preco_total", "cartas_sem_preco", "cartas_sem_estoque", "preco_linhas", "preco_atualizado_em"],
+        )
+        updated += len(decks)
+
+    return updated
+
+
+def bump_prices_version() -> None:
+    cache.set(PRICES_VERSION_CACHE_KEY, time.time(), timeout=None)
+
+
+def prices_version():
+    return cache.get(PRICES_VERSION_CACHE_KEY)
+
+
+def refresh_prices_for_cardnumbers(cardnumbers: Iterable[str]) -> None:
+    """
+    Chamado quando preços mudam (admin/CSV): agenda o recálculo só dos decks
+    que usam as cartas alteradas (feito pelo worker, fora do request do admin).
+    """
+    bump_prices_version()
+    schedule_price_refresh(cardnumbers)
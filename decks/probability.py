@@ -0,0 +1,263 @@
+# decks/probability.py
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass
+from math import comb
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from django.core.cache import cache
+
+from .models import Deck, DeckCard
+from .rules import EGG_LIMIT, MAIN_LIMIT, is_egg_card
+
+# Setup do jogo: 5 cartas de segurança + 5 na mão, tiradas do Main Deck embaralhado.
+# No sorteio usamos as posições 0-4 como mão e 5-9 como segurança.
+HAND_SIZE = 5
+SECURITY_SIZE = 5
+MC_SHUFFLES = 100_000
+CACHE_TIMEOUT = 60 * 60 * 24
+
+CardFilter = Callable[["MainCard"], bool]
+
+
+@dataclass(frozen=True)
+class MainCard:
+    cardnumber: str
+    name: str
+    card_type: str
+    level: Optional[int]
+    qty: int
+
+
+@dataclass(frozen=True)
+class DeckShape:
+    """
+    O que importa do deck para as contas: cartas do Main (com tipo/level)
+    e o tamanho do Egg Deck.
+    """
+    main: Tuple[MainCard, ...]
+    egg_total: int
+
+    @property
+    def main_total(self) -> int:
+        return sum(c.qty for c in self.main)
+
+    def count(self, pred: CardFilter) -> int:
+        return sum(c.qty for c in self.main if pred(c))
+
+    def flags(self, pred: CardFilter) -> np.ndarray:
+        """
+        Vetor booleano com uma posição por carta física do Main Deck.
+        """
+        return np.repeat(
+            np.array([pred(c) for c in self.main], dtype=bool),
+            np.array([c.qty for c in self.main], dtype=np.int64),
+        )
+
+
+def load_shape(deck: Deck) -> DeckShape:
+    main: List[MainCard] = []
+    egg_total = 0
+    for dc in DeckCard.objects.filter(deck=deck).select_related("card"):
+        card = dc.card
+        if dc.section == DeckCard.SECTION_EGG or (card and is_egg_card(card)):
+            egg_total += dc.quantidade
+            continue
+        main.append(MainCard(
+            cardnumber=card.cardnumber if card else dc.codigo_carta,
+            name=card.name if card else dc.nome_carta,
+            card_type=(card.card_type if card else "") or "",
+            level=card.level if card else None,
+            qty=dc.quantidade,
+        ))
+    return DeckShape(main=tuple(main), egg_total=egg_total)
+
+
+# ----------------------------
+# Filtros usados nas perguntas
+# ----------------------------
+def by_level(level: int) -> CardFilter:
+    return lambda c: c.level == level
+
+
+def by_cardnumber(cardnumber: str) -> CardFilter:
+    cardnumber = cardnumber.strip().upper()
+    return lambda c: c.cardnumber.upper() == cardnumber
+
+
+def by_type(card_type: str) -> CardFilter:
+    card_type = card_type.strip().lower()
+    return lambda c: c.card_type.strip().lower() == card_type
+
+
+# ----------------------------
+# Conta exata (hipergeométrica)
+# ----------------------------
+def hypergeom_pmf(successes: int, population: int, draws: int, k: int) -> float:
+    """
+    P(exatamente k acertos em `draws` cartas, com `successes` boas em `population`).
+    """
+    if population <= 0 or draws > population or k < 0 or k > draws or k > successes:
+        return 0.0
+    return comb(successes, k) * comb(population - successes, draws - k) / comb(population, draws)
+
+
+def hypergeom_at_least(successes: int, population: int, draws: int, k: int = 1) -> float:
+    if k <= 0:
+        return 1.0
+    draws = min(draws, population)
+    return sum(hypergeom_pmf(successes, population, draws, i) for i in range(k, draws + 1))
+
+
+# ----------------------------
+# Monte Carlo (perguntas condicionais: mão E segurança ao mesmo tempo)
+# ----------------------------
+def _seed(*parts) -> int:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def simulate_setup(
+    shape: DeckShape,
+    hand_pred: CardFilter,
+    hand_min: int,
+    security_pred: CardFilter,
+    security_min: int,
+    shuffles: int = MC_SHUFFLES,
+    seed: int = 0,
+) -> float:
+    """
+    P(mão tem >= hand_min cartas de hand_pred E segurança tem >= security_min
+    cartas de security_pred), estimada com `shuffles` embaralhadas vetorizadas.
+    Só as 10 primeiras posições importam, então usamos argpartition em vez de
+    ordenar as 50 chaves de cada embaralhada.
+    """
+    total = shape.main_total
+    top = HAND_SIZE + SECURITY_SIZE
+    if total < top:
+        return 0.0
+
+    rng = np.random.default_rng(seed)
+    keys = rng.random((shuffles, total), dtype=np.float32)
+    first = np.argpartition(keys, top - 1, axis=1)[:, :top]
+    order = np.take_along_axis(keys, first, axis=1).argsort(axis=1)
+    first = np.take_along_axis(first, order, axis=1)
+
+    hand_hits = shape.flags(hand_pred)[first[:, :HAND_SIZE]].sum(axis=1)
+    security_hits = shape.flags(security_pred)[first[:, HAND_SIZE:]].sum(axis=1)
+    return float(np.mean((hand_hits >= hand_min) & (security_hits >= security_min)))
+
+
+# ----------------------------
+# Painel do deck (cacheado pelo conteúdo)
+# ----------------------------
+def _analyze(shape: DeckShape, seed: int) -> Dict:
+    total = shape.main_total
+    level3 = by_level(3)
+    option = by_type("Option")
+    tamer = by_type("Tamer")
+
+    level3_cards = sorted(
+        ({"cardnumber": c.cardnumber, "name": c.name, "qty": c.qty} for c in shape.main if level3(c)),
+        key=lambda row: (-row["qty"], row["cardnumber"]),
+    )
+    for row in level3_cards:
+        row["p_hand"] = hypergeom_at_least(row["qty"], total, HAND_SIZE)
+
+    options = shape.count(option)
+    return {
+        "main_total": total,
+        "egg_total": shape.egg_total,
+        "main_limit": MAIN_LIMIT,
+        "egg_limit": EGG_LIMIT,
+        # o Egg Deck é separado: ter pelo menos 1 ovo lá garante o primeiro breeding
+        "p_egg": 1.0 if shape.egg_total > 0 else 0.0,
+        "p_level3_hand": hypergeom_at_least(shape.count(level3), total, HAND_SIZE),
+        "level3_cards": level3_cards,
+        "option_total": options,
+        "security_options": [
+            {
+                "k": k,
+                "p": hypergeom_pmf(options, total, SECURITY_SIZE, k),
+                "p_at_least": hypergeom_at_least(options, total, SECURITY_SIZE, k),
+            }
+            for k in range(0, SECURITY_SIZE + 1)
+        ],
+        "p_level3_hand_and_option_security": simulate_setup(shape, level3, 1, option, 1, seed=seed),
+        "p_level3_and_tamer_hand": _joint_hand(shape, level3, tamer),
+        "shuffles": MC_SHUFFLES,
+    }
+
+
+def _joint_hand(shape: DeckShape, first: CardFilter, second: CardFilter) -> float:
+    """
+    P(mão inicial tem pelo menos 1 de `first` e pelo menos 1 de `second`).
+    Exato por inclusão-exclusão (as duas condições olham só a mão).
+    """
+    total = shape.main_total
+    a = shape.count(first)
+    b = shape.count(second)
+    both = shape.count(lambda c: first(c) or second(c))
+    miss = lambda n: hypergeom_pmf(n, total, HAND_SIZE, 0)
+    return max(0.0, 1.0 - miss(a) - miss(b) + miss(both))
+
+
+def _content_key(deck: Deck) -> str:
+    """
+    Identifica o conteúdo do deck para o cache: o fingerprint (mantido na
+    mesma transação da edição) ou, sem ele, o deck + atualizado_em.
+    """
+    if deck.fingerprint:
+        return deck.fingerprint
+    return f"deck{deck.pk}-{int(deck.atualizado_em.timestamp() * 1000) if deck.atualizado_em else 0}"
+
+
+def analyze_deck(deck: Deck) -> Dict:
+    """
+    Probabilidades de abertura do deck. Resultado cacheado pelo conteúdo:
+    decks com o mesmo fingerprint compartilham a conta.
+    """
+    content = _content_key(deck)
+    key = f"deckprob:v1:{content}"
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    result = _analyze(load_shape(deck), seed=_seed(content))
+    cache.set(key, result, CACHE_TIMEOUT)
+    return result
+
+
+def query_probability(
+    deck: Deck,
+    hand_pred: Optional[CardFilter],
+    hand_min: int,
+    security_pred: Optional[CardFilter],
+    security_min: int,
+    cache_parts: Tuple = (),
+) -> Tuple[float, bool]:
+    """
+    Pergunta livre: "pelo menos N de X na mão e/ou pelo menos M de Y na segurança".
+    Só mão ou só segurança -> hipergeométrica exata; as duas juntas -> Monte Carlo.
+    Retorna (probabilidade, exata?).
+    """
+    key = f"deckprob:v1:{_content_key(deck)}:" + ":".join(str(p) for p in cache_parts)
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    shape = load_shape(deck)
+    total = shape.main_total
+    if hand_pred and security_pred and hand_min > 0 and security_min > 0:
+        result = (simulate_setup(shape, hand_pred, hand_min, security_pred, security_min, seed=_seed(key)), False)
+    elif hand_pred and hand_min > 0:
+        result = (hypergeom_at_least(shape.count(hand_pred), total, HAND_SIZE, hand_min), True)
+    elif security_pred and security_min > 0:
+        result = (hypergeom_at_least(shape.count(security_pred), total, SECURITY_SIZE, security_min), True)
+    else:
+        result = (1.0, True)
+
+    cache.set(key, result, CACHE_TIMEOUT)
+    return result
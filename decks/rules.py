@@ -1,8 +1,17 @@
 # decks/rules.py
 from __future__ import annotations
 
+import time
+from bisect import bisect_right
 from collections import defaultdict
-from typing import Dict, Iterable, Tuple
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
 
 from cards.models import DigimonCard, CardCopyRule, BanlistRule, PairBanRule
 
@@ -27,25 +36,18 @@ def get_card_limits(cardnumber: str) -> int:
     """
     Regra de cópias por cardnumber.
     - Default: 4
-    - Exceções (admin): CardCopyRule.max_copies
+    - Exceções (admin): CardCopyRule.max_copies vigente hoje
+    Lê do snapshot em memória (sem query por carta).
     """
-    cn = (cardnumber or "").strip()
+    cn = (cardnumber or "").strip().upper()
     if not cn:
         return DEFAULT_MAX_COPIES
-
-    rule = CardCopyRule.objects.filter(cardnumber__iexact=cn).first()
-    if rule and rule.max_copies is not None:
-        try:
-            return int(rule.max_copies)
-        except Exception:
-            return DEFAULT_MAX_COPIES
-
-    return DEFAULT_MAX_COPIES
+    return get_ruleset().copy_limits.get(cn, DEFAULT_MAX_COPIES)
 
 
 def get_ban_limit(cardnumber: str) -> int:
     """
-    Banlist por cardnumber.
+    Banlist por cardnumber (vigente hoje).
     - Se não tiver regra: retorna um número grande (não limita)
     - Se tiver:
         BANNED -> 0
@@ -53,35 +55,10 @@ def get_ban_limit(cardnumber: str) -> int:
         LIMITED_2 -> 2
         ...
     """
-    cn = (cardnumber or "").strip()
+    cn = (cardnumber or "").strip().upper()
     if not cn:
         return 999
-
-    rule = BanlistRule.objects.filter(cardnumber__iexact=cn).first()
-    if not rule:
-        return 999
-
-    # suportando status como string ou integer (dependendo de como você modelar)
-    status = getattr(rule, "status", None)
-
-    # Caso você tenha choices tipo "BANNED", "LIMITED_1"
-    if isinstance(status, str):
-        s = status.upper().strip()
-        if s == "BANNED":
-            return 0
-        if s.startswith("LIMITED_"):
-            try:
-                return int(s.split("_", 1)[1])
-            except Exception:
-                return 999
-        # fallback
-        return 999
-
-    # Caso você tenha status numérico já representando max_copies
-    try:
-        return int(status)
-    except Exception:
-        return 999
+    return get_ruleset().ban_limits.get(cn, 999)
 
 
 def check_pair_ban(deck_cardnumbers: Iterable[str]) -> Tuple[bool, str]:
@@ -95,13 +72,8 @@ def check_pair_ban(deck_cardnumbers: Iterable[str]) -> Tuple[bool, str]:
     if not present:
         return True, ""
 
-    # Regras cadastradas no admin
-    rules = PairBanRule.objects.all().only("card_a", "card_b")
-
-    for r in rules:
-        a = (getattr(r, "card_a", "") or "").strip().upper()
-        b = (getattr(r, "card_b", "") or "").strip().upper()
-        if a and b and a in present and b in present:
+    for a, b in sorted(get_ruleset().pair_bans):
+        if a in present and b in present:
             return False, f"Pair ban: não pode usar {a} junto com {b}."
 
     return True, ""
@@ -187,3 +159,186 @@ def validate_addition(
         return False, f"Limite excedido: {cn} permite no máximo {max_allowed} cópia(s)."
 
     return True, ""
+
+
+# =========================
+# Ruleset em memória (validação de decks inteiros)
+# =========================
+def _ban_status_limit(status) -> int:
+    s = (status or "").upper().strip()
+    if s == "BANNED":
+        return 0
+    if s.startswith("LIMITED_"):
+        try:
+            return int(s.split("_", 1)[1])
+        except Exception:
+            return 999
+    return 999
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """
+    Foto das regras (cópias, banlist, pair ban) carregada de uma vez,
+    para validar muitos decks sem 1 query por carta.
+    Chaves sempre em cardnumber normalizado (upper).
+    """
+    copy_limits: Mapping[str, int] = field(default_factory=dict)
+    ban_limits: Mapping[str, int] = field(default_factory=dict)
+    pair_bans: FrozenSet[Tuple[str, str]] = frozenset()
+
+    def max_allowed(self, cardnumber: str) -> int:
+        cn = (cardnumber or "").strip().upper()
+        by_rule = self.copy_limits.get(cn, DEFAULT_MAX_COPIES)
+        by_ban = self.ban_limits.get(cn, 999)
+        return min(by_rule, by_ban)
+
+    def violations(self, main_total: int, egg_total: int, counts: Dict[str, int]) -> List[str]:
+        """
+        Lista de problemas do deck (vazia = deck legal).
+        `counts` = {cardnumber: qtd total no deck}.
+        """
+        problems: List[str] = []
+
+        if main_total != MAIN_LIMIT:
+            problems.append(f"Main deck com {main_total} cartas (precisa de {MAIN_LIMIT}).")
+        if egg_total > EGG_LIMIT:
+            problems.append(f"Digi-Egg deck com {egg_total} cartas (máximo {EGG_LIMIT}).")
+
+        for cn in sorted(counts):
+            qty = counts[cn]
+            max_allowed = self.max_allowed(cn)
+            if max_allowed <= 0:
+                problems.append(f"{cn} está proibida pela banlist.")
+            elif qty > max_allowed:
+                problems.append(f"{cn}: {qty} cópias (máximo {max_allowed}).")
+
+        present = set(counts)
+        for a, b in sorted(self.pair_bans):
+            if a in present and b in present:
+                problems.append(f"Pair ban: não pode usar {a} junto com {b}.")
+
+        return problems
+
+
+# =========================
+# Banlists com vigência: um RuleSet imutável por período
+# =========================
+RULES_VERSION_CACHE_KEY = "decks_rules_version"
+
+
+@dataclass(frozen=True)
+class RulesetTimeline:
+    """
+    Snapshots pré-calculados: `starts[i]` é o 1º dia do período i e
+    `rulesets[i]` as regras vigentes nele. Busca por data é bisect (O(log n)).
+    """
+    starts: Tuple[date, ...]
+    rulesets: Tuple[RuleSet, ...]
+
+    def index_for(self, day: date) -> int:
+        return max(bisect_right(self.starts, day) - 1, 0)
+
+    def for_date(self, day: date) -> RuleSet:
+        return self.rulesets[self.index_for(day)]
+
+    def changed_cardnumbers(self, idx: int) -> Set[str]:
+        """
+        Cartas cuja regra muda na virada para o período `idx`.
+        """
+        if idx <= 0 or idx >= len(self.rulesets):
+            return set()
+        old, new = self.rulesets[idx - 1], self.rulesets[idx]
+        changed = set()
+        for attr in ("copy_limits", "ban_limits"):
+            before, after = getattr(old, attr), getattr(new, attr)
+            for cn in set(before) | set(after):
+                if before.get(cn) != after.get(cn):
+                    changed.add(cn)
+        for a, b in old.pair_bans ^ new.pair_bans:
+            changed.update((a, b))
+        return changed
+
+
+def _is_active(row, day: date) -> bool:
+    start, end = row["effective_from"], row["effective_to"]
+    return (start is None or start <= day) and (end is None or day <= end)
+
+
+def build_timeline() -> RulesetTimeline:
+    """
+    Carrega todas as regras (3 queries) e monta um RuleSet por período de vigência.
+    """
+    fields = ("effective_from", "effective_to")
+    # o clean() das regras impede vigências sobrepostas; se mesmo assim houver
+    # (carga direta no banco), a de início mais recente vence, sempre a mesma
+    order = (F("effective_from").asc(nulls_first=True), "id")
+    copy_rows = list(CardCopyRule.objects.order_by(*order).values("cardnumber", "max_copies", *fields))
+    ban_rows = list(BanlistRule.objects.order_by(*order).values("cardnumber", "status", *fields))
+    pair_rows = list(PairBanRule.objects.order_by(*order).values("card_a", "card_b", *fields))
+
+    # cada início/fim de vigência abre um período novo (effective_to é inclusivo)
+    boundaries = {date.min}
+    for row in copy_rows + ban_rows + pair_rows:
+        if row["effective_from"]:
+            boundaries.add(row["effective_from"])
+        if row["effective_to"] and row["effective_to"] < date.max:
+            boundaries.add(row["effective_to"] + timedelta(days=1))
+    starts = tuple(sorted(boundaries))
+
+    rulesets = []
+    for day in starts:
+        rulesets.append(
+            RuleSet(
+                copy_limits=MappingProxyType({
+                    (r["cardnumber"] or "").strip().upper(): int(r["max_copies"])
+                    for r in copy_rows if _is_active(r, day)
+                }),
+                ban_limits=MappingProxyType({
+                    (r["cardnumber"] or "").strip().upper(): _ban_status_limit(r["status"])
+                    for r in ban_rows if _is_active(r, day)
+                }),
+                pair_bans=frozenset(
+                    PairBanRule.normalize_pair(r["card_a"], r["card_b"])
+                    for r in pair_rows if _is_active(r, day)
+                ),
+            )
+        )
+
+    return RulesetTimeline(starts=starts, rulesets=tuple(rulesets))
+
+
+# cache por processo; a versão fica no cache compartilhado (Redis/banco, ver
+# CACHES no settings), então um bump invalida os snapshots de todos os processos
+_timeline_state = {"version": None, "timeline": None}
+
+
+def bump_rules_version() -> None:
+    """
+    Chamado quando uma regra muda: força todos os processos a remontar os snapshots.
+    """
+    cache.set(RULES_VERSION_CACHE_KEY, time.time(), timeout=None)
+
+
+def rules_version():
+    version = cache.get(RULES_VERSION_CACHE_KEY)
+    if version is None:
+        version = time.time()
+        cache.set(RULES_VERSION_CACHE_KEY, version, timeout=None)
+    return version
+
+
+def get_timeline() -> RulesetTimeline:
+    version = rules_version()
+    if _timeline_state["timeline"] is None or _timeline_state["version"] != version:
+        _timeline_state["timeline"] = build_timeline()
+        _timeline_state["version"] = version
+    return _timeline_state["timeline"]
+
+
+def get_ruleset(day: Optional[date] = None) -> RuleSet:
+    """
+    Regras vigentes na data (default: hoje). Ex: validar o deck de um
+    torneio antigo com get_ruleset(tournament.date).
+    """
+    return get_timeline().for_date(day or timezone.localdate())
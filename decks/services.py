@@ -1,10 +1,28 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Iterable, List
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from cards.models import CardPrice, DigimonCard
 
 from .models import Deck, DeckCard
-from .decklist_io import DecklistLine, parse_decklist_text, build_decklist_text
+from .decklist_io import DecklistLine, DecklistSource, build_decklist_text, parse_decklist
+from .card_index import rebuild_card_index
+from .cooccurrence import update_cooccurrence
+from .fingerprint import refresh_fingerprints
+from .history import record_versions
+from .legality import revalidate_decks
+from .pricing import deckcard_cardnumber, refresh_price_summaries
+from .jobs import schedule_matrix_build
+from .browse import bump_public_decks_version
+from .stats import refresh_deck_stats
+from .rules import compute_current_counts, is_egg_card, validate_addition
+
+EXPORT_CACHE_TIMEOUT = 60 * 60 * 24
 
 
 @dataclass
@@ -12,18 +30,19 @@ class ImportResult:
     deck: Deck
     lines: List[DecklistLine]
     replaced: bool
+    format: str = "oficial"
 
 
-def import_decklist_into_deck(deck: Deck, text: str, replace: bool = False) -> ImportResult:
+def import_decklist_into_deck(deck: Deck, text: DecklistSource, replace: bool = False) -> ImportResult:
     """
-    Converte um texto de decklist no formato:
-        4 Nome da Carta BT24-012
-    em registros DeckCard vinculados ao `deck`.
+    Converte uma decklist (texto oficial "4 Nome da Carta BT24-012", JSON, TTS,
+    CSV, untap ou código de deck; formato detectado sozinho) em registros
+    DeckCard vinculados ao `deck`.
     """
-    lines = parse_decklist_text(text)
+    lines, fmt = parse_decklist(text)
 
     if not lines:
-        return ImportResult(deck=deck, lines=[], replaced=False)
+        return ImportResult(deck=deck, lines=[], replaced=False, format=fmt)
 
     if replace:
         deck.cards.all().delete()
@@ -38,17 +57,16 @@ def import_decklist_into_deck(deck: Deck, text: str, replace: bool = False) -> I
             },
         )
 
-    return ImportResult(deck=deck, lines=lines, replaced=replace)
+    return ImportResult(deck=deck, lines=lines, replaced=replace, format=fmt)
 
 
-def export_deck_to_text(deck: Deck) -> str:
+def deck_cards_to_lines(deck_cards: Iterable[DeckCard]) -> List[DecklistLine]:
     """
-    Exporta o deck para o texto de decklist oficial.
+    Linhas de decklist a partir de DeckCards (com select_related("card")),
+    na ordem em que vierem.
     """
     lines: List[DecklistLine] = []
-
-    qs = deck.cards.order_by("section", "codigo_carta", "nome_carta", "id").select_related("card")
-    for dc in qs:
+    for dc in deck_cards:
         qty = int(dc.quantidade or 0)
         if qty <= 0:
             continue
@@ -69,5 +87,193 @@ def export_deck_to_text(deck: Deck) -> str:
                     cardnumber=cn,
                 )
             )
+    return lines
+
+
+def export_deck_to_text(deck: Deck) -> str:
+    """
+    Exporta o deck para o texto de decklist oficial. O texto fica em cache pelo
+    fingerprint: decks com o mesmo conteúdo compartilham a mesma entrada.
+    """
+    key = f"deck-export:v1:{deck.fingerprint}"
+    if deck.fingerprint:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    qs = deck.cards.order_by("section", "codigo_carta", "nome_carta", "id").select_related("card")
+    text = build_decklist_text(deck_cards_to_lines(qs))
+    if deck.fingerprint:
+        cache.set(key, text, EXPORT_CACHE_TIMEOUT)
+    return text
+
+
+# ----------------------------
+# Edição incremental (deck builder)
+# ----------------------------
+@dataclass
+class DeckEditResult:
+    ok: bool
+    error: str = ""
+    changed: List[DeckCard] = field(default_factory=list)
+    removed_ids: List[int] = field(default_factory=list)
+    main_total: int = 0
+    egg_total: int = 0
+    price_delta: Decimal = Decimal("0.00")
+
+
+def _unit_price(cardnumber: str) -> Optional[Decimal]:
+    if not cardnumber:
+        return None
+    price = CardPrice.objects.filter(cardnumber=cardnumber).values_list("price", flat=True).first()
+    return price
+
+
+def _price_delta(cardnumber: str, qty_delta: int) -> Decimal:
+    unit = _unit_price(cardnumber)
+    if unit is None or not qty_delta:
+        return Decimal("0.00")
+    return unit * Decimal(qty_delta)
+
+
+def add_card_to_deck(deck: Deck, card: DigimonCard, qty: int) -> DeckEditResult:
+    """
+    Adiciona `qty` cópias de `card` ao deck (na seção correta: MAIN/EGG),
+    validando limites do deck, regra de cópias e banlist.
+    Usado tanto pelo form HTML quanto pelos endpoints JSON.
+    """
+    section = DeckCard.SECTION_EGG if is_egg_card(card) else DeckCard.SECTION_MAIN
+    cn = card.cardnumber
+
+    with transaction.atomic():
+        deck_cards = list(DeckCard.objects.filter(deck=deck).select_related("card"))
+        main_total, egg_total, cm, ce = compute_current_counts(deck_cards)
+
+        ok, error = validate_addition(
+            section=section,
+            cardnumber=cn,
+            qty=qty,
+            main_total=main_total,
+            egg_total=egg_total,
+            cm=cm,
+            ce=ce,
+        )
+        if not ok:
+            return DeckEditResult(ok=False, error=error, main_total=main_total, egg_total=egg_total)
+
+        existing = next(
+            (dc for dc in deck_cards if dc.section == section and dc.card_id == card.id),
+            None,
+        )
+
+        if existing:
+            existing.quantidade = (existing.quantidade or 0) + qty
+            if not existing.codigo_carta:
+                existing.codigo_carta = cn
+            if not existing.nome_carta:
+                existing.nome_carta = card.name
+            existing.save()
+            row = existing
+        else:
+            row = DeckCard.objects.create(
+                deck=deck,
+                section=section,
+                quantidade=qty,
+                codigo_carta=cn,
+                nome_carta=card.name,
+                card=card,
+            )
+
+    if section == DeckCard.SECTION_EGG:
+        egg_total += qty
+    else:
+        main_total += qty
+
+    return DeckEditResult(
+        ok=True,
+        changed=[row],
+        main_total=main_total,
+        egg_total=egg_total,
+        price_delta=_price_delta(cn, qty),
+    )
+
+
+def set_deckcard_quantity(deck: Deck, dc: DeckCard, qty: int) -> DeckEditResult:
+    """
+    Define a quantidade de uma linha do deck.
+    - qty <= 0 remove a linha
+    - aumentos passam pela mesma validação de `add_card_to_deck`
+    """
+    qty = int(qty or 0)
+    cn = deckcard_cardnumber(dc)
+
+    with transaction.atomic():
+        deck_cards = DeckCard.objects.filter(deck=deck).select_related("card")
+        main_total, egg_total, cm, ce = compute_current_counts(deck_cards)
+
+        current = int(dc.quantidade or 0)
+        delta = max(qty, 0) - current
+
+        if delta > 0:
+            ok, error = validate_addition(
+                section=dc.section,
+                cardnumber=cn,
+                qty=delta,
+                main_total=main_total,
+                egg_total=egg_total,
+                cm=cm,
+                ce=ce,
+            )
+            if not ok:
+                return DeckEditResult(ok=False, error=error, main_total=main_total, egg_total=egg_total)
+
+        result = DeckEditResult(ok=True)
+        if qty <= 0:
+            result.removed_ids.append(dc.id)
+            dc.delete()
+        elif delta:
+            dc.quantidade = qty
+            dc.save(update_fields=["quantidade"])
+            result.changed.append(dc)
+
+    if dc.section == DeckCard.SECTION_EGG:
+        egg_total += delta
+    else:
+        main_total += delta
+
+    result.main_total = main_total
+    result.egg_total = egg_total
+    result.price_delta = _price_delta(cn, delta)
+    return result
+
 
-    return build_decklist_text(lines)
+def remove_deckcard(deck: Deck, dc: DeckCard) -> DeckEditResult:
+    """
+    Remove uma linha inteira do deck.
+    """
+    return set_deckcard_quantity(deck, dc, 0)
+
+
+# ----------------------------
+# Dados derivados do deck (recalculados quando os DeckCards mudam)
+# ----------------------------
+def refresh_decks(deck_ids: Iterable[int]) -> None:
+    """
+    Recalcula tudo que é derivado do conteúdo dos decks informados.
+    Chamado pelo worker de tarefas (job "decks.refresh", enfileirado pelos
+    signals de DeckCard) e pelo comando refresh_decks.
+    """
+    deck_ids = list(deck_ids)
+    if not deck_ids:
+        return
+    rebuild_card_index(deck_ids)
+    refresh_fingerprints(deck_ids)
+    record_versions(deck_ids)
+    refresh_price_summaries(deck_ids)
+    refresh_deck_stats(deck_ids)
+    revalidate_decks(deck_ids)
+    update_cooccurrence(deck_ids)
+    # legalidade / cor / data mudaram: páginas do explorador com esses decks
+    if Deck.objects.filter(id__in=deck_ids, publico=True).exists():
+        bump_public_decks_version()
+    schedule_matrix_build()
@@ -0,0 +1,113 @@
+# decks/signals.py
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from cards.models import BanlistRule, CardCopyRule, PairBanRule
+
+from .browse import bump_public_decks_version
+from .fingerprint import deck_fingerprint
+from .jobs import schedule_matrix_build, schedule_refresh, schedule_rule_rollover
+from .legality import schedule_revalidation
+from .models import Deck, DeckCard
+
+
+def schedule_deck_refresh(deck_id: int) -> None:
+    """
+    Enfileira o recálculo dos dados derivados (preço, etc.) para o commit.
+    Vários DeckCards alterados no mesmo atomic() geram um único job por deck,
+    que roda no worker (decks.jobs), não no request.
+    """
+    if deck_id:
+        schedule_refresh([deck_id])
+
+
+def deck_content_changed(deck_id: int) -> None:
+    """
+    DeckCard criado/alterado/removido: atualiza na hora (mesma transação) o
+    fingerprint e o atualizado_em, que chaveiam os caches por conteúdo
+    (exportação, probabilidades, lista de compras); o resto vai para a fila.
+    """
+    if not deck_id:
+        return
+    # conteúdo mudou: conta como atualização do deck (auto_now só vale no save())
+    Deck.objects.filter(id=deck_id).update(atualizado_em=timezone.now(), fingerprint=deck_fingerprint(deck_id))
+    schedule_deck_refresh(deck_id)
+
+
+@receiver(post_save, sender=DeckCard)
+def deckcard_saved(sender, instance, **kwargs):
+    deck_content_changed(instance.deck_id)
+
+
+@receiver(post_delete, sender=DeckCard)
+def deckcard_deleted(sender, instance, **kwargs):
+    deck_content_changed(instance.deck_id)
+
+
+@receiver(pre_save, sender=Deck)
+def deck_before_save(sender, instance, **kwargs):
+    old = (
+        sender.objects.filter(pk=instance.pk).values_list("publico", "arquetipo_id").first()
+        if instance.pk else None
+    )
+    instance._old_publico, instance._old_arquetipo_id = old or (None, None)
+
+
+@receiver(post_save, sender=Deck)
+def deck_saved(sender, instance, created, **kwargs):
+    # deck virou público/privado: entra ou sai da matriz de coocorrência
+    if not created and getattr(instance, "_old_publico", None) != instance.publico:
+        schedule_deck_refresh(instance.pk)
+    # arquétipo marcado/trocado: muda os centróides da matriz de similaridade
+    if getattr(instance, "_old_arquetipo_id", None) != instance.arquetipo_id:
+        schedule_matrix_build()
+    # nome/arquétipo/data de um deck público (ou que saiu do explorador)
+    if instance.publico or getattr(instance, "_old_publico", None):
+        transaction.on_commit(bump_public_decks_version)
+
+
+@receiver(post_delete, sender=Deck)
+def deck_deleted(sender, instance, **kwargs):
+    if instance.publico:
+        transaction.on_commit(bump_public_decks_version)
+
+
+# ----------------------------
+# Regras (banlist / cópias / pair ban): revalida só os decks com as cartas afetadas
+# ----------------------------
+def _rule_cardnumbers(instance) -> list:
+    if isinstance(instance, PairBanRule):
+        return [instance.card_a, instance.card_b]
+    return [instance.cardnumber]
+
+
+@receiver(pre_save, sender=BanlistRule)
+@receiver(pre_save, sender=CardCopyRule)
+@receiver(pre_save, sender=PairBanRule)
+def rule_before_save(sender, instance, **kwargs):
+    # se o cardnumber da regra mudou, os decks com o valor antigo também são afetados
+    old = sender.objects.filter(pk=instance.pk).first() if instance.pk else None
+    instance._old_cardnumbers = _rule_cardnumbers(old) if old else []
+
+
+@receiver(post_save, sender=BanlistRule)
+@receiver(post_save, sender=CardCopyRule)
+@receiver(post_save, sender=PairBanRule)
+def rule_saved(sender, instance, **kwargs):
+    schedule_revalidation(_rule_cardnumbers(instance) + getattr(instance, "_old_cardnumbers", []))
+    # vigência futura: revalida de novo no dia em que a regra entra/sai
+    end = instance.effective_to
+    schedule_rule_rollover([instance.effective_from, end + timedelta(days=1) if end and end < date.max else None])
+
+
+@receiver(post_delete, sender=BanlistRule)
+@receiver(post_delete, sender=CardCopyRule)
+@receiver(post_delete, sender=PairBanRule)
+def rule_deleted(sender, instance, **kwargs):
+    schedule_revalidation(_rule_cardnumbers(instance))
@@ -0,0 +1,256 @@
+# decks/similarity.py
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+from django.core.cache import cache
+
+from .card_index import deck_card_counts
+from .jobs import schedule_matrix_build
+from .models import Archetype, Deck, DeckCardIndex
+
+# A matriz é montada fora do request (job "decks.matrix" / comando
+# build_deck_matrix) e publicada no cache compartilhado. Os requests só leem:
+# uma consulta à versão por chamada e a matriz é baixada de novo só quando muda.
+MATRIX_CACHE_KEY = "deck-matrix"
+MATRIX_VERSION_CACHE_KEY = "deck-matrix-version"
+
+
+@dataclass
+class DeckMatrix:
+    """
+    Decks como vetores esparsos de contagem de cartas (linhas normalizadas L2).
+    Guardado em CSR (por deck) e CSC (por carta) com arrays NumPy, para
+    similaridade de cosseno em O(nnz das colunas da consulta).
+    """
+    deck_ids: np.ndarray            # (n_decks,)
+    columns: Dict[str, int]         # cardnumber -> coluna
+    indptr: np.ndarray              # CSR
+    indices: np.ndarray
+    data: np.ndarray
+    col_indptr: np.ndarray          # CSC
+    col_rows: np.ndarray
+    col_data: np.ndarray
+    row_of: Dict[int, int]          # deck_id -> linha
+    centroids: np.ndarray           # (n_archetypes, n_cols), L2
+    archetype_ids: np.ndarray
+    built_at: float
+
+    @property
+    def n_cols(self) -> int:
+        return len(self.columns)
+
+    def row_vector(self, deck_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        row = self.row_of.get(deck_id)
+        if row is None:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        start, end = self.indptr[row], self.indptr[row + 1]
+        return self.indices[start:end], self.data[start:end]
+
+    def vector_for_counts(self, counts: Dict[str, int]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vetor L2 de um deck fora da matriz (ex: recém-importado). Cartas que
+        nenhum deck da matriz usa entram só na norma (não somam no cosseno).
+        """
+        pairs = sorted((self.columns[cn], qty) for cn, qty in counts.items() if cn in self.columns and qty)
+        if not pairs:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32)
+        cols = np.fromiter((c for c, _ in pairs), dtype=np.int32, count=len(pairs))
+        vals = np.fromiter((q for _, q in pairs), dtype=np.float32, count=len(pairs))
+        norm = float(np.sqrt(sum(float(q) ** 2 for q in counts.values() if q)))
+        return cols, vals / norm
+
+    def scores(self, cols: np.ndarray, vals: np.ndarray) -> np.ndarray:
+        """
+        Cosseno da consulta contra todos os decks.
+        """
+        out = np.zeros(len(self.deck_ids), dtype=np.float32)
+        for col, val in zip(cols.tolist(), vals.tolist()):
+            start, end = self.col_indptr[col], self.col_indptr[col + 1]
+            # cada deck aparece no máximo 1x por coluna -> soma vetorizada direta
+            out[self.col_rows[start:end]] += val * self.col_data[start:end]
+        return out
+
+    def classify(self, cols: np.ndarray, vals: np.ndarray) -> Tuple[Optional[int], float]:
+        if not len(self.archetype_ids) or not len(cols):
+            return None, 0.0
+        sims = self.centroids[:, cols] @ vals
+        best = int(np.argmax(sims))
+        return int(self.archetype_ids[best]), float(sims[best])
+
+
+def build_matrix() -> DeckMatrix:
+    """
+    Monta a matriz a partir do índice invertido (1 query) + arquétipos (1 query).
+    Colunas = cartas usadas em algum deck.
+    """
+    rows = list(DeckCardIndex.objects.order_by("deck_id").values_list("deck_id", "cardnumber", "quantidade"))
+    columns: Dict[str, int] = {}
+    for _, cn, _ in rows:
+        columns.setdefault(cn, len(columns))
+
+    n = len(rows)
+    row_deck = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+    col_idx = np.fromiter((columns[r[1]] for r in rows), dtype=np.int32, count=n)
+    vals = np.fromiter((r[2] for r in rows), dtype=np.float32, count=n)
+
+    deck_ids, row_idx = np.unique(row_deck, return_inverse=True)
+    n_decks = len(deck_ids)
+
+    # normalização L2 por deck
+    norms = np.sqrt(np.bincount(row_idx, weights=vals.astype(np.float64) ** 2, minlength=n_decks))
+    norms[norms == 0] = 1.0
+    vals = (vals / norms[row_idx]).astype(np.float32)
+
+    indptr = np.zeros(n_decks + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row_idx, minlength=n_decks), out=indptr[1:])
+
+    order = np.lexsort((row_idx, col_idx))
+    col_indptr = np.zeros(len(columns) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(col_idx, minlength=len(columns)), out=col_indptr[1:])
+
+    # centróides dos arquétipos (média dos vetores dos decks marcados no admin)
+    assigned = list(
+        Deck.objects.filter(arquetipo__isnull=False, id__in=deck_ids.tolist())
+        .values_list("id", "arquetipo_id")
+    )
+    row_of = {int(d): i for i, d in enumerate(deck_ids.tolist())}
+    archetype_ids = np.array(sorted({a for _, a in assigned}), dtype=np.int64)
+    centroids = np.zeros((len(archetype_ids), len(columns)), dtype=np.float32)
+    if len(archetype_ids):
+        arch_pos = {int(a): i for i, a in enumerate(archetype_ids.tolist())}
+        for deck_id, arch_id in assigned:
+            row = row_of[deck_id]
+            start, end = indptr[row], indptr[row + 1]
+            centroids[arch_pos[arch_id], col_idx[start:end]] += vals[start:end]
+        lens = np.linalg.norm(centroids, axis=1, keepdims=True)
+        lens[lens == 0] = 1.0
+        centroids /= lens
+
+    return DeckMatrix(
+        deck_ids=deck_ids,
+        columns=columns,
+        indptr=indptr,
+        indices=col_idx,
+        data=vals,
+        col_indptr=col_indptr,
+        col_rows=row_idx[order].astype(np.int64),
+        col_data=vals[order],
+        row_of=row_of,
+        centroids=centroids,
+        archetype_ids=archetype_ids,
+        built_at=time.time(),
+    )
+
+
+def publish_matrix() -> DeckMatrix:
+    """
+    Monta a matriz e publica no cache compartilhado (worker / comando).
+    """
+    matrix = build_matrix()
+    cache.set(MATRIX_CACHE_KEY, matrix, timeout=None)
+    cache.set(MATRIX_VERSION_CACHE_KEY, matrix.built_at, timeout=None)
+    return matrix
+
+
+def empty_matrix() -> DeckMatrix:
+    empty_int = np.empty(0, dtype=np.int64)
+    return DeckMatrix(
+        deck_ids=empty_int,
+        columns={},
+        indptr=np.zeros(1, dtype=np.int64),
+        indices=np.empty(0, dtype=np.int32),
+        data=np.empty(0, dtype=np.float32),
+        col_indptr=np.zeros(1, dtype=np.int64),
+        col_rows=empty_int,
+        col_data=np.empty(0, dtype=np.float32),
+        row_of={},
+        centroids=np.zeros((0, 0), dtype=np.float32),
+        archetype_ids=empty_int,
+        built_at=0.0,
+    )
+
+
+# cópia por processo da última matriz publicada
+_matrix_state: Dict[str, object] = {"version": None, "matrix": None}
+
+
+def get_matrix() -> DeckMatrix:
+    """
+    Matriz publicada pelo worker (só leitura; nunca monta no request).
+    Se ainda não houver nenhuma, devolve uma vazia e pede a montagem.
+    """
+    version = cache.get(MATRIX_VERSION_CACHE_KEY)
+    if version is not None and version == _matrix_state["version"]:
+        return _matrix_state["matrix"]
+
+    matrix = cache.get(MATRIX_CACHE_KEY) if version is not None else None
+    if matrix is None:
+        schedule_matrix_build(delay=0)
+        return _matrix_state["matrix"] or empty_matrix()
+
+    _matrix_state.update(version=version, matrix=matrix)
+    return matrix
+
+
+def similar_decks(deck_id: int, k: int = 10, public_only: bool = True) -> List[Tuple[Deck, float]]:
+    """
+    Os k decks mais parecidos (cosseno), sem o próprio deck.
+    """
+    matrix = get_matrix()
+    cols, vals = matrix.row_vector(deck_id)
+    if not len(cols):
+        return []
+
+    scores = matrix.scores(cols, vals)
+    own = matrix.row_of.get(deck_id)
+    if own is not None:
+        scores[own] = -1.0
+
+    # pega candidatos a mais e filtra públicos no banco; se a janela tiver
+    # poucos públicos (muitos decks privados parecidos), dobra e continua
+    found: List[Tuple[Deck, float]] = []
+    seen: Set[int] = set()
+    take = min(len(scores), k * 5 if public_only else k)
+    while take > len(seen) and len(found) < k:
+        top = np.argpartition(-scores, take - 1)[:take]
+        # empates na borda podem trocar de janela: pula o que já foi visto
+        top = [i for i in top[np.argsort(-scores[top])] if i not in seen]
+        seen.update(top)
+        ranked = [(int(matrix.deck_ids[i]), float(scores[i])) for i in top if scores[i] > 0]
+
+        qs = Deck.objects.filter(id__in=[d for d, _ in ranked]).select_related("user", "arquetipo")
+        if public_only:
+            qs = qs.filter(publico=True)
+        decks = {d.id: d for d in qs}
+        found += [(decks[d], score) for d, score in ranked if d in decks]
+
+        if len(ranked) < len(top):
+            break  # o resto tem score 0: nada parecido
+        take = min(len(scores), take * 2)
+    return found[:k]
+
+
+def suggest_archetypes(deck_ids: Sequence[int]) -> Dict[int, Tuple[Optional[int], float]]:
+    """
+    Classificação em lote pelo conteúdo atual dos decks (1 query), inclusive
+    decks que ainda não estão na matriz: {deck_id: (archetype_id, score)}.
+    """
+    matrix = get_matrix()
+    return {
+        deck_id: matrix.classify(*matrix.vector_for_counts(counts))
+        for deck_id, counts in deck_card_counts(deck_ids).items()
+    }
+
+
+def suggest_archetype(deck_id: int) -> Tuple[Optional[Archetype], float]:
+    """
+    Arquétipo cujo centróide é mais próximo do deck (cosseno).
+    """
+    arch_id, score = suggest_archetypes([deck_id]).get(deck_id, (None, 0.0))
+    if arch_id is None or score <= 0:
+        return None, 0.0
+    return Archetype.objects.filter(pk=arch_id).first(), score
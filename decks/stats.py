@@ -0,0 +1,113 @@
+# decks/stats.py
+from __future__ import annotations
+
+from collections import Counter
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import Sum
+
+from .models import Deck, DeckCard
+
+STATS_BATCH_SIZE = 500
+
+# (section, play_cost, level, color, card_type, dp, qty)
+StatsRow = Tuple[str, Optional[int], Optional[int], str, str, Optional[int], int]
+
+
+def _sorted_counts(counter: Counter, numeric: bool = False) -> Dict[str, int]:
+    if numeric:
+        keys = sorted(counter, key=int)
+    else:
+        keys = sorted(counter, key=lambda k: (-counter[k], k))
+    return {str(k): counter[k] for k in keys}
+
+
+def compute_stats(rows: Iterable[StatsRow]) -> Dict:
+    """
+    Estatísticas do Main Deck (curva de custo, levels, cores, tipos, DP médio).
+    Cartas multicoloridas ("Red/Blue") contam para cada cor.
+    """
+    curve: Counter = Counter()
+    levels: Counter = Counter()
+    colors: Counter = Counter()
+    types: Counter = Counter()
+    main = egg = 0
+    dp_sum = dp_qty = 0
+
+    for section, play_cost, level, color, card_type, dp, qty in rows:
+        qty = int(qty or 0)
+        if qty <= 0:
+            continue
+        if section == DeckCard.SECTION_EGG:
+            egg += qty
+            continue
+
+        main += qty
+        if play_cost is not None:
+            curve[play_cost] += qty
+        if level is not None:
+            levels[level] += qty
+        for c in (color or "").split("/"):
+            if c.strip():
+                colors[c.strip()] += qty
+        types[(card_type or "").strip() or "?"] += qty
+        if dp:
+            dp_sum += dp * qty
+            dp_qty += qty
+
+    return {
+        "main": main,
+        "egg": egg,
+        "curve": _sorted_counts(curve, numeric=True),
+        "levels": _sorted_counts(levels, numeric=True),
+        "colors": _sorted_counts(colors),
+        "types": _sorted_counts(types),
+        "dp_medio": round(dp_sum / dp_qty) if dp_qty else None,
+    }
+
+
+def main_color(stats: Dict) -> str:
+    colors = stats.get("colors") or {}
+    return next(iter(colors), "")
+
+
+def refresh_deck_stats(deck_ids: Iterable[int]) -> None:
+    """
+    Recalcula Deck.estatisticas (+ colunas indexadas cor_principal/dp_medio).
+    Uma query agregada (DeckCard JOIN DigimonCard, GROUP BY) por lote.
+    """
+    ids = sorted({int(i) for i in deck_ids if i})
+
+    for start in range(0, len(ids), STATS_BATCH_SIZE):
+        batch = list(
+            Deck.objects.filter(id__in=ids[start:start + STATS_BATCH_SIZE]).only(
+                "id", "estatisticas", "cor_principal", "dp_medio"
+            )
+        )
+        if not batch:
+            continue
+
+        rows: Dict[int, list] = {d.id: [] for d in batch}
+        grouped = (
+            DeckCard.objects.filter(deck_id__in=rows.keys())
+            .values_list(
+                "deck_id", "section", "card__play_cost", "card__level", "card__color", "card__card_type", "card__dp"
+            )
+            .order_by()
+            .annotate(qty=Sum("quantidade"))
+        )
+        for deck_id, *row in grouped:
+            rows[deck_id].append(tuple(row))
+
+        changed = []
+        for deck in batch:
+            stats = compute_stats(rows[deck.id])
+            color = main_color(stats)
+            if stats != deck.estatisticas or color != deck.cor_principal or stats["dp_medio"] != deck.dp_medio:
+                deck.estatisticas = stats
+                deck.cor_principal = color
+                deck.dp_medio = stats["dp_medio"]
+                changed.append(deck)
+
+        if changed:
+            Deck.objects.bulk_update(changed, ["estatisticas", "cor_principal", "dp_medio"])
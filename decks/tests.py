@@ -1 +1,808 @@
+import base64
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError
 from django.test import TestCase
+from django.urls import reverse
+
+from cards.models import BanlistRule, CardCopyRule, CardPrice, DigimonCard
+from core.jobs import run_pending
+from core.models import PendingJob
+
+from . import history
+from .buylist import build_buy_list
+from .card_index import rebuild_card_index
+from .collection import import_collection, missing_by_deck, missing_cards
+from .decklist_io import DecklistLine, decode_deck_code, encode_deck_code
+from .jobs import DECK_REFRESH, REVALIDATE, RULES_ROLLOVER, any_refresh_pending
+from .models import Collection, Deck, DeckCard, DeckVersion
+
+
+class DeckEditApiTests(TestCase):
+    """
+    Endpoints JSON de edição parcial (adicionar / definir quantidade / remover)
+    e o form HTML de quantidade usado sem JS.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tamer", password="senha-123")
+        cls.other = User.objects.create_user("rival", password="senha-123")
+        cls.agumon = DigimonCard.objects.create(
+            cardnumber="BT1-010", name="Agumon", card_type="Digimon", color="Red", level=3
+        )
+        cls.koromon = DigimonCard.objects.create(cardnumber="BT1-001", name="Koromon", card_type="Digi-Egg")
+        cls.token = DigimonCard.objects.create(cardnumber="BT6-085", name="Fenriloogamon", card_type="Digimon")
+        CardCopyRule.objects.create(cardnumber="BT6-085", max_copies=50)
+        CardPrice.objects.create(cardnumber="BT1-010", price=Decimal("1.50"))
+
+    def setUp(self):
+        self.client.login(username="tamer", password="senha-123")
+        self.deck = Deck.objects.create(user=self.user, nome="Red Hybrid")
+
+    def _add(self, card, qty):
+        return self.client.post(
+            reverse("decks:deck_card_add_api", kwargs={"pk": self.deck.pk}),
+            {"card_id": card.pk, "qty": qty},
+        )
+
+    def _set_qty(self, dc, data):
+        return self.client.post(
+            reverse("decks:deck_card_set_qty_api", kwargs={"pk": self.deck.pk, "deckcard_id": dc.pk}), data
+        )
+
+    # ----- adicionar -----
+    def test_add_new_card_returns_row_for_the_page(self):
+        resp = self._add(self.agumon, 2)
+
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertTrue(data["ok"])
+        self.assertEqual(len(data["rows"]), 1)
+        row = data["rows"][0]
+        dc = DeckCard.objects.get(deck=self.deck)
+        self.assertEqual(row["id"], dc.pk)
+        self.assertEqual((row["cardnumber"], row["name"], row["qty"], row["section"]), ("BT1-010", "Agumon", 2, "MAIN"))
+        self.assertEqual(row["image"], self.agumon.cdn_image)
+        self.assertEqual(row["details"], "Digimon • Red • Lv 3")
+        self.assertEqual(
+            row["urls"]["set_qty"],
+            reverse("decks:deck_set_card_qty", kwargs={"pk": self.deck.pk, "deckcard_id": dc.pk}),
+        )
+        self.assertEqual(data["totals"]["main"], 2)
+        self.assertEqual(data["price_delta"], "3.00")
+
+    def test_add_existing_card_increments_same_row(self):
+        self._add(self.agumon, 1)
+        resp = self._add(self.agumon, 2)
+
+        self.assertEqual(resp.json()["rows"][0]["qty"], 3)
+        self.assertEqual(DeckCard.objects.filter(deck=self.deck).count(), 1)
+
+    def test_add_egg_goes_to_egg_section(self):
+        data = self._add(self.koromon, 1).json()
+
+        self.assertEqual(data["rows"][0]["section"], DeckCard.SECTION_EGG)
+        self.assertEqual((data["totals"]["main"], data["totals"]["egg"]), (0, 1))
+
+    def test_add_over_copy_limit_is_rejected(self):
+        self._add(self.agumon, 4)
+        resp = self._add(self.agumon, 1)
+
+        self.assertEqual(resp.status_code, 400)
+        self.assertFalse(resp.json()["ok"])
+        self.assertEqual(DeckCard.objects.get(deck=self.deck).quantidade, 4)
+
+    def test_add_unknown_card_is_404(self):
+        resp = self.client.post(reverse("decks:deck_card_add_api", kwargs={"pk": self.deck.pk}), {"card_id": 999999})
+        self.assertEqual(resp.status_code, 404)
+
+    def test_other_users_deck_is_404(self):
+        deck = Deck.objects.create(user=self.other, nome="Alheio")
+        resp = self.client.post(
+            reverse("decks:deck_card_add_api", kwargs={"pk": deck.pk}), {"card_id": self.agumon.pk, "qty": 1}
+        )
+        self.assertEqual(resp.status_code, 404)
+        self.assertFalse(DeckCard.objects.filter(deck=deck).exists())
+
+    # ----- definir quantidade -----
+    def test_set_qty_updates_row_and_price_delta(self):
+        self._add(self.agumon, 1)
+        dc = DeckCard.objects.get(deck=self.deck)
+
+        data = self._set_qty(dc, {"qty": 3}).json()
+
+        self.assertTrue(data["ok"])
+        self.assertEqual(data["rows"][0]["qty"], 3)
+        self.assertEqual(data["price_delta"], "3.00")
+        dc.refresh_from_db()
+        self.assertEqual(dc.quantidade, 3)
+
+    def test_set_qty_is_clamped_to_twenty(self):
+        self._add(self.token, 1)
+        dc = DeckCard.objects.get(deck=self.deck)
+
+        data = self._set_qty(dc, {"qty": 99}).json()
+
+        self.assertTrue(data["ok"])
+        self.assertEqual(data["rows"][0]["qty"], 20)
+        dc.refresh_from_db()
+        self.assertEqual(dc.quantidade, 20)
+
+    def test_set_qty_zero_deletes_row(self):
+        self._add(self.agumon, 2)
+        dc = DeckCard.objects.get(deck=self.deck)
+
+        data = self._set_qty(dc, {"qty": 0}).json()
+
+        self.assertEqual(data["removed"], [dc.pk])
+        self.assertEqual(data["rows"], [])
+        self.assertEqual(data["totals"]["main"], 0)
+        self.assertEqual(data["price_delta"], "-3.00")
+        self.assertFalse(DeckCard.objects.filter(pk=dc.pk).exists())
+
+    def test_set_qty_negative_is_clamped_to_delete(self):
+        self._add(self.agumon, 2)
+        dc = DeckCard.objects.get(deck=self.deck)
+
+        data = self._set_qty(dc, {"qty": -5}).json()
+
+        self.assertEqual(data["removed"], [dc.pk])
+        self.assertFalse(DeckCard.objects.filter(pk=dc.pk).exists())
+
+    def test_set_qty_missing_or_invalid_is_400(self):
+        self._add(self.agumon, 2)
+        dc = DeckCard.objects.get(deck=self.deck)
+
+        for data in ({}, {"qty": ""}, {"qty": "abc"}):
+            resp = self._set_qty(dc, data)
+            self.assertEqual(resp.status_code, 400)
+            self.assertFalse(resp.json()["ok"])
+
+        dc.refresh_from_db()
+        self.assertEqual(dc.quantidade, 2)
+
+    def test_set_qty_over_copy_limit_is_rejected(self):
+        self._add(self.agumon, 2)
+        dc = DeckCard.objects.get(deck=self.deck)
+
+        resp = self._set_qty(dc, {"qty": 5})
+
+        self.assertEqual(resp.status_code, 400)
+        dc.refresh_from_db()
+        self.assertEqual(dc.quantidade, 2)
+
+    def test_set_qty_html_form_redirects_to_deck(self):
+        self._add(self.agumon, 1)
+        dc = DeckCard.objects.get(deck=self.deck)
+        url = reverse("decks:deck_set_card_qty", kwargs={"pk": self.deck.pk, "deckcard_id": dc.pk})
+
+        resp = self.client.post(url, {"qty": 2})
+        self.assertRedirects(resp, reverse("decks:deck_detail", kwargs={"pk": self.deck.pk}), fetch_redirect_response=False)
+        dc.refresh_from_db()
+        self.assertEqual(dc.quantidade, 2)
+
+        # sem quantidade: não mexe na linha
+        self.client.post(url, {})
+        dc.refresh_from_db()
+        self.assertEqual(dc.quantidade, 2)
+
+    # ----- remover -----
+    def test_remove_deletes_row(self):
+        self._add(self.agumon, 3)
+        dc = DeckCard.objects.get(deck=self.deck)
+
+        resp = self.client.post(
+            reverse("decks:deck_card_remove_api", kwargs={"pk": self.deck.pk, "deckcard_id": dc.pk})
+        )
+
+        data = resp.json()
+        self.assertTrue(data["ok"])
+        self.assertEqual(data["removed"], [dc.pk])
+        self.assertEqual(data["price_delta"], "-4.50")
+        self.assertFalse(DeckCard.objects.filter(deck=self.deck).exists())
+
+    def test_remove_unknown_row_is_404(self):
+        resp = self.client.post(
+            reverse("decks:deck_card_remove_api", kwargs={"pk": self.deck.pk, "deckcard_id": 999999})
+        )
+        self.assertEqual(resp.status_code, 404)
+
+    def test_endpoints_require_post(self):
+        resp = self.client.get(reverse("decks:deck_card_add_api", kwargs={"pk": self.deck.pk}))
+        self.assertEqual(resp.status_code, 405)
+
+
+class DeckRefreshJobTests(TestCase):
+    """
+    Editar um deck só enfileira o recálculo; o worker (run_pending) grava o
+    resumo de preço que o deck_detail lê.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tamer", password="senha-123")
+        cls.agumon = DigimonCard.objects.create(cardnumber="BT1-010", name="Agumon", card_type="Digimon")
+        CardPrice.objects.create(cardnumber="BT1-010", price=Decimal("1.50"))
+
+    def test_edit_enqueues_refresh_once(self):
+        deck = Deck.objects.create(user=self.user, nome="Red")
+        with self.captureOnCommitCallbacks(execute=True):
+            dc = DeckCard.objects.create(deck=deck, card=self.agumon, quantidade=2)
+            dc.quantidade = 3
+            dc.save()
+
+        self.assertEqual(list(PendingJob.objects.values_list("kind", "key")), [(DECK_REFRESH, str(deck.pk))])
+        deck.refresh_from_db()
+        self.assertEqual(deck.preco_linhas, [])
+
+    def test_edit_updates_fingerprint_in_the_same_transaction(self):
+        from .fingerprint import compute_fingerprint
+
+        deck = Deck.objects.create(user=self.user, nome="Red")
+        DeckCard.objects.create(deck=deck, card=self.agumon, quantidade=2)
+
+        # sem worker: os caches por fingerprint já enxergam o conteúdo novo
+        deck.refresh_from_db()
+        self.assertEqual(deck.fingerprint, compute_fingerprint([(DeckCard.SECTION_MAIN, "BT1-010", 2)]))
+        DeckCard.objects.filter(deck=deck).delete()
+        deck.refresh_from_db()
+        self.assertEqual(deck.fingerprint, "")
+
+    def test_worker_stores_price_rows_for_detail(self):
+        deck = Deck.objects.create(user=self.user, nome="Red")
+        with self.captureOnCommitCallbacks(execute=True):
+            DeckCard.objects.create(deck=deck, card=self.agumon, quantidade=2)
+
+        self.assertEqual(run_pending([DECK_REFRESH]), 1)
+        self.assertFalse(PendingJob.objects.filter(kind=DECK_REFRESH).exists())
+
+        deck.refresh_from_db()
+        self.assertEqual(deck.preco_total, Decimal("3.00"))
+        self.assertEqual(deck.preco_linhas[0]["subtotal"], "3.00")
+
+        self.client.login(username="tamer", password="senha-123")
+        resp = self.client.get(reverse("decks:deck_detail", kwargs={"pk": deck.pk}))
+        self.assertEqual(resp.context["deck_total"], Decimal("3.00"))
+        self.assertEqual(resp.context["price_rows"][0]["unit"], Decimal("1.50"))
+        self.assertFalse(resp.context["prices_pending"])
+
+    def test_rule_change_enqueues_revalidation(self):
+        deck = Deck.objects.create(user=self.user, nome="Red")
+        with self.captureOnCommitCallbacks(execute=True):
+            DeckCard.objects.create(deck=deck, card=self.agumon, quantidade=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending([DECK_REFRESH])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BanlistRule.objects.create(cardnumber="BT1-010", status=BanlistRule.BANNED)
+
+        self.assertEqual(list(PendingJob.objects.filter(kind=REVALIDATE).values_list("key", flat=True)), ["BT1-010"])
+        run_pending([REVALIDATE])
+
+        deck.refresh_from_db()
+        self.assertFalse(deck.legal)
+        self.assertIn("BT1-010 está proibida pela banlist.", deck.violacoes)
+
+    def test_future_rule_is_applied_on_its_start_day(self):
+        from datetime import timedelta
+
+        from django.utils import timezone
+
+        deck = Deck.objects.create(user=self.user, nome="Red")
+        with self.captureOnCommitCallbacks(execute=True):
+            DeckCard.objects.create(deck=deck, card=self.agumon, quantidade=2)
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending([DECK_REFRESH])
+
+        start = timezone.localdate() + timedelta(days=10)
+        with self.captureOnCommitCallbacks(execute=True):
+            BanlistRule.objects.create(cardnumber="BT1-010", status=BanlistRule.BANNED, effective_from=start)
+        run_pending([REVALIDATE])
+        deck.refresh_from_db()
+        self.assertNotIn("BT1-010 está proibida pela banlist.", deck.violacoes)
+
+        job = PendingJob.objects.get(kind=RULES_ROLLOVER)
+        self.assertEqual(job.key, start.isoformat())
+        self.assertEqual(run_pending([RULES_ROLLOVER]), 0)
+
+        # chega o dia
+        PendingJob.objects.filter(pk=job.pk).update(run_after=timezone.now())
+        with mock.patch.object(timezone, "localdate", return_value=start):
+            self.assertEqual(run_pending([RULES_ROLLOVER]), 1)
+        deck.refresh_from_db()
+        self.assertIn("BT1-010 está proibida pela banlist.", deck.violacoes)
+
+    def test_legality_flip_of_public_deck_invalidates_explorer(self):
+        from django.core.cache import cache
+
+        from .browse import PUBLIC_DECKS_VERSION_CACHE_KEY
+        from .legality import revalidate_decks
+
+        deck = Deck.objects.create(user=self.user, nome="Red", publico=True, legal=True)
+        DeckCard.objects.create(deck=deck, card=self.agumon, quantidade=2)
+
+        before = cache.get(PUBLIC_DECKS_VERSION_CACHE_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            revalidate_decks([deck.pk])
+        flipped = cache.get(PUBLIC_DECKS_VERSION_CACHE_KEY)
+        self.assertNotEqual(flipped, before)
+
+        # continua ilegal: o cache do explorador fica
+        with self.captureOnCommitCallbacks(execute=True):
+            revalidate_decks([deck.pk])
+        self.assertEqual(cache.get(PUBLIC_DECKS_VERSION_CACHE_KEY), flipped)
+
+
+class DeckExportTests(TestCase):
+    """
+    Exportação em texto: o ETag e o cache seguem o conteúdo logo depois da
+    edição, sem esperar o worker.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tamer", password="senha-123")
+        cls.agumon = DigimonCard.objects.create(cardnumber="BT1-010", name="Agumon", card_type="Digimon")
+        cls.gabumon = DigimonCard.objects.create(cardnumber="BT1-029", name="Gabumon", card_type="Digimon")
+
+    def test_export_follows_edit_before_refresh(self):
+        deck = Deck.objects.create(user=self.user, nome="Red", publico=True)
+        DeckCard.objects.create(deck=deck, card=self.agumon, codigo_carta="BT1-010", nome_carta="Agumon", quantidade=4)
+        url = reverse("decks:deck_export_public", kwargs={"pk": deck.pk})
+
+        first = self.client.get(url)
+        self.assertNotIn("Gabumon", first.content.decode())
+
+        DeckCard.objects.create(deck=deck, card=self.gabumon, codigo_carta="BT1-029", nome_carta="Gabumon", quantidade=4)
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertIn("Gabumon", second.content.decode())
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=second["ETag"]).status_code, 304)
+
+
+class DeckHistoryTests(TestCase):
+    """
+    record_versions: o conteúdo anterior de todos os decks vem numa query só,
+    e a versão gravada por outro worker no meio não derruba a gravação.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tamer", password="senha-123")
+        cls.agumon = DigimonCard.objects.create(cardnumber="BT1-010", name="Agumon", card_type="Digimon")
+
+    def _deck(self, nome, qty):
+        deck = Deck.objects.create(user=self.user, nome=nome, fingerprint=f"{nome}-{qty}")
+        DeckCard.objects.create(deck=deck, card=self.agumon, quantidade=qty)
+        return deck
+
+    def _edit(self, deck, qty):
+        DeckCard.objects.filter(deck=deck).update(quantidade=qty)
+        Deck.objects.filter(pk=deck.pk).update(fingerprint=f"{deck.nome}-{qty}")
+
+    def test_query_count_does_not_grow_with_decks(self):
+        decks = [self._deck(f"d{i}", 1) for i in range(6)]
+        history.record_versions(d.pk for d in decks)
+        for d in decks:
+            self._edit(d, 2)
+
+        with self.assertNumQueries(8):
+            history.record_versions(d.pk for d in decks[:2])
+        with self.assertNumQueries(8):
+            history.record_versions(d.pk for d in decks[2:])
+
+        for d in decks:
+            self.assertEqual(history.version_contents(d.pk, 2), {"MAIN|BT1-010": 2})
+            self.assertEqual(DeckVersion.objects.get(deck=d, numero=2).delta, {"MAIN|BT1-010": 2})
+
+    def test_unique_conflict_is_retried(self):
+        deck = self._deck("red", 1)
+        history.record_versions([deck.pk])
+        self._edit(deck, 3)
+
+        real_bulk_create = DeckVersion.objects.bulk_create
+        attempts = []
+
+        def conflicting(objs):
+            # o primeiro insert bate no unique (deck, numero), como se outro
+            # worker tivesse gravado a versão no meio; a segunda rodada relê
+            attempts.append(objs)
+            if len(attempts) == 1:
+                raise IntegrityError("uniq_deckversion_deck_numero")
+            return real_bulk_create(objs)
+
+        with mock.patch.object(DeckVersion.objects, "bulk_create", side_effect=conflicting) as bulk:
+            history.record_versions([deck.pk])
+
+        self.assertEqual(bulk.call_count, 2)
+        self.assertEqual(list(DeckVersion.objects.filter(deck=deck).values_list("numero", flat=True)), [2, 1])
+
+
+class PublicDeckPageTests(TestCase):
+    """
+    Explorador de decks públicos: páginas cheias mesmo com decks repetidos.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user("tamer")
+        decks = [Deck(user=user, nome=f"Deck {i}", publico=True, fingerprint=f"fp{i}") for i in range(40)]
+        Deck.objects.bulk_create(decks)
+        # os 10 mais recentes têm a mesma lista
+        newest = Deck.objects.order_by("-atualizado_em", "-id")[:10]
+        Deck.objects.filter(id__in=[d.id for d in newest]).update(fingerprint="igual")
+
+    def test_duplicates_do_not_shorten_the_page(self):
+        from .browse import PAGE_SIZE, PublicDeckFilters, _page_ids
+
+        ids, cursor = _page_ids(PublicDeckFilters(), "")
+        self.assertEqual(len(ids), PAGE_SIZE)
+        self.assertEqual(Deck.objects.filter(id__in=ids, fingerprint="igual").count(), 1)
+        self.assertTrue(cursor)
+
+        rest, cursor = _page_ids(PublicDeckFilters(), cursor)
+        self.assertEqual(len(rest), 40 - 10 - (PAGE_SIZE - 1))
+        self.assertFalse(set(ids) & set(rest))
+        self.assertEqual(cursor, "")
+
+    def test_page_cache_ignores_private_deck_edits(self):
+        from django.core.cache import cache
+
+        from .browse import PUBLIC_DECKS_VERSION_CACHE_KEY
+        from .services import refresh_decks
+
+        user = User.objects.get(username="tamer")
+        private = Deck.objects.create(user=user, nome="Privado")
+        before = cache.get(PUBLIC_DECKS_VERSION_CACHE_KEY)
+        with self.captureOnCommitCallbacks(execute=True):
+            private.nome = "Privado 2"
+            private.save()
+        refresh_decks([private.pk])
+        self.assertEqual(cache.get(PUBLIC_DECKS_VERSION_CACHE_KEY), before)
+
+        public = Deck.objects.filter(publico=True).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            public.nome = "Renomeado"
+            public.save()
+        self.assertNotEqual(cache.get(PUBLIC_DECKS_VERSION_CACHE_KEY), before)
+
+        before = cache.get(PUBLIC_DECKS_VERSION_CACHE_KEY)
+        refresh_decks([public.pk])
+        self.assertNotEqual(cache.get(PUBLIC_DECKS_VERSION_CACHE_KEY), before)
+
+
+class DeckImportDuplicateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tamer", password="senha-123")
+        DigimonCard.objects.create(cardnumber="BT1-010", name="Agumon", card_type="Digimon")
+
+    def test_import_warns_about_identical_deck(self):
+        from .fingerprint import compute_fingerprint
+
+        Deck.objects.create(
+            user=self.user, nome="Antigo", fingerprint=compute_fingerprint([(DeckCard.SECTION_MAIN, "BT1-010", 4)])
+        )
+        deck = Deck.objects.create(user=self.user, nome="Novo")
+        self.client.login(username="tamer", password="senha-123")
+
+        resp = self.client.post(
+            reverse("decks:deck_import", kwargs={"pk": deck.pk}), {"decklist": "4 Agumon BT1-010"}, follow=True
+        )
+
+        texts = [str(m) for m in resp.context["messages"]]
+        self.assertIn("Você já tem um deck com esta mesma lista: Antigo.", texts)
+
+
+class DeckCodeTests(TestCase):
+    """
+    /code/<código>/: lista fixa, mas preço/legalidade atuais (ETag, cache curto).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        DigimonCard.objects.create(cardnumber="BT1-010", name="Agumon", card_type="Digimon")
+        CardPrice.objects.create(cardnumber="BT1-010", price=Decimal("1.50"))
+
+    def test_decode_rejects_zero_quantity(self):
+        from .decklist_io import DECK_CODE_VERSION, _write_str, _write_varint
+
+        out = bytearray()
+        for value in (DECK_CODE_VERSION, 1):
+            _write_varint(out, value)
+        _write_str(out, "BT1")
+        for value in (1, 10, 0, 0):     # 1 carta: BT1-010 x0; nenhum extra
+            _write_varint(out, value)
+        code = base64.urlsafe_b64encode(bytes(out)).decode().rstrip("=")
+
+        with self.assertRaises(ValueError):
+            decode_deck_code(code)
+
+    def test_page_revalidates_when_prices_change(self):
+        from .pricing import bump_prices_version
+
+        code = encode_deck_code([DecklistLine(qty=4, name="Agumon", cardnumber="BT1-010")])
+        url = reverse("decks:deck_code", kwargs={"code": code})
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotIn("immutable", resp["Cache-Control"])
+        self.assertIn("max-age=300", resp["Cache-Control"])
+
+        etag = resp["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        bump_prices_version()
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertNotEqual(resp["ETag"], etag)
+
+
+class CooccurrenceInvalidationTests(TestCase):
+    """
+    Mudança num deck público só invalida os parceiros das cartas do delta.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tamer")
+
+    def _public_deck(self, cards):
+        from .services import refresh_decks
+
+        deck = Deck.objects.create(user=self.user, nome="Público", publico=True)
+        DeckCard.objects.bulk_create(
+            [DeckCard(deck=deck, codigo_carta=cn, quantidade=4) for cn in cards]
+        )
+        refresh_decks([deck.pk])
+        return deck
+
+    def test_only_cards_in_delta_get_a_new_version(self):
+        from .cooccurrence import _card_versions, recommend_cards
+
+        self._public_deck(["BT1-001", "BT1-002", "BT1-003"])
+        deck = self._public_deck(["BT1-001", "BT1-002"])
+        self.assertEqual(recommend_cards(deck), [("BT1-003", 2)])
+        before = _card_versions(["BT1-001", "BT1-002", "BT1-003", "BT9-001"])
+
+        self._public_deck(["BT1-003", "BT9-001"])
+        after = _card_versions(["BT1-001", "BT1-002", "BT1-003", "BT9-001"])
+
+        self.assertEqual(after["BT1-001"], before["BT1-001"])
+        self.assertEqual(after["BT1-002"], before["BT1-002"])
+        self.assertNotEqual(after["BT1-003"], before["BT1-003"])
+        self.assertNotEqual(after["BT9-001"], before["BT9-001"])
+
+    def test_recommendation_follows_partner_changes(self):
+        from .cooccurrence import recommend_cards
+
+        deck = self._public_deck(["BT1-001", "BT1-002"])
+        self.assertEqual(recommend_cards(deck), [])
+
+        self._public_deck(["BT1-001", "BT1-005"])
+        self.assertEqual(recommend_cards(deck), [("BT1-005", 1)])
+
+
+class ProbabilityTests(TestCase):
+    """
+    Contas exatas (hipergeométrica) contra valores conhecidos e contra o
+    Monte Carlo; cache pelo conteúdo do deck.
+    """
+
+    @staticmethod
+    def _shape(level3=4, options=0):
+        from .probability import DeckShape, MainCard
+
+        main = [MainCard("BT1-030", "Greymon", "Digimon", 3, level3)] if level3 else []
+        if options:
+            main.append(MainCard("BT1-100", "Option", "Option", None, options))
+        main.append(MainCard("BT1-001", "Filler", "Digimon", 5, 50 - level3 - options))
+        return DeckShape(main=tuple(main), egg_total=5)
+
+    def test_hypergeometric_known_values(self):
+        from .probability import hypergeom_at_least, hypergeom_pmf
+
+        # 4 cópias em 50, mão de 5: P(0) = C(46,5)/C(50,5); P(>=2) = 1 - [C(46,5) + 4·C(46,4)]/C(50,5)
+        self.assertAlmostEqual(hypergeom_pmf(4, 50, 5, 0), 1370754 / 2118760, places=12)
+        self.assertAlmostEqual(hypergeom_at_least(4, 50, 5), 0.3530395, places=6)
+        self.assertAlmostEqual(hypergeom_at_least(4, 50, 5, 2), 0.0449631, places=6)
+        self.assertAlmostEqual(sum(hypergeom_pmf(12, 50, 5, k) for k in range(6)), 1.0, places=12)
+        self.assertEqual(hypergeom_pmf(4, 50, 5, 5), 0.0)
+        self.assertEqual(hypergeom_at_least(4, 50, 5, 0), 1.0)
+
+    def test_simulator_matches_exact_values(self):
+        from math import comb
+
+        from .probability import by_level, by_type, hypergeom_at_least, simulate_setup
+
+        shape = self._shape(level3=8, options=6)
+        level3, option = by_level(3), by_type("Option")
+
+        only_hand = simulate_setup(shape, level3, 1, option, 0, shuffles=50_000, seed=1)
+        self.assertAlmostEqual(only_hand, hypergeom_at_least(8, 50, 5), delta=0.01)
+
+        # mão com >= 1 nível 3 E segurança com >= 1 option (hipergeométrica multivariada)
+        exact = 0.0
+        for hand_l3 in range(1, 6):
+            for hand_opt in range(0, 6 - hand_l3):
+                hand_other = 5 - hand_l3 - hand_opt
+                p_hand = comb(8, hand_l3) * comb(6, hand_opt) * comb(36, hand_other) / comb(50, 5)
+                left_opt, left_total = 6 - hand_opt, 45
+                p_sec = 1 - comb(left_total - left_opt, 5) / comb(left_total, 5)
+                exact += p_hand * p_sec
+        joint = simulate_setup(shape, level3, 1, option, 1, shuffles=50_000, seed=2)
+        self.assertAlmostEqual(joint, exact, delta=0.01)
+
+    def test_analysis_follows_edits_and_is_cached(self):
+        from .probability import analyze_deck
+
+        user = User.objects.create_user("tamer")
+        greymon = DigimonCard.objects.create(cardnumber="BT1-030", name="Greymon", card_type="Digimon", level=3)
+        filler = DigimonCard.objects.create(cardnumber="BT1-001", name="Filler", card_type="Digimon", level=5)
+        deck = Deck.objects.create(user=user, nome="Red")
+        DeckCard.objects.create(deck=deck, card=filler, quantidade=46)
+        DeckCard.objects.create(deck=deck, card=greymon, quantidade=4)
+        deck.refresh_from_db()
+
+        self.assertAlmostEqual(analyze_deck(deck)["p_level3_hand"], 0.3530395, places=6)
+        with mock.patch("decks.probability.load_shape") as load_shape:
+            analyze_deck(deck)
+        load_shape.assert_not_called()
+
+        # edição sem o worker passar: o painel já reflete o conteúdo novo
+        DeckCard.objects.get(deck=deck, card=greymon).delete()
+        deck.refresh_from_db()
+        self.assertEqual(analyze_deck(deck)["p_level3_hand"], 0.0)
+
+    def test_deck_without_fingerprint_is_cached_by_update_time(self):
+        from .probability import analyze_deck, load_shape
+
+        deck = Deck.objects.create(user=User.objects.create_user("tamer"), nome="Sem fingerprint")
+        with mock.patch("decks.probability.load_shape", wraps=load_shape) as loader:
+            analyze_deck(deck)
+            analyze_deck(deck)
+        self.assertEqual(loader.call_count, 1)
+
+
+class CollectionTests(TestCase):
+    """
+    Import da coleção (definir / somar / substituir) e cartas que faltam.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tamer")
+        cls.agumon = DigimonCard.objects.create(cardnumber="BT1-010", name="Agumon", card_type="Digimon")
+        cls.gabumon = DigimonCard.objects.create(cardnumber="BT1-029", name="Gabumon", card_type="Digimon")
+
+    def _owned(self):
+        return dict(Collection.objects.filter(user=self.user).values_list("cardnumber", "quantidade"))
+
+    def test_import_modes(self):
+        import_collection(self.user, "cardnumber,quantidade\nBT1-010,2\nBT1-029,1\n")
+        self.assertEqual(self._owned(), {"BT1-010": 2, "BT1-029": 1})
+
+        # padrão: define a quantidade das cartas da lista, o resto fica
+        import_collection(self.user, "cardnumber,quantidade\nBT1-010,3\n")
+        self.assertEqual(self._owned(), {"BT1-010": 3, "BT1-029": 1})
+
+        # somar
+        result = import_collection(self.user, "cardnumber,quantidade\nBT1-010,1\nBT2-001,4\n", add=True)
+        self.assertEqual((result.cards, result.copies), (2, 5))
+        self.assertEqual(self._owned(), {"BT1-010": 4, "BT1-029": 1, "BT2-001": 4})
+
+        # substituir: só o que está na lista
+        result = import_collection(self.user, "cardnumber,quantidade\nBT1-029,2\n", replace=True)
+        self.assertEqual(result.removed, 2)
+        self.assertEqual(self._owned(), {"BT1-029": 2})
+
+    def test_missing_cards_for_deck(self):
+        deck = Deck.objects.create(user=self.user, nome="Red")
+        DeckCard.objects.create(deck=deck, card=self.agumon, quantidade=4)
+        DeckCard.objects.create(deck=deck, card=self.gabumon, quantidade=2)
+        rebuild_card_index([deck.pk])
+        CardPrice.objects.create(cardnumber="BT1-010", price=Decimal("1.50"))
+        import_collection(self.user, "cardnumber,quantidade\nBT1-010,1\nBT1-029,5\n")
+
+        missing = missing_cards(deck, self.user, [{"cardnumber": "BT1-010", "name": "Agumon", "unit": Decimal("1.50")}])
+        self.assertEqual([(r["cardnumber"], r["qty"]) for r in missing.rows], [("BT1-010", 3)])
+        self.assertEqual((missing.copies, missing.cost, missing.unpriced), (3, Decimal("4.50"), 0))
+
+        summary = missing_by_deck(self.user, [deck.pk])[deck.pk]
+        self.assertEqual((summary.copies, summary.cost, summary.unpriced), (3, Decimal("4.50"), 0))
+
+
+class BuyListTests(TestCase):
+    """
+    Lista de compras de vários decks: união pelo máximo de cópias, menos a
+    coleção, com preço do CardPrice.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tamer")
+        cls.cards = {
+            cn: DigimonCard.objects.create(cardnumber=cn, name=name, card_type="Digimon")
+            for cn, name in (("BT1-010", "Agumon"), ("BT1-029", "Gabumon"), ("BT1-084", "Omnimon"))
+        }
+        CardPrice.objects.create(cardnumber="BT1-010", price=Decimal("1.50"))
+        CardPrice.objects.create(cardnumber="BT1-084", price=Decimal("30.00"), in_stock=False)
+
+    def _deck(self, nome, counts):
+        with self.captureOnCommitCallbacks(execute=True):
+            deck = Deck.objects.create(user=self.user, nome=nome)
+            for cn, qty in counts.items():
+                DeckCard.objects.create(deck=deck, card=self.cards[cn], quantidade=qty)
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending([DECK_REFRESH])
+        return deck
+
+    def test_union_minus_collection_with_prices(self):
+        red = self._deck("Red", {"BT1-010": 4, "BT1-029": 1})
+        blue = self._deck("Blue", {"BT1-010": 2, "BT1-029": 3, "BT1-084": 1})
+        import_collection(self.user, "cardnumber,quantidade\nBT1-010,1\n")
+
+        result = build_buy_list(self.user, [red.pk, blue.pk])
+        lines = {line.cardnumber: line for line in result.lines}
+        self.assertEqual({cn: (l.needed, l.owned, l.qty) for cn, l in lines.items()}, {
+            "BT1-010": (4, 1, 3), "BT1-029": (3, 0, 3), "BT1-084": (1, 0, 1),
+        })
+        self.assertEqual(lines["BT1-010"].subtotal, Decimal("4.50"))
+        self.assertFalse(lines["BT1-084"].in_stock)
+        self.assertEqual((result.total, result.copies, result.unpriced, result.out_of_stock), (Decimal("4.50"), 7, 1, 1))
+
+    def test_edit_waiting_for_worker_is_not_cached(self):
+        red = self._deck("Red", {"BT1-010": 4})
+        self.assertEqual(build_buy_list(self.user, [red.pk]).copies, 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DeckCard.objects.filter(deck=red).get().delete()
+            DeckCard.objects.create(deck=red, card=self.cards["BT1-029"], quantidade=2)
+        # fingerprint já mudou, índice ainda não: nada pode ir para o cache
+        self.assertTrue(any_refresh_pending([red.pk]))
+        build_buy_list(self.user, [red.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending([DECK_REFRESH])
+
+        self.assertEqual([line.cardnumber for line in build_buy_list(self.user, [red.pk]).lines], ["BT1-029"])
+
+
+class SimilarDecksTests(TestCase):
+    """
+    Decks parecidos: com muitos decks privados mais próximos, continua
+    procurando até achar os públicos.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tamer")
+        cls.agumon = DigimonCard.objects.create(cardnumber="BT1-010", name="Agumon", card_type="Digimon")
+        cls.gabumon = DigimonCard.objects.create(cardnumber="BT1-029", name="Gabumon", card_type="Digimon")
+
+    def _deck(self, publico, counts):
+        deck = Deck.objects.create(user=self.user, nome="Deck", publico=publico)
+        for card, qty in counts:
+            DeckCard.objects.create(deck=deck, card=card, quantidade=qty)
+        return deck
+
+    def test_public_results_behind_many_private_decks(self):
+        from .similarity import publish_matrix, similar_decks
+
+        with self.captureOnCommitCallbacks(execute=True):
+            query = self._deck(False, [(self.agumon, 4)])
+            for _ in range(12):
+                self._deck(False, [(self.agumon, 4)])
+            public = self._deck(True, [(self.agumon, 4), (self.gabumon, 4)])
+        with self.captureOnCommitCallbacks(execute=True):
+            run_pending([DECK_REFRESH])
+        publish_matrix()
+
+        result = similar_decks(query.pk, k=1)
+        self.assertEqual([deck.pk for deck, _ in result], [public.pk])
+        self.assertEqual(len(similar_decks(query.pk, k=3, public_only=False)), 3)
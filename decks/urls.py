@@ -6,15 +6,37 @@ app_name = "decks"
 
 urlpatterns = [
     path("", views.deck_list, name="list"),
+    path("", views.deck_list, name="deck_list"),
+    path("publicos/", views.deck_public_list, name="deck_public_list"),
+    path("exportar/todos.zip", views.deck_export_all, name="deck_export_all"),
+    path("colecao/", views.collection_view, name="collection"),
+    path("lista-de-compras/", views.buy_list_view, name="buy_list"),
+    path("code/<str:code>/", views.deck_code_view, name="deck_code"),
     path("novo/", views.deck_create, name="create"),
     path("create/", views.deck_create, name="deck_create"),
     path("<int:pk>/", views.deck_detail, name="detail"),
+    path("<int:pk>/", views.deck_detail, name="deck_detail"),
+    path("<int:pk>/add/", views.deck_add_card, name="deck_add_card"),
+    path("<int:pk>/qty/<int:deckcard_id>/", views.deck_set_card_qty, name="deck_set_card_qty"),
+    path("<int:pk>/remove/<int:deckcard_id>/", views.deck_remove_card, name="deck_remove_card"),
+
+    # ✅ Edição parcial via JSON (deck builder sem recarregar a página)
+    path("<int:pk>/api/cards/add/", views.deck_card_add_api, name="deck_card_add_api"),
+    path("<int:pk>/api/cards/<int:deckcard_id>/qty/", views.deck_card_set_qty_api, name="deck_card_set_qty_api"),
+    path("<int:pk>/api/cards/<int:deckcard_id>/remove/", views.deck_card_remove_api, name="deck_card_remove_api"),
+    path("<int:pk>/api/probability/", views.deck_probability_api, name="deck_probability_api"),
+    # ✅ Histórico de versões e comparação
+    path("<int:pk>/historico/", views.deck_history, name="deck_history"),
+    path("<int:pk>/historico/diff/", views.deck_version_diff, name="deck_version_diff"),
+    path("comparar/", views.deck_compare, name="deck_compare"),
+
     path("<int:pk>/delete/", views.deck_delete, name="deck_delete"),
     path("<int:pk>/import/", views.deck_import, name="deck_import"),
 
     # ✅ Exportar deck em TEXTO (formato oficial // Digimon DeckList)
     # Ex: 1 Elizamon                           BT24-008
     path("<int:pk>/export/", views.deck_export_text, name="deck_export"),
+    path("<int:pk>/export/publico/", views.deck_export_public_text, name="deck_export_public"),
 
     # ✅ Exportar deck em IMAGEM (background + cartas)
     path("<int:pk>/export/image/", views.deck_export_image, name="deck_export_image"),
@@ -1,27 +1,53 @@
+import hashlib
 import io
-from decimal import Decimal
 
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
 from django.db.models import Q
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import require_POST
 
-from cards.models import DigimonCard, CardPrice
+from cards.models import DigimonCard
 
-from cards.models import DigimonCard, CardPrice
-
-from .models import Deck, DeckCard, Archetype
+from .models import Collection, Deck, DeckCard, DeckVersion, Archetype
 from .rules import (
     MAIN_LIMIT,
     EGG_LIMIT,
     get_card_limits,
     get_ban_limit,
     compute_current_counts,
+    get_ruleset,
     is_egg_card,
+    rules_version,
+)
+from .collection import import_collection, missing_by_deck, missing_cards
+from .cooccurrence import recommend_cards
+from .buylist import build_buy_list
+from .browse import UPDATED_WITHIN_CHOICES, PublicDeckFilters, public_deck_page
+from .decklist_io import (
+    DECKLIST_FORMATS,
+    DecklistLine,
+    build_decklist_text,
+    decode_deck_code,
+    encode_deck_code,
+    normalize_cardnumber,
+    parse_decklist,
 )
 from .export_image import export_deck_image
+from .fingerprint import decks_with_fingerprint, fingerprint_for_lines
+from .jobs import refresh_pending
+from .history import current_contents, diff_contents, version_contents
+from .probability import analyze_deck, by_cardnumber, by_level, by_type, query_probability
+from .pricing import build_price_summary, deckcard_cardnumber, load_prices, prices_version, stored_price_summary
+from .services import add_card_to_deck, export_deck_to_text, remove_deckcard, set_deckcard_quantity
+from .similarity import similar_decks, suggest_archetype
+from .zip_export import iter_user_decks_zip
 
 
 # ----------------------------
@@ -146,10 +172,56 @@ def _apply_card_filters(base_qs, params):
 # ----------------------------
 @login_required
 def deck_list(request):
-    decks = Deck.objects.filter(user=request.user).order_by("-criado_em")
+    decks = list(Deck.objects.filter(user=request.user).order_by("-criado_em"))
+
+    # quanto falta da coleção para cada deck (uma passada vetorizada para todos)
+    if decks and Collection.objects.filter(user=request.user).exists():
+        missing = missing_by_deck(request.user, [d.id for d in decks])
+        for d in decks:
+            d.faltando = missing[d.id]
+
     return render(request, "decks/deck_list.html", {"decks": decks})
 
 
+def deck_public_list(request):
+    """
+    Explorador de decks públicos. Filtros: ?arquetipo=<slug>, ?carta=BT14-084
+    (pode repetir; via índice invertido), ?cor=Red, ?legal=1, ?dias=30.
+    Paginação por cursor (?cursor=...) em vez de OFFSET.
+    """
+    filters = PublicDeckFilters.from_querydict(request.GET)
+    cursor = (request.GET.get("cursor") or "").strip()
+    decks, next_cursor = public_deck_page(filters, cursor)
+
+    next_query = ""
+    if next_cursor:
+        params = request.GET.copy()
+        params["cursor"] = next_cursor
+        next_query = params.urlencode()
+
+    color_choices = (
+        Deck.objects.filter(publico=True).exclude(cor_principal="")
+        .order_by("cor_principal").values_list("cor_principal", flat=True).distinct()
+    )
+
+    return render(
+        request,
+        "decks/deck_public_list.html",
+        {
+            "decks": decks,
+            "filters": filters,
+            "carta": ", ".join(filters.cartas),
+            "cor": filters.cor,
+            "only_legal": filters.only_legal,
+            "color_choices": color_choices,
+            "archetype_choices": Archetype.objects.order_by("name"),
+            "dias_choices": UPDATED_WITHIN_CHOICES,
+            "is_first_page": not cursor,
+            "next_query": next_query,
+        },
+    )
+
+
 @login_required
 def deck_create(request):
     # queryset de arquétipos para popular o select
@@ -219,6 +291,8 @@ def deck_detail(request, pk):
         .order_by("section", "id")
     )
 
+    main_total, egg_total, _, _ = compute_current_counts(deck_cards)
+
     # ----- Busca / filtros -----
     base_qs = DigimonCard.objects.all()
 
@@ -232,66 +306,40 @@ def deck_detail(request, pk):
     filtered = _apply_card_filters(base_qs, request.GET)
     search_results = filtered.order_by("name", "cardnumber")[:60]
 
-    # ----- Preços -----
-    price_rows = []
-    total = Decimal("0.00")
-    missing_prices = 0
-
-    cardnumbers = []
-    for dc in deck_cards:
-        cn = (dc.codigo_carta or "").strip()
-        if not cn and dc.card_id:
-            cn = (dc.card.cardnumber or "").strip()
-        if cn:
-            cardnumbers.append(cn)
-
-    prices = {
-        p.cardnumber: p
-        for p in CardPrice.objects.filter(cardnumber__in=cardnumbers)
-    }
-
-    for dc in deck_cards:
-        qty = dc.quantidade or 1
-        cn = (dc.codigo_carta or "").strip()
-        name = (dc.nome_carta or "").strip()
-
-        if dc.card_id:
-            cn = cn or (dc.card.cardnumber or "")
-            name = name or (dc.card.name or "")
-
-        price_obj = prices.get(cn)
-        if price_obj:
-            unit = price_obj.price or Decimal("0.00")
-            subtotal = unit * Decimal(qty)
-            total += subtotal
-            price_rows.append(
-                {
-                    "qty": qty,
-                    "cardnumber": cn,
-                    "name": name,
-                    "unit": unit,
-                    "subtotal": subtotal,
-                    "url": price_obj.product_url,
-                    "in_stock": price_obj.in_stock,
-                }
-            )
-        else:
-            missing_prices += 1
-            price_rows.append(
-                {
-                    "qty": qty,
-                    "cardnumber": cn,
-                    "name": name,
-                    "unit": None,
-                    "subtotal": None,
-                    "url": "",
-                    "in_stock": True,
-                }
-            )
+    # ----- Preços (resumo gravado pelo refresh do deck, sem recalcular aqui) -----
+    summary = stored_price_summary(deck)
+
+    # ----- O que falta na coleção -----
+    missing = None
+    if Collection.objects.filter(user=request.user).exists():
+        missing = missing_cards(deck, request.user, summary.rows)
+
+    # ----- Similaridade (matriz de decks em memória) -----
+    similar = similar_decks(deck.id, k=5)
+    suggested_archetype, suggested_score = (None, 0.0)
+    if not deck.arquetipo_id:
+        suggested_archetype, suggested_score = suggest_archetype(deck.id)
+
+    # ----- "Jogada junto com" (coocorrência em decks públicos/de torneio) -----
+    recommendations = []
+    recommended = recommend_cards(deck, k=10)
+    if recommended:
+        names = dict(
+            DigimonCard.objects.filter(cardnumber__in=[cn for cn, _ in recommended]).values_list("cardnumber", "name")
+        )
+        recommendations = [(cn, names.get(cn, ""), n) for cn, n in recommended]
 
     context = {
         "deck": deck,
         "deck_cards": deck_cards,
+        "probabilities": analyze_deck(deck),
+        "deck_code": encode_deck_code(
+            DecklistLine(qty=dc.quantidade, name="", cardnumber=deckcard_cardnumber(dc)) for dc in deck_cards
+        ),
+        "recommendations": recommendations,
+        "similar_decks": similar,
+        "suggested_archetype": suggested_archetype,
+        "suggested_score": suggested_score,
         "search_results": search_results,
         "filters": request.GET,
         "card_type_choices": card_type_choices,
@@ -300,85 +348,77 @@ def deck_detail(request, pk):
         "rarity_choices": rarity_choices,
         "attribute_choices": attribute_choices,
         "digitype_choices": digitype_choices,
-        "price_rows": price_rows,
-        "deck_total": total,
-        "missing_prices": missing_prices,
+        "price_rows": summary.rows,
+        "deck_total": summary.total,
+        "missing_prices": summary.missing,
+        "out_of_stock": summary.out_of_stock,
+        "prices_pending": refresh_pending(deck.id),
+        "missing": missing,
+        "main_total": main_total,
+        "egg_total": egg_total,
+        "main_limit": MAIN_LIMIT,
+        "egg_limit": EGG_LIMIT,
     }
     return render(request, "decks/deck_detail.html", context)
 
 
+def _parse_qty(raw, default: int = 1, minimum: int = 1) -> int:
+    try:
+        qty = int((raw or "").strip() or default)
+    except ValueError:
+        qty = default
+    return max(minimum, min(qty, 20))
+
+
+def _required_qty(raw):
+    """
+    Quantidade obrigatória (definir quantidade): None se veio vazia ou inválida,
+    senão o valor limitado a 0..20 (0 remove a linha).
+    """
+    raw = (raw or "").strip()
+    if not raw.lstrip("-").isdigit():
+        return None
+    return _parse_qty(raw, default=0, minimum=0)
+
+
 @login_required
 def deck_add_card(request, pk):
     deck = get_object_or_404(Deck, pk=pk, user=request.user)
     if request.method != "POST":
         return redirect("decks:deck_detail", pk=deck.id)
 
-    qty_raw = (request.POST.get("qty") or "1").strip()
-    card_id = request.POST.get("card_id")
+    qty = _parse_qty(request.POST.get("qty"))
+    card = get_object_or_404(DigimonCard, pk=request.POST.get("card_id"))
 
-    try:
-        qty = int(qty_raw)
-    except ValueError:
-        qty = 1
-    qty = max(1, min(qty, 20))
-
-    card = get_object_or_404(DigimonCard, pk=card_id)
-    section = DeckCard.SECTION_EGG if is_egg_card(card) else DeckCard.SECTION_MAIN
-
-    with transaction.atomic():
-        deck_cards = DeckCard.objects.filter(deck=deck).select_related("card")
-        main_total, egg_total, cm, ce = compute_current_counts(deck_cards)
+    result = add_card_to_deck(deck, card, qty)
+    if not result.ok:
+        messages.error(request, result.error)
+        return redirect("decks:deck_detail", pk=deck.id)
 
-        cn = card.cardnumber
+    section = result.changed[0].section
+    messages.success(request, f"Adicionado: {qty}x {card.cardnumber} {card.name} ({section})")
+    return redirect("decks:deck_detail", pk=deck.id)
 
-        max_by_rule = get_card_limits(cn)
-        max_by_ban = get_ban_limit(cn)
-        max_allowed = min(max_by_rule, max_by_ban)
 
-        if max_allowed <= 0:
-            messages.error(request, f"{cn} está proibida pela banlist.")
-            return redirect("decks:deck_detail", pk=deck.id)
+@login_required
+def deck_set_card_qty(request, pk, deckcard_id):
+    deck = get_object_or_404(Deck, pk=pk, user=request.user)
+    if request.method != "POST":
+        return redirect("decks:deck_detail", pk=deck.id)
 
-        current_copies = ce.get(cn, 0) if section == DeckCard.SECTION_EGG else cm.get(cn, 0)
-        if current_copies + qty > max_allowed:
-            messages.error(
-                request,
-                f"Limite excedido: {cn} permite no máximo {max_allowed} cópia(s)."
-            )
-            return redirect("decks:deck_detail", pk=deck.id)
-
-        if section == DeckCard.SECTION_EGG and egg_total + qty > EGG_LIMIT:
-            messages.error(request, f"Digi-Egg deck só pode ter {EGG_LIMIT} cartas no total.")
-            return redirect("decks:deck_detail", pk=deck.id)
-
-        if section == DeckCard.SECTION_MAIN and main_total + qty > MAIN_LIMIT:
-            messages.error(request, f"Main deck só pode ter {MAIN_LIMIT} cartas no total.")
-            return redirect("decks:deck_detail", pk=deck.id)
-
-        existing = DeckCard.objects.filter(
-            deck=deck,
-            section=section,
-            card_id=card.id
-        ).first()
-
-        if existing:
-            existing.quantidade = (existing.quantidade or 0) + qty
-            if not existing.codigo_carta:
-                existing.codigo_carta = cn
-            if not existing.nome_carta:
-                existing.nome_carta = card.name
-            existing.save()
-        else:
-            DeckCard.objects.create(
-                deck=deck,
-                section=section,
-                quantidade=qty,
-                codigo_carta=cn,
-                nome_carta=card.name,
-                card=card,
-            )
+    dc = get_object_or_404(DeckCard.objects.select_related("card"), pk=deckcard_id, deck=deck)
+    qty = _required_qty(request.POST.get("qty"))
+    if qty is None:
+        messages.error(request, "Informe a quantidade.")
+        return redirect("decks:deck_detail", pk=deck.id)
 
-    messages.success(request, f"Adicionado: {qty}x {card.cardnumber} {card.name} ({section})")
+    result = set_deckcard_quantity(deck, dc, qty)
+    if not result.ok:
+        messages.error(request, result.error)
+    elif result.removed_ids:
+        messages.info(request, "Carta removida do deck.")
+    else:
+        messages.success(request, f"Quantidade atualizada: {qty}x {deckcard_cardnumber(dc)}")
     return redirect("decks:deck_detail", pk=deck.id)
 
 
@@ -386,11 +426,143 @@ def deck_add_card(request, pk):
 def deck_remove_card(request, pk, deckcard_id):
     deck = get_object_or_404(Deck, pk=pk, user=request.user)
     dc = get_object_or_404(DeckCard, pk=deckcard_id, deck=deck)
-    dc.delete()
+    remove_deckcard(deck, dc)
     messages.info(request, "Carta removida do deck.")
     return redirect("decks:deck_detail", pk=deck.id)
 
 
+# ----------------------------
+# Edição parcial (JSON)
+# O deck builder atualiza só as linhas alteradas, sem re-renderizar a página.
+# ----------------------------
+def _deckcard_payload(dc: DeckCard) -> dict:
+    """
+    Linha do deck em JSON, com o necessário para o JS montar uma linha nova
+    (imagem, tipo e os links dos forms) sem recarregar a página.
+    """
+    name = (dc.nome_carta or "").strip()
+    card = dc.card if dc.card_id else None
+    if card is not None:
+        name = name or (card.name or "")
+    urls = {"pk": dc.deck_id, "deckcard_id": dc.id}
+    return {
+        "id": dc.id,
+        "section": dc.section,
+        "cardnumber": deckcard_cardnumber(dc),
+        "name": name,
+        "qty": int(dc.quantidade or 0),
+        "image": card.cdn_image if card else "",
+        "details": (
+            " • ".join(
+                part for part in (card.card_type, card.color, f"Lv {card.level}" if card.level else "") if part
+            )
+            if card else ""
+        ),
+        "urls": {
+            "set_qty": reverse("decks:deck_set_card_qty", kwargs=urls),
+            "set_qty_api": reverse("decks:deck_card_set_qty_api", kwargs=urls),
+            "remove": reverse("decks:deck_remove_card", kwargs=urls),
+            "remove_api": reverse("decks:deck_card_remove_api", kwargs=urls),
+        },
+    }
+
+
+def _edit_response(result) -> JsonResponse:
+    payload = {
+        "ok": result.ok,
+        "errors": [result.error] if result.error else [],
+        "rows": [_deckcard_payload(dc) for dc in result.changed],
+        "removed": result.removed_ids,
+        "totals": {
+            "main": result.main_total,
+            "egg": result.egg_total,
+            "main_limit": MAIN_LIMIT,
+            "egg_limit": EGG_LIMIT,
+        },
+        "price_delta": str(result.price_delta),
+    }
+    return JsonResponse(payload, status=200 if result.ok else 400)
+
+
+def _probability_filter(request, prefix):
+    """
+    Lê o filtro de uma pergunta (?hand_level=3, ?hand_card=BT1-010, ?security_type=Option...).
+    Retorna (filtro, descrição para a chave de cache).
+    """
+    level = request.GET.get(f"{prefix}_level")
+    if level and level.isdigit():
+        return by_level(int(level)), f"level={level}"
+    card = normalize_cardnumber(request.GET.get(f"{prefix}_card") or "")
+    if card:
+        return by_cardnumber(card), f"card={card}"
+    card_type = (request.GET.get(f"{prefix}_type") or "").strip()
+    if card_type:
+        return by_type(card_type), f"type={card_type.lower()}"
+    return None, "-"
+
+
+@login_required
+def deck_probability_api(request, pk):
+    """
+    Pergunta livre sobre a abertura: ?hand_level=3&hand_min=1&security_type=Option&security_min=2
+    """
+    deck = get_object_or_404(Deck, pk=pk, user=request.user)
+    hand_pred, hand_key = _probability_filter(request, "hand")
+    security_pred, security_key = _probability_filter(request, "security")
+    hand_min = _parse_qty(request.GET.get("hand_min")) if hand_pred else 0
+    security_min = _parse_qty(request.GET.get("security_min")) if security_pred else 0
+
+    probability, exact = query_probability(
+        deck,
+        hand_pred,
+        hand_min,
+        security_pred,
+        security_min,
+        cache_parts=(hand_key, hand_min, security_key, security_min),
+    )
+    return JsonResponse({"ok": True, "probability": probability, "exact": exact})
+
+
+@login_required
+@require_POST
+def deck_card_add_api(request, pk):
+    deck = get_object_or_404(Deck, pk=pk, user=request.user)
+    card = DigimonCard.objects.filter(pk=request.POST.get("card_id") or None).first()
+    if card is None:
+        return JsonResponse({"ok": False, "errors": ["Carta não encontrada."]}, status=404)
+
+    result = add_card_to_deck(deck, card, _parse_qty(request.POST.get("qty")))
+    return _edit_response(result)
+
+
+@login_required
+@require_POST
+def deck_card_set_qty_api(request, pk, deckcard_id):
+    deck = get_object_or_404(Deck, pk=pk, user=request.user)
+    dc = DeckCard.objects.filter(pk=deckcard_id, deck=deck).select_related("card").first()
+    if dc is None:
+        return JsonResponse({"ok": False, "errors": ["Linha do deck não encontrada."]}, status=404)
+
+    qty = _required_qty(request.POST.get("qty"))
+    if qty is None:
+        return JsonResponse({"ok": False, "errors": ["Informe a quantidade."]}, status=400)
+
+    result = set_deckcard_quantity(deck, dc, qty)
+    return _edit_response(result)
+
+
+@login_required
+@require_POST
+def deck_card_remove_api(request, pk, deckcard_id):
+    deck = get_object_or_404(Deck, pk=pk, user=request.user)
+    dc = DeckCard.objects.filter(pk=deckcard_id, deck=deck).select_related("card").first()
+    if dc is None:
+        return JsonResponse({"ok": False, "errors": ["Linha do deck não encontrada."]}, status=404)
+
+    result = remove_deckcard(deck, dc)
+    return _edit_response(result)
+
+
 # ----------------------------
 # Import (Formato oficial)
 # // Digimon DeckList
@@ -399,60 +571,66 @@ def deck_remove_card(request, pk, deckcard_id):
 # 4 Dimetromon                         BT24-012
 # ...
 # ----------------------------
+def _notify_duplicate_decks(request, deck, fingerprint: str) -> None:
+    """
+    Avisa se o conteúdo importado é idêntico a outro deck do usuário ou a um
+    deck público (lookup indexado pelo fingerprint).
+    """
+    same = decks_with_fingerprint(fingerprint).exclude(pk=deck.pk)
+    own = same.filter(user=request.user).order_by("-atualizado_em").only("id", "nome").first()
+    if own:
+        messages.info(request, f"Você já tem um deck com esta mesma lista: {own.nome}.")
+    public = same.filter(publico=True).exclude(user=request.user).count()
+    if public:
+        messages.info(request, f"{public} deck(s) público(s) têm exatamente esta lista.")
+
+
 @login_required
 def deck_import(request, pk):
     deck = get_object_or_404(Deck, pk=pk, user=request.user)
 
     if request.method == "POST":
         text = (request.POST.get("decklist") or "").strip()
+        upload = request.FILES.get("arquivo")
         replace = request.POST.get("replace") == "on"
 
-        if not text:
+        if not text and not upload:
             messages.error(
                 request,
-                "Cole a lista no formato: '4 Nome da Carta BT24-012' (qtd, nome, cardnumber).",
+                "Cole a lista no formato: '4 Nome da Carta BT24-012' (qtd, nome, cardnumber) ou envie um arquivo.",
             )
             return redirect("decks:deck_import", pk=deck.id)
 
-        lines = [l.rstrip() for l in text.splitlines()]
-        parsed = []
-
-        for line in lines:
-            line = (line or "").strip()
-            if not line:
-                continue
-            if line.startswith("//"):
-                # comentário / header (ex: // Digimon DeckList)
-                continue
-
-            parts = line.split()
-            if len(parts) < 3:
-                continue
-
-            try:
-                qty = int(parts[0])
-            except ValueError:
-                continue
-
-            cardnumber = parts[-1].strip()
-            name = " ".join(parts[1:-1]).strip()
-
-            if qty > 0 and cardnumber:
-                parsed.append((qty, cardnumber, name))
+        # arquivo é lido em streaming (JSON/TTS/CSV grandes não vão inteiros para a memória)
+        source = io.TextIOWrapper(upload.file, encoding="utf-8-sig", errors="replace") if upload else text
+        try:
+            lines, fmt = parse_decklist(source)
+        except ValueError as exc:
+            messages.error(request, f"Não consegui ler a lista: {exc}.")
+            return redirect("decks:deck_import", pk=deck.id)
 
+        parsed = [(dl.qty, dl.cardnumber, dl.name) for dl in lines]
         if not parsed:
             messages.error(request, "Não consegui ler nenhuma linha válida. Use: 4 Nome BT24-012")
             return redirect("decks:deck_import", pk=deck.id)
 
+        # cartas resolvidas numa query só
+        digicards = {
+            normalize_cardnumber(c.cardnumber): c
+            for c in DigimonCard.objects.filter(cardnumber__in={normalize_cardnumber(cn) for _, cn, _ in parsed})
+        }
+
         with transaction.atomic():
             if replace:
                 DeckCard.objects.filter(deck=deck).delete()
 
             deck_cards = DeckCard.objects.filter(deck=deck).select_related("card")
+            # deck vazio antes do import = conteúdo final é exatamente a lista
+            whole_list = replace or not deck_cards.exists()
             main_total, egg_total, cm, ce = compute_current_counts(deck_cards)
 
             for qty, cardnumber, name in parsed:
-                digicard = DigimonCard.objects.filter(cardnumber__iexact=cardnumber).first()
+                digicard = digicards.get(normalize_cardnumber(cardnumber))
                 section = (
                     DeckCard.SECTION_EGG
                     if (digicard and is_egg_card(digicard))
@@ -518,50 +696,143 @@ def deck_import(request, pk):
                     main_total += qty
                     cm[cardnumber] = cm.get(cardnumber, 0) + qty
 
-        messages.success(request, f"Importação concluída: {len(parsed)} linhas processadas.")
+        label = DECKLIST_FORMATS[fmt].label
+        messages.success(request, f"Importação concluída ({label}): {len(parsed)} linhas processadas.")
+        if whole_list:
+            _notify_duplicate_decks(request, deck, fingerprint_for_lines(lines))
+        if not deck.arquetipo_id:
+            archetype, score = suggest_archetype(deck.id)
+            if archetype:
+                messages.info(request, f"Arquétipo sugerido: {archetype} ({score:.0%} de similaridade).")
         return redirect("decks:deck_detail", pk=deck.id)
 
-    return render(request, "decks/deck_import.html", {"deck": deck})
+    return render(
+        request,
+        "decks/deck_import.html",
+        {"deck": deck, "formats": [f.label for f in DECKLIST_FORMATS.values()]},
+    )
 
 
 # ----------------------------
 # Export TXT (Formato oficial)
 # ----------------------------
+EXPORT_ONLY_FIELDS = ("id", "user_id", "nome", "publico", "fingerprint", "atualizado_em")
+
+
+def _deck_text_response(request, deck: Deck) -> HttpResponse:
+    """
+    Texto oficial do deck com ETag/Last-Modified; devolve 304 se o cliente já
+    tem a versão atual. fingerprint e atualizado_em mudam juntos, na mesma
+    transação da edição (decks.signals), então o ETag nunca aponta para o
+    texto antigo em cache.
+    """
+    last_modified = int(deck.atualizado_em.timestamp())
+    etag = f'"{deck.fingerprint or deck.pk}-{last_modified}"'
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = HttpResponse(export_deck_to_text(deck), content_type="text/plain; charset=utf-8")
+        filename = f"{deck.nome}".replace(" ", "_").lower() + "_decklist.txt"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
 @login_required
+@cache_control(private=True, no_cache=True)
 def deck_export_text(request, pk):
-    deck = get_object_or_404(Deck, pk=pk, user=request.user)
-    deck_cards = (
-        DeckCard.objects.filter(deck=deck)
-        .select_related("card")
-        .order_by("section", "nome_carta", "codigo_carta")
-    )
+    deck = get_object_or_404(Deck.objects.only(*EXPORT_ONLY_FIELDS), pk=pk, user=request.user)
+    return _deck_text_response(request, deck)
 
-    rows = []
-    for dc in deck_cards:
-        qty = int(dc.quantidade or 0)
-        cn = (dc.codigo_carta or "").strip()
-        name = (dc.nome_carta or "").strip()
-
-        if dc.card_id:
-            cn = cn or (dc.card.cardnumber or "")
-            name = name or (dc.card.name or "")
 
-        if qty > 0 and cn:
-            rows.append((qty, name, cn))
+@cache_control(public=True, max_age=60 * 5)
+def deck_export_public_text(request, pk):
+    """
+    Mesma exportação, só leitura e sem login, para decks públicos
+    (pode ficar em cache de proxy/CDN; revalida pelo ETag).
+    """
+    deck = get_object_or_404(Deck.objects.only(*EXPORT_ONLY_FIELDS), pk=pk, publico=True)
+    return _deck_text_response(request, deck)
 
-    if not rows:
-        content = "// Digimon DeckList\n\n"
-    else:
-        max_name = max(len(n or "") for _, n, _ in rows)
-        lines = [f"{qty} {name:<{max_name}}  {cn}" for qty, name, cn in rows]
-        content = "// Digimon DeckList\n\n" + "\n".join(lines) + "\n"
 
-    filename = f"{deck.nome}".replace(" ", "_").lower() + "_decklist.txt"
-    response = HttpResponse(content, content_type="text/plain; charset=utf-8")
+@login_required
+def deck_export_all(request):
+    """
+    Todos os decks do usuário num .zip (texto oficial + manifest.json), em streaming.
+    """
+    response = StreamingHttpResponse(iter_user_decks_zip(request.user), content_type="application/zip")
+    filename = f"decks_{request.user.username}.zip".replace(" ", "_").lower()
     response["Content-Disposition"] = f'attachment; filename="{filename}"'
     return response
 
 
+# ----------------------------
+# Coleção (cartas que o usuário tem)
+# ----------------------------
+@login_required
+def collection_view(request):
+    if request.method == "POST":
+        text = (request.POST.get("lista") or "").strip()
+        upload = request.FILES.get("arquivo")
+        if not text and not upload:
+            messages.error(request, "Cole a lista (ou um CSV cardnumber,quantidade) ou envie um arquivo.")
+            return redirect("decks:collection")
+
+        source = io.TextIOWrapper(upload.file, encoding="utf-8-sig", errors="replace") if upload else text
+        try:
+            result = import_collection(
+                request.user,
+                source,
+                add=request.POST.get("somar") == "on",
+                replace=request.POST.get("substituir") == "on",
+            )
+        except ValueError as exc:
+            messages.error(request, f"Não consegui ler a lista: {exc}.")
+            return redirect("decks:collection")
+
+        if not result.cards:
+            messages.error(request, "Não consegui ler nenhuma linha válida.")
+        else:
+            messages.success(
+                request,
+                f"Coleção atualizada ({result.format}): {result.cards} carta(s), {result.copies} cópia(s)"
+                + (f", {result.removed} removida(s)." if result.removed else "."),
+            )
+        return redirect("decks:collection")
+
+    items = list(Collection.objects.filter(user=request.user).order_by("cardnumber"))
+    names = dict(
+        DigimonCard.objects.filter(cardnumber__in=[c.cardnumber for c in items]).values_list("cardnumber", "name")
+    )
+    return render(
+        request,
+        "decks/collection.html",
+        {
+            "items": [(c, names.get(c.cardnumber, "")) for c in items],
+            "total_copies": sum(c.quantidade for c in items),
+            "formats": [f.label for f in DECKLIST_FORMATS.values()],
+        },
+    )
+
+
+@login_required
+def buy_list_view(request):
+    """
+    Lista de compras para vários decks: ?deck=1&deck=2 (união por máximo de
+    cópias, descontando a coleção).
+    """
+    selected = [int(v) for v in request.GET.getlist("deck") if v.isdigit()]
+    buy_list = build_buy_list(request.user, selected) if selected else None
+    decks = Deck.objects.filter(user=request.user).order_by("nome").only("id", "nome")
+    return render(
+        request,
+        "decks/buy_list.html",
+        {"decks": decks, "selected": set(selected), "buy_list": buy_list},
+    )
+
+
 # ----------------------------
 # Export IMAGEM (background + cartas)
 # ----------------------------
@@ -578,3 +849,144 @@ def deck_export_image(request, pk):
     response = HttpResponse(buffer.getvalue(), content_type="image/png")
     response["Content-Disposition"] = f'attachment; filename="deck_{deck.id}.png"'
     return response
+
+
+# ----------------------------
+# Histórico de versões / diff
+# ----------------------------
+def _version_number(raw, default: int) -> int:
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return default
+
+
+@login_required
+def deck_history(request, pk):
+    deck = get_object_or_404(Deck, pk=pk, user=request.user)
+    versions = (
+        DeckVersion.objects.filter(deck=deck)
+        .only("numero", "criado_em", "cartas_adicionadas", "cartas_removidas")
+        .order_by("-numero")[:200]
+    )
+    return render(request, "decks/deck_history.html", {"deck": deck, "versions": versions})
+
+
+@login_required
+def deck_version_diff(request, pk):
+    """
+    Diferença entre duas versões do deck: ?a=3&b=7 (padrão: última contra a anterior).
+    """
+    deck = get_object_or_404(Deck, pk=pk, user=request.user)
+    latest = DeckVersion.objects.filter(deck=deck).order_by("-numero").values_list("numero", flat=True).first()
+    if not latest:
+        messages.info(request, "Este deck ainda não tem histórico.")
+        return redirect("decks:deck_detail", pk=deck.id)
+
+    b = min(max(_version_number(request.GET.get("b"), latest), 1), latest)
+    a = min(max(_version_number(request.GET.get("a"), b - 1), 0), latest)
+
+    content_a = version_contents(deck.id, a) if a else {}
+    content_b = version_contents(deck.id, b)
+
+    return render(
+        request,
+        "decks/deck_diff.html",
+        {
+            "deck": deck,
+            "label_a": f"v{a}" if a else "vazio",
+            "label_b": f"v{b}",
+            "rows": diff_contents(content_a or {}, content_b or {}),
+            "versions": range(latest, 0, -1),
+            "a": a,
+            "b": b,
+        },
+    )
+
+
+@login_required
+def deck_compare(request):
+    """
+    Diferença entre dois decks (seus ou públicos): ?a=<id>&b=<id>.
+    """
+    visible = Deck.objects.filter(Q(user=request.user) | Q(publico=True))
+    deck_a = get_object_or_404(visible, pk=_version_number(request.GET.get("a"), 0))
+    deck_b = get_object_or_404(visible, pk=_version_number(request.GET.get("b"), 0))
+
+    contents = current_contents([deck_a.id, deck_b.id])
+    return render(
+        request,
+        "decks/deck_diff.html",
+        {
+            "deck": deck_a,
+            "other": deck_b,
+            "label_a": deck_a.nome,
+            "label_b": deck_b.nome,
+            "rows": diff_contents(contents.get(deck_a.id, {}), contents.get(deck_b.id, {})),
+        },
+    )
+
+
+# ----------------------------
+# Código compacto (somente leitura, sem escrever no banco)
+# ----------------------------
+@cache_control(public=True, max_age=60 * 5)
+def deck_code_view(request, code):
+    """
+    A lista do código nunca muda, mas a página mostra preço e legalidade
+    atuais: cache curto e revalidação pelo ETag (código + versão dos preços,
+    das regras e dos dados das cartas).
+    """
+    try:
+        lines = decode_deck_code(code)
+    except ValueError:
+        raise Http404("Código de deck inválido.")
+
+    cards = DigimonCard.objects.in_bulk([dl.cardnumber for dl in lines], field_name="cardnumber")
+    synced = max((int(card.last_synced_at.timestamp()) for card in cards.values()), default=0)
+    state = f"{code}:{prices_version()}:{rules_version()}:{synced}"
+    etag = f'"{hashlib.sha1(state.encode()).hexdigest()}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        response["ETag"] = etag
+        return response
+
+    deck_cards = []
+    for dl in lines:
+        card = cards.get(dl.cardnumber)
+        deck_cards.append(DeckCard(
+            card=card,
+            codigo_carta=dl.cardnumber,
+            nome_carta=card.name if card else "",
+            quantidade=dl.qty,
+            section=DeckCard.SECTION_EGG if card and is_egg_card(card) else DeckCard.SECTION_MAIN,
+        ))
+    deck_cards.sort(key=lambda dc: (dc.section != DeckCard.SECTION_EGG, dc.codigo_carta))
+
+    main_total, egg_total, _, _ = compute_current_counts(deck_cards)
+    counts = {}
+    for dc in deck_cards:
+        counts[dc.codigo_carta] = counts.get(dc.codigo_carta, 0) + dc.quantidade
+
+    summary = build_price_summary(deck_cards, load_prices(counts))
+    text = build_decklist_text(
+        DecklistLine(qty=dc.quantidade, name=dc.nome_carta, cardnumber=dc.codigo_carta) for dc in deck_cards
+    )
+
+    response = render(
+        request,
+        "decks/deck_code.html",
+        {
+            "code": code,
+            "deck_cards": deck_cards,
+            "main_total": main_total,
+            "egg_total": egg_total,
+            "main_limit": MAIN_LIMIT,
+            "egg_limit": EGG_LIMIT,
+            "violations": get_ruleset().violations(main_total, egg_total, counts),
+            "deck_total": summary.total,
+            "decklist_text": text,
+        },
+    )
+    response["ETag"] = etag
+    return response
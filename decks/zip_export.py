@@ -0,0 +1,114 @@
+# decks/zip_export.py
+from __future__ import annotations
+
+import json
+import tempfile
+import zipfile
+from typing import Iterator
+
+from django.db.models import Prefetch
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import Deck, DeckCard
+from .decklist_io import build_decklist_text
+from .services import deck_cards_to_lines
+
+EXPORT_CHUNK_SIZE = 100
+STREAM_FLUSH_BYTES = 64 * 1024
+MANIFEST_SPOOL_BYTES = 1024 * 1024
+
+
+class _ZipStream:
+    """
+    Destino "arquivo" não-seekable para o ZipFile: acumula os bytes escritos
+    até o gerador buscá-los com drain().
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+        self._drained = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    @property
+    def pending(self) -> int:
+        return self._offset - self._drained
+
+    def tell(self) -> int:
+        return self._offset
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        self._drained = self._offset
+        return data
+
+
+def deck_filename(deck: Deck) -> str:
+    return f"{slugify(deck.nome) or 'deck'}-{deck.id}.txt"
+
+
+def _manifest_entry(deck: Deck, filename: str) -> dict:
+    stats = deck.estatisticas or {}
+    return {
+        "id": deck.id,
+        "nome": deck.nome,
+        "arquivo": filename,
+        "arquetipo": str(deck.arquetipo) if deck.arquetipo_id else deck.arquetipo_nome,
+        "publico": deck.publico,
+        "legal": deck.legal,
+        "main": stats.get("main", 0),
+        "egg": stats.get("egg", 0),
+        "fingerprint": deck.fingerprint,
+        "atualizado_em": deck.atualizado_em.isoformat() if deck.atualizado_em else None,
+    }
+
+
+def iter_user_decks_zip(user) -> Iterator[bytes]:
+    """
+    Zip com todos os decks do usuário (texto oficial) + manifest.json, gerado
+    em pedaços: os decks vêm em lotes (iterator + prefetch das cartas) e cada
+    arquivo é enviado assim que entra no zip.
+    """
+    decks = (
+        Deck.objects.filter(user=user)
+        .select_related("arquetipo")
+        .prefetch_related(
+            Prefetch(
+                "cards",
+                queryset=DeckCard.objects.select_related("card").order_by("section", "codigo_carta", "nome_carta", "id"),
+            )
+        )
+        .order_by("id")
+    )
+
+    stream = _ZipStream()
+    # manifesto vai sendo serializado num arquivo temporário (memória fica fixa)
+    with tempfile.SpooledTemporaryFile(max_size=MANIFEST_SPOOL_BYTES, mode="w+", encoding="utf-8") as manifest:
+        manifest.write(json.dumps({"usuario": user.username, "gerado_em": timezone.now().isoformat()})[:-1])
+        manifest.write(', "decks": [')
+
+        with zipfile.ZipFile(stream, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for i, deck in enumerate(decks.iterator(chunk_size=EXPORT_CHUNK_SIZE)):
+                filename = deck_filename(deck)
+                zf.writestr(filename, build_decklist_text(deck_cards_to_lines(deck.cards.all())))
+                manifest.write(("," if i else "") + "\n  " + json.dumps(_manifest_entry(deck, filename), ensure_ascii=False))
+                if stream.pending >= STREAM_FLUSH_BYTES:
+                    yield stream.drain()
+
+            manifest.write("\n]}\n")
+            manifest.seek(0)
+            with zf.open("manifest.json", mode="w") as out:
+                for block in iter(lambda: manifest.read(STREAM_FLUSH_BYTES), ""):
+                    out.write(block.encode("utf-8"))
+                    if stream.pending >= STREAM_FLUSH_BYTES:
+                        yield stream.drain()
+    yield stream.drain()
@@ -1,5 +1,8 @@
 from django.contrib import admin
-from .models import Tournament, TournamentPlayer, Season
+from .models import (
+    ArchetypeRanking, Match, Player, PlayerAlias, PlayerRanking, Round, Season, Tournament, TournamentPlayer,
+)
+from .services import refresh_standings
 
 @admin.register(Season)
 class SeasonAdmin(admin.ModelAdmin):
@@ -10,6 +13,7 @@ class SeasonAdmin(admin.ModelAdmin):
 class TournamentPlayerInline(admin.TabularInline):
     model = TournamentPlayer
     extra = 0
+    raw_id_fields = ("player",)
 
 @admin.register(Tournament)
 class TournamentAdmin(admin.ModelAdmin):
@@ -33,3 +37,69 @@ class TournamentPlayerAdmin(admin.ModelAdmin):
     )
     list_filter = ("tournament",)
     search_fields = ("player_name", "tournament__name", "deck_archtype_name")
+    raw_id_fields = ("player", "user", "deck")
+
+
+class PlayerAliasInline(admin.TabularInline):
+    model = PlayerAlias
+    extra = 0
+
+
+@admin.register(Player)
+class PlayerAdmin(admin.ModelAdmin):
+    list_display = ("name", "user", "created_at")
+    search_fields = ("name", "aliases__name_key", "user__username")
+    raw_id_fields = ("user",)
+    inlines = [PlayerAliasInline]
+
+
+@admin.register(Round)
+class RoundAdmin(admin.ModelAdmin):
+    list_display = ("tournament", "number", "start_time", "is_finished")
+    list_filter = ("tournament", "is_finished")
+
+
+@admin.register(Match)
+class MatchAdmin(admin.ModelAdmin):
+    list_display = ("round", "table_number", "player1", "player2", "score_p1", "score_p2", "status")
+    list_filter = ("tournament", "status")
+    raw_id_fields = ("player1", "player2", "round", "submitted_by")
+    search_fields = ("player1__player_name", "player2__player_name")
+
+    # placar corrigido no admin: registro e desempates são derivados das partidas
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_standings(obj.tournament)
+
+    def delete_model(self, request, obj):
+        tournament = obj.tournament
+        super().delete_model(request, obj)
+        refresh_standings(tournament)
+
+
+# rankings são derivados (tournaments.rankings): só leitura no admin
+@admin.register(PlayerRanking)
+class PlayerRankingAdmin(admin.ModelAdmin):
+    list_display = ("player_name", "season", "total_points", "total_wins", "total_draws", "total_losses", "total_events")
+    list_filter = ("season",)
+    search_fields = ("player_name",)
+    raw_id_fields = ("player",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchetypeRanking)
+class ArchetypeRankingAdmin(admin.ModelAdmin):
+    list_display = ("deck_archetype_name", "season", "uses", "players", "total_points", "avg_points")
+    list_filter = ("season",)
+    search_fields = ("deck_archetype_name",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 class TournamentsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "tournaments"
+
+    def ready(self):
+        from . import jobs, signals  # noqa: F401
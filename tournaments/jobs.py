@@ -0,0 +1,96 @@
+# tournaments/jobs.py
+"""
+Tarefas adiadas dos torneios (fila em core.jobs, processada pelo run_jobs).
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, List
+
+from core.jobs import enqueue, job
+
+ARCHETYPE_CLASSIFY = "tournaments.archetypes"   # chave = tournament_id
+RANKING_UPDATE = "tournaments.rankings"         # chave = "p|<data>|<player_id>" ou "a|<data>|<arquétipo>"
+SEASON_REBUILD = "tournaments.season"           # chave = season_id
+
+# cosseno mínimo com o centróide para preencher o arquétipo sozinho
+ARCHETYPE_MIN_SCORE = 0.5
+
+
+def schedule_archetype_classification(tournament_ids: Iterable[int]) -> None:
+    """
+    Preenche o arquétipo das inscrições com deck vinculado e arquétipo em
+    branco (metagame / ranking de arquétipos). Roda depois do refresh dos decks.
+    """
+    enqueue(ARCHETYPE_CLASSIFY, tournament_ids)
+
+
+def schedule_season_rebuild(season_ids: Iterable[int]) -> None:
+    """Temporada criada ou com período alterado: o worker recalcula só ela."""
+    enqueue(SEASON_REBUILD, season_ids)
+
+
+@job(ARCHETYPE_CLASSIFY, batch_size=20)
+def _classify_archetypes(keys: List[str]) -> None:
+    from decks.models import Archetype
+    from decks.similarity import suggest_archetypes
+
+    from .models import TournamentPlayer
+    from .rankings import schedule_ranking_update
+
+    entries = list(
+        TournamentPlayer.objects.filter(
+            tournament_id__in=[int(k) for k in keys], deck__isnull=False, deck_archtype_name=""
+        )
+        .select_related("deck__arquetipo")
+        .only("id", "tournament_id", "player_id", "deck_id", "deck_archtype_name", "deck__arquetipo__name")
+    )
+    if not entries:
+        return
+
+    # arquétipo marcado no deck vale direto; o resto vem da matriz de similaridade
+    guesses = suggest_archetypes([e.deck_id for e in entries if not e.deck.arquetipo_id])
+    names: Dict[int, str] = dict(
+        Archetype.objects.filter(id__in={a for a, _ in guesses.values() if a}).values_list("id", "name")
+    )
+
+    changed = []
+    for entry in entries:
+        if entry.deck.arquetipo_id:
+            name = entry.deck.arquetipo.name
+        else:
+            arch_id, score = guesses.get(entry.deck_id, (None, 0.0))
+            name = names.get(arch_id, "") if score >= ARCHETYPE_MIN_SCORE else ""
+        if name:
+            entry.deck_archtype_name = name[:120]
+            changed.append(entry)
+
+    # bulk_update não dispara signals: reagrega os rankings à mão
+    TournamentPlayer.objects.bulk_update(changed, ["deck_archtype_name"], batch_size=500)
+    by_tournament: Dict[int, List] = {}
+    for entry in changed:
+        by_tournament.setdefault(entry.tournament_id, []).append(entry)
+    for tournament_id, rows in by_tournament.items():
+        schedule_ranking_update(
+            tournament_id,
+            player_ids=[e.player_id for e in rows],
+            archetypes=[e.deck_archtype_name for e in rows],
+        )
+
+
+@job(RANKING_UPDATE, batch_size=1000)
+def _update_rankings(keys: List[str]) -> None:
+    from .rankings import parse_ranking_keys, update_rankings
+
+    players, archetypes = parse_ranking_keys(keys)
+    update_rankings(players, archetypes)
+
+
+@job(SEASON_REBUILD, batch_size=20)
+def _rebuild_seasons(keys: List[str]) -> None:
+    from .models import Season
+    from .rankings import rebuild_rankings
+
+    # temporada apagada antes do worker passar: nada a fazer (CASCADE)
+    seasons = list(Season.objects.filter(id__in=[int(k) for k in keys]))
+    if seasons:
+        rebuild_rankings(seasons=seasons, overall=False)
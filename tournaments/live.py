@@ -0,0 +1,136 @@
+# tournaments/live.py
+"""
+Classificação ao vivo: snapshot da tabela cacheado por (torneio, versão dos
+resultados). A versão fica no cache compartilhado (Redis/banco, ver CACHES no
+settings; mesmo esquema do public_decks_version / prices_version) e muda no
+commit de qualquer alteração de resultado, inscrição ou do torneio. A página
+consulta o JSON a cada poucos segundos com If-None-Match: enquanto nada muda,
+cada consulta é uma leitura de cache e um 304, sem query e sem prender o worker.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Tournament, TournamentPlayer
+
+SNAPSHOT_TIMEOUT = 60 * 60
+
+STANDINGS_ORDER = ("-points", "-omw", "-oomw", "player_name")
+
+
+def results_version_key(tournament_id: int) -> str:
+    return f"tournament_results_version:{tournament_id}"
+
+
+def _bump(tournament_id: int) -> None:
+    cache.set(results_version_key(tournament_id), f"{time.time():.6f}", timeout=None)
+
+
+class _PendingBumps:
+    """
+    Torneios alterados numa transação: uma troca de versão por torneio, feita
+    por um único callback no commit (mesmo esquema do core.jobs._PendingBatch).
+    Se a transação sofrer rollback, o callback some junto com os ids.
+    """
+
+    def __init__(self):
+        self.tournament_ids: set = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        for tournament_id in self.tournament_ids:
+            _bump(tournament_id)
+
+
+_pending = threading.local()
+
+
+def bump_results_version(tournament_id: int) -> None:
+    """
+    Invalida o snapshot do torneio quando a transação atual terminar (antes
+    disso, um leitor ainda montaria o snapshot com os dados antigos).
+    """
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        _bump(tournament_id)
+        return
+    pending = getattr(_pending, "bumps", None)
+    if pending is None or pending.done or not any(entry[1] is pending for entry in connection.run_on_commit):
+        pending = _pending.bumps = _PendingBumps()
+        transaction.on_commit(pending)
+    pending.tournament_ids.add(tournament_id)
+
+
+def results_version(tournament_id: int) -> str:
+    key = results_version_key(tournament_id)
+    version = cache.get(key)
+    if version is None:
+        # cache perdido/novo: qualquer valor novo serve, o snapshot é remontado
+        cache.add(key, f"{time.time():.6f}", timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def standings_etag(tournament_id: int, version: str) -> str:
+    return f'"standings-{tournament_id}-{version}"'
+
+
+def build_standings(tournament: Tournament) -> dict:
+    rows = (
+        TournamentPlayer.objects.filter(tournament=tournament)
+        .order_by(*STANDINGS_ORDER)
+        .values(
+            "player_name", "player__bandai_id", "deck_archtype_name", "deck__nome",
+            "wins", "draws", "losses", "points", "omw", "oomw",
+        )
+    )
+    return {
+        "tournament": tournament.pk,
+        "name": tournament.name,
+        "status": tournament.status,
+        "status_display": tournament.get_status_display(),
+        "current_round": tournament.current_round,
+        "total_rounds": tournament.total_rounds,
+        "players": [
+            {
+                "rank": rank,
+                "player_name": r["player_name"],
+                "bandai_id": r["player__bandai_id"] or "",
+                "deck_archetype_name": r["deck_archtype_name"],
+                "deck_name": r["deck__nome"] or "",
+                "wins": r["wins"],
+                "draws": r["draws"],
+                "losses": r["losses"],
+                "match_points": r["points"],
+                "omw": r["omw"],
+                "oomw": r["oomw"],
+            }
+            for rank, r in enumerate(rows, start=1)
+        ],
+    }
+
+
+def standings_snapshot(tournament_id: int, version: Optional[str] = None) -> Optional[dict]:
+    """
+    Snapshot da classificação na versão atual (1 leitura de cache quando já
+    existe; senão 2 queries). None se o torneio não existe.
+    A versão é lida antes dos dados: se mudar no meio, o próximo pedido remonta.
+    """
+    version = version or results_version(tournament_id)
+    key = f"standings:v1:{tournament_id}:{version}"
+    snapshot = cache.get(key)
+    if snapshot is None:
+        tournament = Tournament.objects.filter(pk=tournament_id).first()
+        if tournament is None:
+            return None
+        snapshot = build_standings(tournament)
+        snapshot["version"] = version
+        cache.set(key, snapshot, SNAPSHOT_TIMEOUT)
+    return snapshot
+
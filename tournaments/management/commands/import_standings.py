@@ -0,0 +1,68 @@
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from tournaments.models import Tournament
+from tournaments.standings_import import import_standings, parse_standings
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa o resultado final de um torneio (export do Bandai TCG+ em CSV ou JSON).\n\n"
+        "Cria/atualiza as inscrições (V/E/D, pontos, OMW%/OOMW%, arquétipo), liga jogadores\n"
+        "pelo ID Bandai ou nome, vincula/cria decks, lança pontos de fidelidade e recalcula\n"
+        "os rankings uma vez só no fim. Tudo numa transação."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", type=str, help="Arquivo .csv ou .json com a classificação")
+        parser.add_argument("--tournament", type=int, required=True, help="ID do torneio")
+        parser.add_argument("--format", choices=["csv", "json"], help="Força o formato (padrão: detecta)")
+        parser.add_argument(
+            "--deck-owner",
+            help="Username dono das decklists de jogadores sem usuário no Hub (sem isso, elas são ignoradas)",
+        )
+        parser.add_argument("--replace", action="store_true", help="Remove inscrições que não estão no arquivo")
+        parser.add_argument("--no-loyalty", action="store_true", help="Não lança pontos de fidelidade")
+        parser.add_argument("--keep-status", action="store_true", help="Não marca o torneio como finalizado")
+
+    def handle(self, *args, **options):
+        source = Path(options["source"])
+        if not source.exists():
+            raise CommandError(f"Arquivo não encontrado: {source}")
+
+        tournament = Tournament.objects.filter(pk=options["tournament"]).first()
+        if tournament is None:
+            raise CommandError(f"Torneio não encontrado: {options['tournament']}")
+
+        deck_owner = None
+        if options["deck_owner"]:
+            deck_owner = User.objects.filter(username=options["deck_owner"]).first()
+            if deck_owner is None:
+                raise CommandError(f"Usuário não encontrado: {options['deck_owner']}")
+
+        try:
+            rows = parse_standings(source.read_bytes(), options["format"])
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        self.stdout.write(self.style.NOTICE(f"Importando {len(rows)} jogador(es) em {tournament.name}..."))
+        result = import_standings(
+            tournament,
+            rows,
+            deck_owner=deck_owner,
+            replace=options["replace"],
+            award_loyalty=not options["no_loyalty"],
+            finish=not options["keep_status"],
+        )
+
+        for warning in result.warnings:
+            self.stderr.write(f"  {warning}")
+        self.stdout.write(
+            f"Jogadores novos: {result.players_created} • decks vinculados: {result.decks_linked} "
+            f"(criados: {result.decks_created}) • lançamentos de fidelidade: {result.loyalty_events}"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Concluído: {result.created} criada(s), {result.updated} atualizada(s), {result.removed} removida(s)."
+        ))
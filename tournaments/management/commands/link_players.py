@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tournaments.players import FUZZY_CUTOFF, link_entries, link_users, merge_similar_players
+from tournaments.rankings import suspend_ranking_updates
+
+
+class Command(BaseCommand):
+    help = (
+        "Liga as inscrições (TournamentPlayer) ao jogador canônico (Player):\n"
+        "- inscrições sem Player ganham um pelo nome normalizado\n"
+        "- nomes parecidos (difflib) são mesclados no jogador com usuário / mais eventos\n"
+        "- jogadores ganham usuário pela inscrição logada ou pelo nickname do perfil\n"
+        "Os rankings são enfileirados uma vez só, no fim (recalculados pelo run_jobs)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--cutoff",
+            type=float,
+            default=FUZZY_CUTOFF,
+            help=f"Similaridade mínima para mesclar nomes, de 0 a 1 (padrão: {FUZZY_CUTOFF})",
+        )
+        parser.add_argument(
+            "--no-merge",
+            action="store_true",
+            help="Não mescla nomes parecidos (só liga inscrições e usuários).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Mostra o que seria feito e desfaz tudo no fim.",
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic(), suspend_ranking_updates():
+            entries = link_entries()
+            self.stdout.write(f"Inscrições ligadas a um jogador: {entries}")
+
+            if not options["no_merge"]:
+                merged = merge_similar_players(options["cutoff"])
+                for s in merged:
+                    self.stdout.write(f"  '{s.source_name}' -> '{s.target_name}' ({s.ratio:.0%})")
+                self.stdout.write(f"Jogadores mesclados: {len(merged)}")
+
+            users = link_users()
+            self.stdout.write(f"Jogadores ligados a um usuário: {users}")
+
+            if options["dry_run"]:
+                transaction.set_rollback(True)
+                self.stdout.write(self.style.WARNING("Dry-run: nada foi gravado."))
+                return
+
+        self.stdout.write(self.style.SUCCESS("Concluído."))
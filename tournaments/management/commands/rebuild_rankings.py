@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from tournaments.models import Season
+from tournaments.rankings import rebuild_rankings
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula do zero os rankings materializados (geral e por temporada).\n"
+        "Útil depois de cargas feitas direto no banco, sem passar pelos sinais."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--season",
+            action="append",
+            dest="slugs",
+            help="Slug da temporada (pode repetir). Sem isso, recalcula o geral e todas as temporadas.",
+        )
+
+    def handle(self, *args, **options):
+        slugs = options["slugs"]
+        seasons = Season.objects.filter(slug__in=slugs) if slugs else None
+
+        self.stdout.write(self.style.NOTICE("Recalculando rankings..."))
+        players, archetypes = rebuild_rankings(seasons=seasons, overall=not slugs)
+        self.stdout.write(
+            self.style.SUCCESS(f"Concluído: {players} linha(s) de jogadores e {archetypes} de arquétipos.")
+        )
@@ -0,0 +1,78 @@
+# Generated by Django 6.0 on 2026-10-19 19:21
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0010_remove_tournamentresult_deck_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tournament',
+            name='current_round',
+            field=models.PositiveIntegerField(default=0, help_text='0 = ainda não começou'),
+        ),
+        migrations.AddField(
+            model_name='tournament',
+            name='total_rounds',
+            field=models.PositiveIntegerField(default=0, help_text='0 = automático (log2 do nº de jogadores)'),
+        ),
+        migrations.CreateModel(
+            name='Round',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('start_time', models.DateTimeField(blank=True, null=True)),
+                ('is_finished', models.BooleanField(default=False)),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rounds', to='tournaments.tournament')),
+            ],
+            options={
+                'ordering': ['tournament', 'number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Match',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table_number', models.PositiveIntegerField()),
+                ('score_p1', models.PositiveIntegerField(default=0)),
+                ('score_p2', models.PositiveIntegerField(default=0)),
+                ('status', models.CharField(choices=[('PENDING', 'Pendente'), ('SUBMITTED', 'Aguardando confirmação'), ('CONFIRMED', 'Confirmada'), ('DISPUTED', 'Em disputa (admin)')], default='PENDING', max_length=20)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('player1', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches_as_p1', to='tournaments.tournamentplayer')),
+                ('player2', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='matches_as_p2', to='tournaments.tournamentplayer')),
+                ('submitted_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reported_matches', to=settings.AUTH_USER_MODEL)),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='tournaments.tournament')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='matches', to='tournaments.round')),
+            ],
+            options={
+                'ordering': ['round', 'table_number'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='round',
+            constraint=models.UniqueConstraint(fields=('tournament', 'number'), name='uniq_round_tournament_number'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['tournament', 'status'], name='match_tournament_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['player1', 'round'], name='match_p1_round_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='match',
+            index=models.Index(fields=['player2', 'round'], name='match_p2_round_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='match',
+            constraint=models.UniqueConstraint(fields=('round', 'table_number'), name='uniq_match_round_table'),
+        ),
+    ]
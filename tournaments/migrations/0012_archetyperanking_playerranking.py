@@ -0,0 +1,128 @@
+# Generated by Django 6.0 on 2026-10-19 19:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Avg, Count, Q, Sum
+
+
+def build_rankings(apps, schema_editor):
+    Season = apps.get_model("tournaments", "Season")
+    TournamentPlayer = apps.get_model("tournaments", "TournamentPlayer")
+    PlayerRanking = apps.get_model("tournaments", "PlayerRanking")
+    ArchetypeRanking = apps.get_model("tournaments", "ArchetypeRanking")
+
+    scopes = [(None, Q())] + [
+        (season, Q(tournament__date__gte=season.start_date, tournament__date__lte=season.end_date))
+        for season in Season.objects.all()
+    ]
+    for season, scope in scopes:
+        players = (
+            TournamentPlayer.objects.filter(scope).values("player_name").order_by()
+            .annotate(
+                total_events=Count("id"),
+                total_points=Sum("points"),
+                total_wins=Sum("wins"),
+                total_draws=Sum("draws"),
+                total_losses=Sum("losses"),
+                avg_omw=Avg("omw"),
+                avg_oomw=Avg("oomw"),
+            )
+        )
+        PlayerRanking.objects.bulk_create(
+            [
+                PlayerRanking(
+                    season=season,
+                    player_name=r["player_name"],
+                    total_events=r["total_events"],
+                    total_points=r["total_points"] or 0,
+                    total_wins=r["total_wins"] or 0,
+                    total_draws=r["total_draws"] or 0,
+                    total_losses=r["total_losses"] or 0,
+                    avg_omw=round(r["avg_omw"] or 0.0, 2),
+                    avg_oomw=round(r["avg_oomw"] or 0.0, 2),
+                )
+                for r in players
+            ],
+            batch_size=1000,
+        )
+
+        archetypes = (
+            TournamentPlayer.objects.filter(scope).exclude(deck_archtype_name="")
+            .values("deck_archtype_name").order_by()
+            .annotate(
+                uses=Count("id"),
+                players=Count("player_name", distinct=True),
+                total_points=Sum("points"),
+                total_wins=Sum("wins"),
+                total_draws=Sum("draws"),
+                total_losses=Sum("losses"),
+            )
+        )
+        ArchetypeRanking.objects.bulk_create(
+            [
+                ArchetypeRanking(
+                    season=season,
+                    deck_archetype_name=r["deck_archtype_name"],
+                    uses=r["uses"],
+                    players=r["players"],
+                    total_points=r["total_points"] or 0,
+                    total_wins=r["total_wins"] or 0,
+                    total_draws=r["total_draws"] or 0,
+                    total_losses=r["total_losses"] or 0,
+                )
+                for r in archetypes
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0011_tournament_current_round_tournament_total_rounds_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchetypeRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('deck_archetype_name', models.CharField(max_length=120)),
+                ('uses', models.PositiveIntegerField(default=0)),
+                ('players', models.PositiveIntegerField(default=0)),
+                ('total_points', models.IntegerField(default=0)),
+                ('total_wins', models.PositiveIntegerField(default=0)),
+                ('total_draws', models.PositiveIntegerField(default=0)),
+                ('total_losses', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('season', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archetype_rankings', to='tournaments.season')),
+            ],
+            options={
+                'ordering': ['season', '-uses', '-total_points', 'deck_archetype_name'],
+                'indexes': [models.Index(fields=['season', '-uses', '-total_points', 'deck_archetype_name'], name='archranking_order_idx')],
+                'constraints': [models.UniqueConstraint(fields=('season', 'deck_archetype_name'), name='uniq_archranking_season_arch'), models.UniqueConstraint(condition=models.Q(('season__isnull', True)), fields=('deck_archetype_name',), name='uniq_archranking_overall_arch')],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlayerRanking',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player_name', models.CharField(max_length=120)),
+                ('total_events', models.PositiveIntegerField(default=0)),
+                ('total_points', models.IntegerField(default=0)),
+                ('total_wins', models.PositiveIntegerField(default=0)),
+                ('total_draws', models.PositiveIntegerField(default=0)),
+                ('total_losses', models.PositiveIntegerField(default=0)),
+                ('avg_omw', models.FloatField(default=0.0)),
+                ('avg_oomw', models.FloatField(default=0.0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('season', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='player_rankings', to='tournaments.season')),
+            ],
+            options={
+                'ordering': ['season', '-total_points', '-total_wins', 'player_name'],
+                'indexes': [models.Index(fields=['season', '-total_points', '-total_wins', 'player_name'], name='playerranking_order_idx')],
+                'constraints': [models.UniqueConstraint(fields=('season', 'player_name'), name='uniq_playerranking_season_player'), models.UniqueConstraint(condition=models.Q(('season__isnull', True)), fields=('player_name',), name='uniq_playerranking_overall_player')],
+            },
+        ),
+        migrations.RunPython(build_rankings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,158 @@
+# Generated by Django 6.0 on 2026-10-19 19:30
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Avg, Count, Q, Sum
+
+
+def _name_key(name):
+    # cópia de tournaments.players.name_key (migrations não importam código do app)
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[\W_]+", " ", text.casefold())
+    return " ".join(text.split())[:120]
+
+
+def clear_player_rankings(apps, schema_editor):
+    apps.get_model("tournaments", "PlayerRanking").objects.all().delete()
+
+
+def link_players(apps, schema_editor):
+    """
+    Um Player por nome normalizado (mesclagem por similaridade fica para o
+    manage.py link_players) e ranking de jogadores refeito por player_id.
+    """
+    Season = apps.get_model("tournaments", "Season")
+    Player = apps.get_model("tournaments", "Player")
+    PlayerAlias = apps.get_model("tournaments", "PlayerAlias")
+    PlayerRanking = apps.get_model("tournaments", "PlayerRanking")
+    TournamentPlayer = apps.get_model("tournaments", "TournamentPlayer")
+
+    entries = list(TournamentPlayer.objects.order_by("id").only("id", "player_name", "user"))
+    groups = {}
+    for tp in entries:
+        groups.setdefault(_name_key(tp.player_name), []).append(tp)
+
+    taken = set()
+    for key, group in groups.items():
+        user_id = next((tp.user_id for tp in group if tp.user_id and tp.user_id not in taken), None)
+        taken.add(user_id)
+        player = Player.objects.create(name=" ".join(group[0].player_name.split())[:120], user_id=user_id)
+        PlayerAlias.objects.create(player=player, name_key=key)
+        for tp in group:
+            tp.player_id = player.pk
+    TournamentPlayer.objects.bulk_update(entries, ["player"], batch_size=500)
+
+    names = dict(Player.objects.values_list("id", "name"))
+    scopes = [(None, Q())] + [
+        (season, Q(tournament__date__gte=season.start_date, tournament__date__lte=season.end_date))
+        for season in Season.objects.all()
+    ]
+    for season, scope in scopes:
+        rows = (
+            TournamentPlayer.objects.filter(scope).values("player_id").order_by()
+            .annotate(
+                total_events=Count("id"),
+                total_points=Sum("points"),
+                total_wins=Sum("wins"),
+                total_draws=Sum("draws"),
+                total_losses=Sum("losses"),
+                avg_omw=Avg("omw"),
+                avg_oomw=Avg("oomw"),
+            )
+        )
+        PlayerRanking.objects.bulk_create(
+            [
+                PlayerRanking(
+                    season=season,
+                    player_id=r["player_id"],
+                    player_name=names[r["player_id"]],
+                    total_events=r["total_events"],
+                    total_points=r["total_points"] or 0,
+                    total_wins=r["total_wins"] or 0,
+                    total_draws=r["total_draws"] or 0,
+                    total_losses=r["total_losses"] or 0,
+                    avg_omw=round(r["avg_omw"] or 0.0, 2),
+                    avg_oomw=round(r["avg_oomw"] or 0.0, 2),
+                )
+                for r in rows
+            ],
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0012_archetyperanking_playerranking'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Player',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=120)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlayerAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name_key', models.CharField(max_length=120, unique=True)),
+            ],
+        ),
+        migrations.RemoveConstraint(
+            model_name='playerranking',
+            name='uniq_playerranking_season_player',
+        ),
+        migrations.RemoveConstraint(
+            model_name='playerranking',
+            name='uniq_playerranking_overall_player',
+        ),
+        migrations.RunPython(clear_player_rankings, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='playerranking',
+            name='player_name',
+            field=models.CharField(help_text='Cópia de Player.name para exibir sem join', max_length=120),
+        ),
+        migrations.AddField(
+            model_name='player',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='player', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='playerranking',
+            name='player',
+            field=models.ForeignKey(default=0, on_delete=django.db.models.deletion.CASCADE, related_name='rankings', to='tournaments.player'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='tournamentplayer',
+            name='player',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='entries', to='tournaments.player'),
+        ),
+        migrations.AddConstraint(
+            model_name='playerranking',
+            constraint=models.UniqueConstraint(fields=('season', 'player'), name='uniq_playerranking_season_player'),
+        ),
+        migrations.AddConstraint(
+            model_name='playerranking',
+            constraint=models.UniqueConstraint(condition=models.Q(('season__isnull', True)), fields=('player',), name='uniq_playerranking_overall_player'),
+        ),
+        migrations.AddField(
+            model_name='playeralias',
+            name='player',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='aliases', to='tournaments.player'),
+        ),
+        migrations.RunPython(link_players, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-19 19:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tournaments', '0013_player_playeralias_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='player',
+            name='bandai_id',
+            field=models.CharField(blank=True, default='', max_length=50, verbose_name='ID Bandai / TCG+'),
+        ),
+        migrations.AddConstraint(
+            model_name='player',
+            constraint=models.UniqueConstraint(condition=models.Q(('bandai_id', ''), _negated=True), fields=('bandai_id',), name='uniq_player_bandai_id'),
+        ),
+    ]
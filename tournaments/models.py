@@ -35,14 +35,56 @@ class Tournament(models.Model):
         Season, on_delete=models.SET_NULL, null=True, blank=True, related_name="tournaments"
     )
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="REGISTRATION")
+    total_rounds = models.PositiveIntegerField(default=0, help_text="0 = automático (log2 do nº de jogadores)")
+    current_round = models.PositiveIntegerField(default=0, help_text="0 = ainda não começou")
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # pontuação padrão Bandai
+    win_points = 3
+    draw_points = 1
+    loss_points = 0
+
+    def __str__(self):
+        return self.name
+
+# ----------------------------
+# Jogador: identidade única por trás dos nomes digitados em cada torneio
+# (resolvido/mesclado por tournaments.players)
+# ----------------------------
+class Player(models.Model):
+    name = models.CharField(max_length=120)
+    user = models.OneToOneField(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="player")
+    bandai_id = models.CharField("ID Bandai / TCG+", max_length=50, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["bandai_id"], condition=~models.Q(bandai_id=""), name="uniq_player_bandai_id"
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
+
+class PlayerAlias(models.Model):
+    """
+    Grafias já vistas de um jogador (chave normalizada), para o mesmo nome
+    cair sempre no mesmo Player depois de uma mesclagem.
+    """
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="aliases")
+    name_key = models.CharField(max_length=120, unique=True)
+
+    def __str__(self):
+        return f"{self.name_key} -> {self.player}"
+
+
 class TournamentPlayer(models.Model):
     tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="players")
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    player = models.ForeignKey(Player, on_delete=models.SET_NULL, null=True, blank=True, related_name="entries")
     player_name = models.CharField(max_length=120)
     deck = models.ForeignKey(Deck, on_delete=models.SET_NULL, null=True, blank=True)
     deck_archtype_name = models.CharField(max_length=120, blank=True)
@@ -59,3 +101,140 @@ class TournamentPlayer(models.Model):
 
     def __str__(self):
         return f"{self.player_name} @ {self.tournament.name}"
+
+
+class Round(models.Model):
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="rounds")
+    number = models.PositiveIntegerField()
+    start_time = models.DateTimeField(null=True, blank=True)
+    is_finished = models.BooleanField(default=False)
+
+    class Meta:
+        ordering = ["tournament", "number"]
+        constraints = [
+            models.UniqueConstraint(fields=["tournament", "number"], name="uniq_round_tournament_number")
+        ]
+
+    def __str__(self):
+        return f"{self.tournament.name} - Rodada {self.number}"
+
+
+class Match(models.Model):
+    """
+    Uma mesa de uma rodada. player2 vazio = BYE (vitória do player1).
+    Só partidas CONFIRMED entram em vitórias/pontos/desempates.
+    """
+    STATUS_CHOICES = [
+        ("PENDING", "Pendente"),
+        ("SUBMITTED", "Aguardando confirmação"),
+        ("CONFIRMED", "Confirmada"),
+        ("DISPUTED", "Em disputa (admin)"),
+    ]
+
+    # tournament repetido aqui para ler o grafo de partidas do torneio direto pelo índice
+    tournament = models.ForeignKey(Tournament, on_delete=models.CASCADE, related_name="matches")
+    round = models.ForeignKey(Round, on_delete=models.CASCADE, related_name="matches")
+    table_number = models.PositiveIntegerField()
+    player1 = models.ForeignKey(TournamentPlayer, on_delete=models.CASCADE, related_name="matches_as_p1")
+    player2 = models.ForeignKey(
+        TournamentPlayer, on_delete=models.CASCADE, null=True, blank=True, related_name="matches_as_p2"
+    )
+    score_p1 = models.PositiveIntegerField(default=0)
+    score_p2 = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="PENDING")
+    submitted_by = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="reported_matches"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["round", "table_number"]
+        constraints = [
+            models.UniqueConstraint(fields=["round", "table_number"], name="uniq_match_round_table")
+        ]
+        indexes = [
+            models.Index(fields=["tournament", "status"], name="match_tournament_status_idx"),
+            models.Index(fields=["player1", "round"], name="match_p1_round_idx"),
+            models.Index(fields=["player2", "round"], name="match_p2_round_idx"),
+        ]
+
+    @property
+    def is_bye(self) -> bool:
+        return self.player2_id is None
+
+    def __str__(self):
+        p2 = self.player2.player_name if self.player2_id else "BYE"
+        return f"R{self.round.number} Mesa {self.table_number}: {self.player1.player_name} x {p2}"
+
+
+# ----------------------------
+# Rankings materializados (mantidos por tournaments.rankings)
+# season vazio = ranking geral (todos os torneios)
+# ----------------------------
+class PlayerRanking(models.Model):
+    season = models.ForeignKey(Season, on_delete=models.CASCADE, null=True, blank=True, related_name="player_rankings")
+    player = models.ForeignKey(Player, on_delete=models.CASCADE, related_name="rankings")
+    player_name = models.CharField(max_length=120, help_text="Cópia de Player.name para exibir sem join")
+    total_events = models.PositiveIntegerField(default=0)
+    total_points = models.IntegerField(default=0)
+    total_wins = models.PositiveIntegerField(default=0)
+    total_draws = models.PositiveIntegerField(default=0)
+    total_losses = models.PositiveIntegerField(default=0)
+    avg_omw = models.FloatField(default=0.0)
+    avg_oomw = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["season", "-total_points", "-total_wins", "player_name"]
+        constraints = [
+            models.UniqueConstraint(fields=["season", "player"], name="uniq_playerranking_season_player"),
+            models.UniqueConstraint(
+                fields=["player"], condition=models.Q(season__isnull=True), name="uniq_playerranking_overall_player"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["season", "-total_points", "-total_wins", "player_name"], name="playerranking_order_idx"),
+        ]
+
+    @property
+    def bandai_id(self) -> str:
+        # as views trazem o player com select_related
+        return self.player.bandai_id
+
+    def __str__(self):
+        return f"{self.player_name}: {self.total_points} [{self.season or 'geral'}]"
+
+
+class ArchetypeRanking(models.Model):
+    season = models.ForeignKey(
+        Season, on_delete=models.CASCADE, null=True, blank=True, related_name="archetype_rankings"
+    )
+    deck_archetype_name = models.CharField(max_length=120)
+    uses = models.PositiveIntegerField(default=0)
+    players = models.PositiveIntegerField(default=0)
+    total_points = models.IntegerField(default=0)
+    total_wins = models.PositiveIntegerField(default=0)
+    total_draws = models.PositiveIntegerField(default=0)
+    total_losses = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["season", "-uses", "-total_points", "deck_archetype_name"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["season", "deck_archetype_name"], name="uniq_archranking_season_arch"
+            ),
+            models.UniqueConstraint(
+                fields=["deck_archetype_name"], condition=models.Q(season__isnull=True), name="uniq_archranking_overall_arch"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["season", "-uses", "-total_points", "deck_archetype_name"], name="archranking_order_idx"),
+        ]
+
+    @property
+    def avg_points(self) -> float:
+        return round(self.total_points / self.uses, 2) if self.uses else 0.0
+
+    def __str__(self):
+        return f"{self.deck_archetype_name}: {self.uses} [{self.season or 'geral'}]"
@@ -0,0 +1,155 @@
+# tournaments/pairing.py
+"""
+Pareamento suíço (sem banco): recebe os jogadores com pontos/oponentes e
+devolve as mesas da próxima rodada.
+
+- Ordena por pontos (empates embaralhados com semente fixa por rodada).
+- BYE para o jogador mais baixo na tabela que ainda não recebeu BYE; se com
+  ele o resto não fecha sem revanche, tenta o próximo de baixo para cima.
+- As mesas saem de cima para baixo: cada jogador pega o adversário mais
+  próximo em pontos com quem ainda não jogou (custo = diferença de pontos),
+  com backtracking limitado quando o fim da lista fica sem par possível.
+  Se o limite (somado entre as tentativas de BYE) estoura, cai para o guloso
+  aceitando o menor nº de revanches.
+"""
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass, field
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+# passos do backtracking antes de desistir de evitar revanches
+MAX_BACKTRACK_STEPS = 200_000
+
+
+@dataclass(frozen=True)
+class PairingPlayer:
+    id: int
+    points: int
+    opponents: FrozenSet[int] = frozenset()
+    had_bye: bool = False
+
+
+@dataclass
+class Pairings:
+    pairs: List[Tuple[int, int]] = field(default_factory=list)
+    bye: Optional[int] = None
+    rematches: int = 0
+
+
+def suggested_rounds(players: int) -> int:
+    """
+    Nº de rodadas suíças para sobrar um único invicto (teto de log2).
+    """
+    return max(1, math.ceil(math.log2(players))) if players > 1 else 1
+
+
+def standings_order(players: Sequence[PairingPlayer], seed: int = 0) -> List[PairingPlayer]:
+    shuffled = list(players)
+    random.Random(seed).shuffle(shuffled)
+    return sorted(shuffled, key=lambda p: -p.points)   # sort estável: empates ficam embaralhados
+
+
+def _bye_candidates(ordered: List[PairingPlayer]) -> List[Optional[PairingPlayer]]:
+    """
+    Quem pode receber o BYE, do mais baixo na tabela para cima (nº par: ninguém).
+    """
+    if len(ordered) % 2 == 0:
+        return [None]
+    return [p for p in reversed(ordered) if not p.had_bye] or [ordered[-1]]
+
+
+def _candidates(ordered: List[PairingPlayer], i: int, used: List[bool]) -> List[int]:
+    """
+    Adversários possíveis para ordered[i], do mais próximo em pontos ao mais longe
+    (empate em pontos: quem está mais perto na tabela).
+    """
+    me = ordered[i]
+    options = [j for j in range(i + 1, len(ordered)) if not used[j] and ordered[j].id not in me.opponents]
+    return sorted(options, key=lambda j: (abs(me.points - ordered[j].points), j))
+
+
+def _pair_without_rematches(
+    ordered: List[PairingPlayer], max_steps: int = MAX_BACKTRACK_STEPS
+) -> Tuple[Optional[List[Tuple[int, int]]], int]:
+    """
+    Mesas sem nenhuma revanche, ou None se não existe (ou se passou de
+    `max_steps`). Retorna também quantos passos gastou.
+    """
+    n = len(ordered)
+    used = [False] * n
+    pairs: List[Tuple[int, int]] = []
+    steps = 0
+
+    # pilha de (índice do jogador, candidatos restantes); iterativo para não estourar recursão
+    stack: List[Tuple[int, List[int]]] = []
+    i = 0
+    while True:
+        while i < n and used[i]:
+            i += 1
+        if i >= n:
+            return [(ordered[a].id, ordered[b].id) for a, b in pairs], steps
+
+        options = _candidates(ordered, i, used)
+        while True:
+            steps += 1
+            if steps > max_steps:
+                return None, steps
+            if options:
+                j = options.pop(0)
+                used[i] = used[j] = True
+                pairs.append((i, j))
+                stack.append((i, options))
+                i += 1
+                break
+            # sem candidato: desfaz a mesa anterior e tenta o próximo adversário dela
+            if not stack:
+                return None, steps
+            i, options = stack.pop()
+            a, b = pairs.pop()
+            used[a] = used[b] = False
+
+
+def _pair_greedy(ordered: List[PairingPlayer]) -> Tuple[List[Tuple[int, int]], int]:
+    """
+    Último recurso: cada um pega o mais próximo sem revanche, ou o mais próximo de todos.
+    """
+    used = [False] * len(ordered)
+    pairs, rematches = [], 0
+    for i, me in enumerate(ordered):
+        if used[i]:
+            continue
+        options = _candidates(ordered, i, used)
+        if options:
+            j = options[0]
+        else:
+            j = next(k for k in range(i + 1, len(ordered)) if not used[k])
+            rematches += 1
+        used[i] = used[j] = True
+        pairs.append((me.id, ordered[j].id))
+    return pairs, rematches
+
+
+def pair_round(players: Sequence[PairingPlayer], seed: int = 0) -> Pairings:
+    """
+    Mesas da próxima rodada. A ordem das mesas segue a tabela (mesa 1 = topo).
+    """
+    ordered = standings_order(players, seed)
+    candidates = _bye_candidates(ordered)
+
+    budget = MAX_BACKTRACK_STEPS
+    for bye in candidates:
+        rest = [p for p in ordered if bye is None or p.id != bye.id]
+        pairs, steps = _pair_without_rematches(rest, budget)
+        if pairs is not None:
+            return Pairings(pairs=pairs, bye=bye.id if bye else None)
+        budget -= steps
+        if budget <= 0:
+            break
+
+    # nenhum BYE fecha sem revanche: o mais baixo recebe e o guloso minimiza
+    bye = candidates[0]
+    rest = [p for p in ordered if bye is None or p.id != bye.id]
+    pairs, rematches = _pair_greedy(rest)
+    return Pairings(pairs=pairs, bye=bye.id if bye else None, rematches=rematches)
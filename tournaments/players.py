@@ -0,0 +1,246 @@
+# tournaments/players.py
+"""
+Identidade de jogador (Player) por trás do texto livre TournamentPlayer.player_name.
+
+- Cada grafia já vista vira um PlayerAlias (chave sem acento/caixa/pontuação),
+  então "João Silva", "joao  silva" e "JOAO-SILVA" caem no mesmo Player.
+- Player pode apontar para um User (inscrição logada ou nickname do perfil).
+- Grafias parecidas ("Joao Silvaa") são mescladas por similaridade (difflib)
+  num job em lote (manage.py link_players), nunca no meio de uma inscrição.
+"""
+from __future__ import annotations
+
+import difflib
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.db import transaction
+from django.db.models import Count
+
+from core.models import UserProfile
+
+from .models import Player, PlayerAlias, PlayerRanking, TournamentPlayer
+from .rankings import schedule_ranking_update
+
+FUZZY_CUTOFF = 0.88
+FUZZY_MIN_LENGTH = 5    # nomes curtos demais ("ana"/"ane") não são mesclados por similaridade
+
+
+def name_key(name: str) -> str:
+    """
+    Chave normalizada do nome: sem acentos, sem caixa, pontuação vira espaço.
+    """
+    text = unicodedata.normalize("NFKD", name or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[\W_]+", " ", text.casefold())
+    return " ".join(text.split())[:120]
+
+
+def display_name(name: str) -> str:
+    return " ".join((name or "").split())[:120]
+
+
+# ----------------------------
+# Resolução nome/usuário -> Player
+# ----------------------------
+def resolve_player(name: str, user=None) -> Player:
+    """
+    Player de um nome digitado (e do usuário, se a inscrição foi logada).
+    O Player do usuário tem prioridade; senão vale o alias; senão cria um novo.
+    """
+    key = name_key(name)
+    player = Player.objects.filter(user=user).first() if user is not None else None
+
+    if player is None:
+        alias = PlayerAlias.objects.select_related("player").filter(name_key=key).first()
+        if alias is not None:
+            player = alias.player
+            if user is not None and player.user_id is None:
+                player.user = user
+                player.save(update_fields=["user"])
+            return player
+        player = Player.objects.create(name=display_name(name), user=user)
+
+    PlayerAlias.objects.get_or_create(name_key=key, defaults={"player": player})
+    return player
+
+
+def resolve_players(names: Iterable[str]) -> Dict[str, Player]:
+    """
+    Versão em lote (importações): chave do nome -> Player, criando os que
+    faltam com bulk_create. Não mexe em usuários.
+    """
+    wanted: Dict[str, str] = {}
+    for name in names:
+        wanted.setdefault(name_key(name), display_name(name))
+    wanted.pop("", None)
+
+    found = {
+        alias.name_key: alias.player
+        for alias in PlayerAlias.objects.select_related("player").filter(name_key__in=list(wanted))
+    }
+    missing = [key for key in wanted if key not in found]
+    if missing:
+        created = Player.objects.bulk_create([Player(name=wanted[key]) for key in missing], batch_size=500)
+        PlayerAlias.objects.bulk_create(
+            [PlayerAlias(player=player, name_key=key) for key, player in zip(missing, created)], batch_size=500
+        )
+        found.update(zip(missing, created))
+    return found
+
+
+def link_entries() -> int:
+    """
+    Liga ao Player toda inscrição que ainda não tem (cargas antigas, bulk_create).
+    Retorna quantas inscrições foram ligadas.
+    """
+    entries = list(TournamentPlayer.objects.filter(player__isnull=True).only("id", "tournament", "player_name"))
+    players = resolve_players(tp.player_name for tp in entries)
+    for tp in entries:
+        tp.player = players.get(name_key(tp.player_name)) or resolve_player(tp.player_name)
+    TournamentPlayer.objects.bulk_update(entries, ["player"], batch_size=500)
+
+    for tp in entries:
+        schedule_ranking_update(tp.tournament_id, player_ids=[tp.player_id])
+    return len(entries)
+
+
+def link_users() -> int:
+    """
+    Liga Player -> User quando dá para ter certeza:
+      - alguma inscrição do jogador foi feita logada (TournamentPlayer.user), ou
+      - o nickname do perfil tem a mesma chave de um alias (e só um perfil usa esse nick).
+    Retorna quantos jogadores ganharam usuário.
+    """
+    taken = set(Player.objects.filter(user__isnull=False).values_list("user_id", flat=True))
+    linked: Dict[int, int] = {}
+
+    for player_id, user_id in (
+        TournamentPlayer.objects.filter(player__user__isnull=True, user__isnull=False)
+        .values_list("player_id", "user_id").order_by("player_id", "id")
+    ):
+        if player_id not in linked and user_id not in taken:
+            linked[player_id] = user_id
+            taken.add(user_id)
+
+    by_nick: Dict[str, List[int]] = {}
+    for user_id, nickname in UserProfile.objects.exclude(nickname="").values_list("user_id", "nickname"):
+        by_nick.setdefault(name_key(nickname), []).append(user_id)
+    unique_nicks = {key: ids[0] for key, ids in by_nick.items() if len(ids) == 1 and ids[0] not in taken}
+    for player_id, key in PlayerAlias.objects.filter(
+        player__user__isnull=True, name_key__in=list(unique_nicks)
+    ).values_list("player_id", "name_key"):
+        user_id = unique_nicks[key]
+        if player_id not in linked and user_id not in taken:
+            linked[player_id] = user_id
+            taken.add(user_id)
+
+    players = list(Player.objects.filter(id__in=linked))
+    for player in players:
+        player.user_id = linked[player.pk]
+    Player.objects.bulk_update(players, ["user"], batch_size=500)
+    return len(players)
+
+
+# ----------------------------
+# Mesclagem
+# ----------------------------
+@transaction.atomic
+def merge_players(target: Player, sources: Iterable[Player]) -> int:
+    """
+    Junta os `sources` no `target`: inscrições, aliases e usuário (se o target
+    não tiver). Os rankings do target são reagregados; os dos sources saem em
+    cascata. Retorna quantas inscrições mudaram de jogador.
+    """
+    sources = [p for p in sources if p.pk != target.pk]
+    if not sources:
+        return 0
+    ids = [p.pk for p in sources]
+
+    moved = TournamentPlayer.objects.filter(player_id__in=ids).update(player=target)
+    PlayerAlias.objects.filter(player_id__in=ids).update(player=target)
+    if target.user_id is None:
+        user_id = next((p.user_id for p in sources if p.user_id), None)
+        if user_id:
+            Player.objects.filter(pk__in=ids).update(user=None)
+            target.user_id = user_id
+            target.save(update_fields=["user"])
+    Player.objects.filter(pk__in=ids).delete()
+
+    dates = set(TournamentPlayer.objects.filter(player=target).values_list("tournament__date", flat=True))
+    schedule_ranking_update(None, player_ids=[target.pk], dates=dates)
+    return moved
+
+
+@dataclass
+class MergeSuggestion:
+    target_id: int
+    source_id: int
+    target_name: str
+    source_name: str
+    ratio: float
+
+
+def similar_players(cutoff: float = FUZZY_CUTOFF) -> List[MergeSuggestion]:
+    """
+    Pares (canônico, duplicado) de nomes parecidos. Canônicos são escolhidos
+    primeiro entre jogadores com usuário e com mais eventos. Nunca sugere juntar
+    dois jogadores que estiveram no mesmo torneio nem dois usuários diferentes.
+    Para não comparar todos com todos, só compara nomes com a mesma inicial.
+    """
+    rows = list(Player.objects.annotate(events=Count("entries")).values_list("id", "name", "user_id", "events"))
+    rows.sort(key=lambda r: (r[2] is None, -r[3], r[0]))
+    tournaments: Dict[int, Set[int]] = {}
+    for player_id, tournament_id in TournamentPlayer.objects.filter(player__isnull=False).values_list(
+        "player_id", "tournament_id"
+    ):
+        tournaments.setdefault(player_id, set()).add(tournament_id)
+
+    blocks: Dict[str, Dict[str, int]] = {}     # inicial -> {chave: player_id canônico}
+    info = {r[0]: r for r in rows}
+    suggestions: List[MergeSuggestion] = []
+
+    for player_id, name, user_id, _ in rows:
+        key = name_key(name)
+        if not key:
+            continue
+        block = blocks.setdefault(key[0], {})
+        merged = False
+        if len(key) >= FUZZY_MIN_LENGTH:
+            for match in difflib.get_close_matches(key, list(block), n=3, cutoff=cutoff):
+                target_id = block[match]
+                target_user = info[target_id][2]
+                if tournaments.get(target_id, set()) & tournaments.get(player_id, set()):
+                    continue
+                if user_id and target_user and user_id != target_user:
+                    continue
+                suggestions.append(MergeSuggestion(
+                    target_id=target_id,
+                    source_id=player_id,
+                    target_name=info[target_id][1],
+                    source_name=name,
+                    ratio=round(difflib.SequenceMatcher(None, match, key).ratio(), 3),
+                ))
+                tournaments.setdefault(target_id, set()).update(tournaments.get(player_id, ()))
+                merged = True
+                break
+        if not merged:
+            block.setdefault(key, player_id)
+    return suggestions
+
+
+def merge_similar_players(cutoff: float = FUZZY_CUTOFF) -> List[MergeSuggestion]:
+    suggestions = similar_players(cutoff)
+    by_target: Dict[int, List[int]] = {}
+    for s in suggestions:
+        by_target.setdefault(s.target_id, []).append(s.source_id)
+    players = Player.objects.in_bulk(set(by_target) | {s.source_id for s in suggestions})
+    for target_id, source_ids in by_target.items():
+        merge_players(players[target_id], [players[pk] for pk in source_ids])
+    return suggestions
+
+
+def sync_ranking_names(player: Player) -> None:
+    PlayerRanking.objects.filter(player=player).exclude(player_name=player.name).update(player_name=player.name)
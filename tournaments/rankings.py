@@ -0,0 +1,275 @@
+# tournaments/rankings.py
+"""
+Rankings materializados (PlayerRanking / ArchetypeRanking).
+
+Cada ranking existe no escopo geral (season vazio) e em cada temporada cujo
+período cobre a data do torneio (mesma regra que as páginas usavam com
+tournament__date). Jogadores são agrupados pelo Player (FK), não pelo texto
+digitado. Quando resultados mudam, só os jogadores/arquétipos envolvidos são
+reagregados, e só nos escopos que contêm a data do torneio.
+As mudanças entram na fila (core.jobs, tipo tournaments.rankings) no commit e
+o worker reagrega em lote, fora do request que salvou o resultado.
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+
+from core.jobs import enqueue
+
+from .jobs import RANKING_UPDATE
+from .models import ArchetypeRanking, Player, PlayerRanking, Season, Tournament, TournamentPlayer
+
+BULK_BATCH_SIZE = 1000
+KEYS_CHUNK = 500   # ids/nomes por query (limite de variáveis do SQLite)
+
+
+# ----------------------------
+# Agregação por escopo
+# ----------------------------
+def _scope_filter(season: Optional[Season]) -> Q:
+    if season is None:
+        return Q()
+    return Q(tournament__date__gte=season.start_date, tournament__date__lte=season.end_date)
+
+
+def _chunks(keys: Optional[Set]):
+    if keys is None:
+        yield None
+        return
+    keys = sorted(keys)
+    for start in range(0, len(keys), KEYS_CHUNK):
+        yield keys[start:start + KEYS_CHUNK]
+
+
+def rebuild_player_ranking(season: Optional[Season], player_ids: Optional[Set[int]] = None) -> int:
+    """
+    Reagrega o ranking de jogadores do escopo (None = todos os jogadores).
+    Jogadores sem nenhuma participação no escopo saem da tabela.
+    """
+    created = 0
+    for chunk in _chunks(player_ids):
+        qs = TournamentPlayer.objects.filter(_scope_filter(season), player__isnull=False)
+        stale = PlayerRanking.objects.filter(season=season)
+        if chunk is not None:
+            qs = qs.filter(player_id__in=chunk)
+            stale = stale.filter(player_id__in=chunk)
+
+        rows = list(
+            qs.values("player_id").order_by()
+            .annotate(
+                total_events=Count("id"),
+                total_points=Sum("points"),
+                total_wins=Sum("wins"),
+                total_draws=Sum("draws"),
+                total_losses=Sum("losses"),
+                avg_omw=Avg("omw"),
+                avg_oomw=Avg("oomw"),
+            )
+        )
+        names = dict(Player.objects.filter(id__in=[r["player_id"] for r in rows]).values_list("id", "name"))
+        objs = [
+            PlayerRanking(
+                season=season,
+                player_id=r["player_id"],
+                player_name=names[r["player_id"]],
+                total_events=r["total_events"],
+                total_points=r["total_points"] or 0,
+                total_wins=r["total_wins"] or 0,
+                total_draws=r["total_draws"] or 0,
+                total_losses=r["total_losses"] or 0,
+                avg_omw=round(r["avg_omw"] or 0.0, 2),
+                avg_oomw=round(r["avg_oomw"] or 0.0, 2),
+            )
+            for r in rows
+        ]
+        stale.delete()
+        PlayerRanking.objects.bulk_create(objs, batch_size=BULK_BATCH_SIZE)
+        created += len(objs)
+    return created
+
+
+def rebuild_archetype_ranking(season: Optional[Season], archetypes: Optional[Set[str]] = None) -> int:
+    """
+    Reagrega o ranking de arquétipos do escopo (None = todos os arquétipos).
+    Jogadores sem arquétipo preenchido não entram.
+    """
+    created = 0
+    for chunk in _chunks(archetypes):
+        qs = TournamentPlayer.objects.filter(_scope_filter(season)).exclude(deck_archtype_name="")
+        stale = ArchetypeRanking.objects.filter(season=season)
+        if chunk is not None:
+            qs = qs.filter(deck_archtype_name__in=chunk)
+            stale = stale.filter(deck_archetype_name__in=chunk)
+
+        rows = (
+            qs.values("deck_archtype_name").order_by()
+            .annotate(
+                uses=Count("id"),
+                players=Count("player", distinct=True),
+                total_points=Sum("points"),
+                total_wins=Sum("wins"),
+                total_draws=Sum("draws"),
+                total_losses=Sum("losses"),
+            )
+        )
+        objs = [
+            ArchetypeRanking(
+                season=season,
+                deck_archetype_name=r["deck_archtype_name"],
+                uses=r["uses"],
+                players=r["players"],
+                total_points=r["total_points"] or 0,
+                total_wins=r["total_wins"] or 0,
+                total_draws=r["total_draws"] or 0,
+                total_losses=r["total_losses"] or 0,
+            )
+            for r in rows
+        ]
+        stale.delete()
+        ArchetypeRanking.objects.bulk_create(objs, batch_size=BULK_BATCH_SIZE)
+        created += len(objs)
+    return created
+
+
+@transaction.atomic
+def rebuild_rankings(seasons: Optional[Iterable[Season]] = None, overall: bool = True) -> Tuple[int, int]:
+    """
+    Recalcula do zero o ranking geral e o das temporadas (todas, se None).
+    Retorna (linhas de jogadores, linhas de arquétipos).
+    """
+    scopes: List[Optional[Season]] = [None] if overall else []
+    scopes += list(Season.objects.all() if seasons is None else seasons)
+    players = archetypes = 0
+    for season in scopes:
+        players += rebuild_player_ranking(season)
+        archetypes += rebuild_archetype_ranking(season)
+    return players, archetypes
+
+
+@transaction.atomic
+def update_rankings(players: Iterable[Tuple[date, int]] = (), archetypes: Iterable[Tuple[date, str]] = ()) -> None:
+    """
+    Atualização incremental: recebe (data do torneio, player_id) e (data do
+    torneio, arquétipo) que mudaram e reagrega só esses, no ranking geral e nas
+    temporadas que cobrem cada data.
+    """
+    players = {(d, n) for d, n in players if n}
+    archetypes = {(d, a) for d, a in archetypes if a}
+    dates = {d for d, _ in players} | {d for d, _ in archetypes}
+    if not dates:
+        return
+
+    seasons = Season.objects.filter(start_date__lte=max(dates), end_date__gte=min(dates))
+    scopes: Dict[Optional[Season], Tuple[Set[int], Set[str]]] = {
+        None: ({p for _, p in players}, {a for _, a in archetypes}),
+    }
+    for season in seasons:
+        ids = {p for d, p in players if season.start_date <= d <= season.end_date}
+        archs = {a for d, a in archetypes if season.start_date <= d <= season.end_date}
+        if ids or archs:
+            scopes[season] = (ids, archs)
+
+    for season, (ids, archs) in scopes.items():
+        if ids:
+            rebuild_player_ranking(season, ids)
+        if archs:
+            rebuild_archetype_ranking(season, archs)
+
+
+# ----------------------------
+# Fila (core.jobs, tipo RANKING_UPDATE em tournaments.jobs)
+# ----------------------------
+_pending = threading.local()
+
+
+def _state():
+    if getattr(_pending, "keys", None) is None:
+        _pending.keys = set()         # chaves acumuladas enquanto suspenso
+        _pending.dates = {}           # tournament_id -> data (evita 1 query por jogador)
+        _pending.suspended = 0
+    return _pending
+
+
+def ranking_keys(players: Iterable[Tuple[date, int]] = (), archetypes: Iterable[Tuple[date, str]] = ()) -> Set[str]:
+    keys = {f"p|{d.isoformat()}|{p}" for d, p in players if p}
+    keys.update(f"a|{d.isoformat()}|{a}" for d, a in archetypes if a)
+    return keys
+
+
+def parse_ranking_keys(keys: Iterable[str]) -> Tuple[Set[Tuple[date, int]], Set[Tuple[date, str]]]:
+    players, archetypes = set(), set()
+    for key in keys:
+        kind, day, value = key.split("|", 2)
+        if kind == "p":
+            players.add((date.fromisoformat(day), int(value)))
+        else:
+            archetypes.add((date.fromisoformat(day), value))
+    return players, archetypes
+
+
+def remember_tournament_date(tournament_id: int, value: date) -> None:
+    _state().dates[tournament_id] = value
+
+
+def forget_tournament_date(tournament_id: int) -> None:
+    _state().dates.pop(tournament_id, None)
+
+
+def tournament_date(tournament_id: int) -> Optional[date]:
+    state = _state()
+    if tournament_id in state.dates:
+        return state.dates[tournament_id]
+    value = Tournament.objects.filter(pk=tournament_id).values_list("date", flat=True).first()
+    # só guarda durante um bloco suspenso (importação): fora dele a data pode mudar
+    if state.suspended:
+        state.dates[tournament_id] = value
+    return value
+
+
+def schedule_ranking_update(
+    tournament_id: Optional[int],
+    player_ids: Iterable[Optional[int]] = (),
+    archetypes: Iterable[str] = (),
+    dates: Optional[Iterable[date]] = None,
+) -> None:
+    """
+    Enfileira jogadores/arquétipos de um torneio para reagregar quando a
+    transação terminar. `dates` substitui a data do torneio (ex.: data antiga e nova).
+    """
+    dates = [d for d in (dates if dates is not None else [tournament_date(tournament_id)]) if d]
+    player_ids = [p for p in player_ids if p]
+    archetypes = [a for a in archetypes if a]
+    keys = ranking_keys(
+        [(d, p) for d in dates for p in player_ids],
+        [(d, a) for d in dates for a in archetypes],
+    )
+    state = _state()
+    if state.suspended:
+        state.keys.update(keys)
+    else:
+        enqueue(RANKING_UPDATE, sorted(keys))
+
+
+@contextmanager
+def suspend_ranking_updates():
+    """
+    Acumula as atualizações de ranking do bloco (ex.: importação em lote) e
+    enfileira tudo de uma vez no fim (gravado no commit, se estiver numa transação).
+    """
+    state = _state()
+    state.suspended += 1
+    try:
+        yield
+    finally:
+        state.suspended -= 1
+        if not state.suspended:
+            keys, state.keys = state.keys, set()
+            state.dates.clear()
+            if keys:
+                enqueue(RANKING_UPDATE, sorted(keys))
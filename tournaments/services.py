@@ -0,0 +1,248 @@
+# tournaments/services.py
+from __future__ import annotations
+
+from typing import Dict, Iterable, List, Optional
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from decks.legality import violations_on
+
+from .live import bump_results_version
+from .models import Match, Round, Tournament, TournamentPlayer
+from .pairing import PairingPlayer, pair_round, suggested_rounds
+from .rankings import schedule_ranking_update
+from .tiebreakers import MatchGraph, as_percent
+
+MAX_GAMES = 2   # melhor de 3
+
+
+# ----------------------------
+# Standings: vitórias/empates/derrotas/pontos + OMW%/OOMW% (derivados das partidas)
+# ----------------------------
+STANDINGS_FIELDS = ["wins", "draws", "losses", "points", "omw", "oomw"]
+
+
+def match_graph(tournament: Tournament) -> MatchGraph:
+    """
+    Grafo das partidas CONFIRMED do torneio (1 query de partidas + 1 de jogadores).
+    """
+    rows = Match.objects.filter(tournament=tournament, status="CONFIRMED").values_list(
+        "player1_id", "player2_id", "score_p1", "score_p2"
+    )
+    return MatchGraph(
+        TournamentPlayer.objects.filter(tournament=tournament).values_list("id", flat=True),
+        rows,
+        win_points=tournament.win_points,
+        draw_points=tournament.draw_points,
+        loss_points=tournament.loss_points,
+    )
+
+
+def refresh_standings(tournament: Tournament, touched: Optional[Iterable[int]] = None) -> int:
+    """
+    Recalcula registro e desempates e grava tudo num bulk_update só.
+    `touched` = jogadores da(s) mesa(s) que mudaram: só eles, seus oponentes e
+    os oponentes dos oponentes são recalculados (None = torneio inteiro).
+    Torneios sem rodadas (resultado lançado à mão) ficam como estão.
+    Quem mudou é reagregado nos rankings e invalida a classificação ao vivo
+    (bulk_update não dispara sinais).
+    Retorna quantos jogadores mudaram.
+    """
+    if not Round.objects.filter(tournament=tournament).exists():
+        return 0
+
+    graph = match_graph(tournament)
+    affected = graph.affected(touched)
+
+    changed = []
+    for player in TournamentPlayer.objects.filter(id__in=affected).only(
+        "id", "player", "deck_archtype_name", *STANDINGS_FIELDS
+    ):
+        node = graph.nodes[player.id]
+        values = (
+            node.wins,
+            node.draws,
+            node.losses,
+            graph.points(player.id),
+            as_percent(graph.omw(player.id)),
+            as_percent(graph.oomw(player.id)),
+        )
+        if values != tuple(getattr(player, f) for f in STANDINGS_FIELDS):
+            for name, value in zip(STANDINGS_FIELDS, values):
+                setattr(player, name, value)
+            changed.append(player)
+
+    TournamentPlayer.objects.bulk_update(changed, STANDINGS_FIELDS, batch_size=500)
+    if changed:
+        bump_results_version(tournament.pk)
+        schedule_ranking_update(
+            tournament.pk,
+            player_ids=[p.player_id for p in changed],
+            archetypes=[p.deck_archtype_name for p in changed],
+        )
+    return len(changed)
+
+
+# ----------------------------
+# Decklists x regras vigentes na data do torneio
+# ----------------------------
+def illegal_decklists(tournament: Tournament) -> List[dict]:
+    """
+    Inscrições com deck vinculado que violam as regras (banlist, cópias,
+    pair ban) vigentes em tournament.date, não as de hoje.
+    Retorna [{"player": TournamentPlayer, "violations": [...]}] por nome.
+    """
+    entries = list(
+        TournamentPlayer.objects.filter(tournament=tournament, deck__isnull=False)
+        .only("id", "player_name", "deck_id")
+        .order_by("player_name")
+    )
+    if not entries:
+        return []
+    problems = violations_on([e.deck_id for e in entries], tournament.date)
+    return [
+        {"player": entry, "violations": problems[entry.deck_id]}
+        for entry in entries
+        if problems.get(entry.deck_id)
+    ]
+
+
+# ----------------------------
+# Rodadas (pareamento suíço)
+# ----------------------------
+def pairing_players(tournament: Tournament) -> List[PairingPlayer]:
+    """
+    Jogadores com pontos, oponentes já enfrentados e BYEs recebidos (2 queries).
+    """
+    opponents: Dict[int, set] = {}
+    byes = set()
+    for p1, p2 in Match.objects.filter(tournament=tournament).values_list("player1_id", "player2_id"):
+        if p2 is None:
+            byes.add(p1)
+        else:
+            opponents.setdefault(p1, set()).add(p2)
+            opponents.setdefault(p2, set()).add(p1)
+
+    return [
+        PairingPlayer(
+            id=pk,
+            points=points,
+            opponents=frozenset(opponents.get(pk, ())),
+            had_bye=pk in byes,
+        )
+        for pk, points in TournamentPlayer.objects.filter(tournament=tournament).values_list("id", "points")
+    ]
+
+
+@transaction.atomic
+def start_next_round(tournament: Tournament) -> Round:
+    """
+    Fecha a rodada atual e pareia a próxima. Levanta ValueError se ainda há
+    partidas sem resultado confirmado ou se o torneio já fez todas as rodadas.
+    """
+    tournament = Tournament.objects.select_for_update().get(pk=tournament.pk)
+    current = Round.objects.filter(tournament=tournament, number=tournament.current_round).first()
+
+    if current is not None:
+        pending = current.matches.exclude(status="CONFIRMED").count()
+        if pending:
+            raise ValueError(f"Ainda há {pending} partida(s) sem resultado confirmado na rodada {current.number}.")
+
+    players = pairing_players(tournament)
+    if len(players) < 2:
+        raise ValueError("São necessários pelo menos 2 jogadores para parear.")
+
+    if not tournament.total_rounds:
+        tournament.total_rounds = suggested_rounds(len(players))
+    if tournament.current_round >= tournament.total_rounds:
+        raise ValueError(f"O torneio já jogou as {tournament.total_rounds} rodadas.")
+
+    if current is not None and not current.is_finished:
+        current.is_finished = True
+        current.save(update_fields=["is_finished"])
+
+    number = tournament.current_round + 1
+    new_round = Round.objects.create(tournament=tournament, number=number, start_time=timezone.now())
+    pairings = pair_round(players, seed=tournament.pk * 1000 + number)
+
+    matches = [
+        Match(tournament=tournament, round=new_round, table_number=table, player1_id=p1, player2_id=p2)
+        for table, (p1, p2) in enumerate(pairings.pairs, start=1)
+    ]
+    if pairings.bye is not None:
+        matches.append(Match(
+            tournament=tournament,
+            round=new_round,
+            table_number=len(matches) + 1,
+            player1_id=pairings.bye,
+            score_p1=MAX_GAMES,
+            status="CONFIRMED",
+        ))
+    Match.objects.bulk_create(matches)
+
+    tournament.current_round = number
+    tournament.status = "RUNNING"
+    tournament.save(update_fields=["current_round", "total_rounds", "status"])
+
+    if pairings.bye is not None:
+        refresh_standings(tournament, touched=[pairings.bye])
+    return new_round
+
+
+# ----------------------------
+# Resultados
+# ----------------------------
+def _validate_scores(score_p1: int, score_p2: int) -> None:
+    if not (0 <= score_p1 <= MAX_GAMES and 0 <= score_p2 <= MAX_GAMES):
+        raise ValueError(f"Placar inválido: cada jogador vence de 0 a {MAX_GAMES} games.")
+    if score_p1 == score_p2 == MAX_GAMES:
+        raise ValueError(f"Placar inválido: {MAX_GAMES}x{MAX_GAMES}.")
+
+
+def player_matches(player: TournamentPlayer):
+    return Match.objects.filter(Q(player1=player) | Q(player2=player))
+
+
+def report_result(match: Match, player: TournamentPlayer, my_score: int, opp_score: int, user) -> Match:
+    """
+    Um dos jogadores informa o placar (do ponto de vista dele); o oponente confirma.
+    """
+    if match.status not in ("PENDING", "SUBMITTED") or match.is_bye:
+        raise ValueError("Esta partida não aceita novo resultado.")
+    _validate_scores(my_score, opp_score)
+
+    if player.pk == match.player1_id:
+        match.score_p1, match.score_p2 = my_score, opp_score
+    else:
+        match.score_p1, match.score_p2 = opp_score, my_score
+    match.status = "SUBMITTED"
+    match.submitted_by = user
+    match.save(update_fields=["score_p1", "score_p2", "status", "submitted_by", "updated_at"])
+    return match
+
+
+def confirm_result(match: Match) -> Match:
+    match.status = "CONFIRMED"
+    match.save(update_fields=["status", "updated_at"])
+    refresh_standings(match.tournament, touched=[match.player1_id, match.player2_id])
+    return match
+
+
+def dispute_result(match: Match) -> Match:
+    match.status = "DISPUTED"
+    match.save(update_fields=["status", "updated_at"])
+    return match
+
+
+def set_result(match: Match, score_p1: int, score_p2: int) -> Match:
+    """
+    Organizador lança/corrige o placar: a partida já sai confirmada.
+    """
+    _validate_scores(score_p1, score_p2)
+    match.score_p1, match.score_p2 = score_p1, score_p2
+    match.status = "CONFIRMED"
+    match.save(update_fields=["score_p1", "score_p2", "status", "updated_at"])
+    refresh_standings(match.tournament, touched=[match.player1_id, match.player2_id])
+    return match
@@ -0,0 +1,110 @@
+# tournaments/signals.py
+from __future__ import annotations
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .jobs import schedule_season_rebuild
+from .live import bump_results_version
+from .models import Player, Season, Tournament, TournamentPlayer
+from .players import resolve_player, sync_ranking_names
+from .rankings import (
+    forget_tournament_date,
+    remember_tournament_date,
+    schedule_ranking_update,
+)
+
+
+# ----------------------------
+# Jogador inscrito / resultado lançado: liga ao Player e reagrega jogador e arquétipo
+# ----------------------------
+@receiver(pre_save, sender=TournamentPlayer)
+def player_before_save(sender, instance, **kwargs):
+    old = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("player_id", "player_name", "user_id", "deck_archtype_name").first()
+        if instance.pk else None
+    )
+    old_player, old_name, old_user, old_archetype = old or (None, "", None, "")
+    # nome/usuário trocados (correção no admin): o Player é resolvido de novo
+    if instance.player_id is None or (old and (old_name, old_user) != (instance.player_name, instance.user_id)):
+        instance.player = resolve_player(instance.player_name, instance.user)
+    instance._old_ranking_keys = (old_player, old_archetype)
+
+
+@receiver(post_save, sender=TournamentPlayer)
+def player_saved(sender, instance, **kwargs):
+    old_player, old_archetype = getattr(instance, "_old_ranking_keys", (None, ""))
+    bump_results_version(instance.tournament_id)
+    schedule_ranking_update(
+        instance.tournament_id,
+        player_ids=[instance.player_id, old_player],
+        archetypes=[instance.deck_archtype_name, old_archetype],
+    )
+
+
+@receiver(post_delete, sender=TournamentPlayer)
+def player_deleted(sender, instance, **kwargs):
+    bump_results_version(instance.tournament_id)
+    schedule_ranking_update(
+        instance.tournament_id,
+        player_ids=[instance.player_id],
+        archetypes=[instance.deck_archtype_name],
+    )
+
+
+@receiver(post_save, sender=Player)
+def canonical_player_saved(sender, instance, created, **kwargs):
+    # nome de exibição corrigido: os rankings guardam uma cópia
+    if not created:
+        sync_ranking_names(instance)
+
+
+# ----------------------------
+# Torneio mudou de data: sai das temporadas antigas e entra nas novas
+# ----------------------------
+@receiver(pre_save, sender=Tournament)
+def tournament_before_save(sender, instance, **kwargs):
+    instance._old_date = (
+        sender.objects.filter(pk=instance.pk).values_list("date", flat=True).first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Tournament)
+def tournament_saved(sender, instance, created, **kwargs):
+    # status/rodada/nome aparecem na classificação ao vivo
+    bump_results_version(instance.pk)
+    old_date = getattr(instance, "_old_date", None)
+    if created or old_date is None or old_date == instance.date:
+        return
+    rows = list(TournamentPlayer.objects.filter(tournament=instance).values_list("player_id", "deck_archtype_name"))
+    if rows:
+        player_ids, archetypes = zip(*rows)
+        schedule_ranking_update(instance.pk, player_ids, archetypes, dates=[old_date, instance.date])
+
+
+@receiver(pre_delete, sender=Tournament)
+def tournament_before_delete(sender, instance, **kwargs):
+    # guarda a data para os post_delete dos jogadores em cascata (sem 1 query por jogador)
+    remember_tournament_date(instance.pk, instance.date)
+
+
+@receiver(post_delete, sender=Tournament)
+def tournament_deleted(sender, instance, **kwargs):
+    forget_tournament_date(instance.pk)
+
+
+# ----------------------------
+# Temporada criada / período alterado: o worker recalcula só ela (apagar = CASCADE)
+# ----------------------------
+@receiver(pre_save, sender=Season)
+def season_before_save(sender, instance, **kwargs):
+    instance._old_period = (
+        sender.objects.filter(pk=instance.pk).values_list("start_date", "end_date").first() if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Season)
+def season_saved(sender, instance, **kwargs):
+    if getattr(instance, "_old_period", None) != (instance.start_date, instance.end_date):
+        schedule_season_rebuild([instance.pk])
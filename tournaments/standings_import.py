@@ -0,0 +1,430 @@
+# tournaments/standings_import.py
+"""
+Importação em lote do resultado final de um torneio (export do Bandai TCG+ ou
+planilha no mesmo formato), no lugar de digitar jogador por jogador no admin.
+
+Aceita CSV (vírgula, ponto e vírgula ou tab) ou JSON (lista de objetos, ou
+{"standings": [...]}) com cabeçalhos em inglês ou português. Por linha:
+jogador, ID Bandai, V/E/D (ou "record" 3-1-0), pontos, OMW%/OOMW%, arquétipo e,
+opcionalmente, o ID de um deck do Hub ou a decklist em texto.
+
+Tudo roda numa transação: jogadores e inscrições via bulk upsert, decks via
+bulk_create, pontos de fidelidade e um único recálculo de ranking (enfileirado no commit).
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from typing import IO, Dict, Iterable, List, Optional, Set, Union
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Sum
+
+from decks.bulk_import import bulk_create_decks, deck_text
+from decks.bulk_parse import ParsedDecklist, parse_entry
+from decks.jobs import schedule_refresh
+from decks.models import Archetype, Deck
+from loyalty.models import LoyaltyEvent
+
+from .jobs import schedule_archetype_classification
+from .live import bump_results_version
+from .models import Player, Tournament, TournamentPlayer
+from .players import display_name, name_key, resolve_players
+from .rankings import schedule_ranking_update, suspend_ranking_updates
+
+# fidelidade por torneio importado (só para jogadores ligados a um usuário)
+LOYALTY_PARTICIPATION_POINTS = 10
+LOYALTY_WIN_POINTS = 5
+
+UPSERT_BATCH_SIZE = 500
+
+StandingsSource = Union[str, bytes, IO]
+
+# cabeçalho normalizado (name_key) -> campo
+HEADER_ALIASES = {
+    "rank": ("rank", "ranking", "position", "posicao", "place", "colocacao", "standing"),
+    "player_name": ("player", "player name", "name", "nome", "jogador", "user name", "username", "nickname"),
+    "bandai_id": ("member number", "member id", "membership number", "bandai id", "bandai", "id bandai", "player id"),
+    "wins": ("wins", "win", "w", "vitorias", "vit", "v"),
+    "draws": ("draws", "draw", "ties", "d", "empates", "emp", "e"),
+    "losses": ("losses", "loss", "l", "derrotas", "der"),
+    "record": ("record", "w l d", "win loss draw", "match record", "v d e", "campanha"),
+    "points": ("points", "pts", "match points", "pontos"),
+    "omw": ("omw", "omw %", "opp match win", "opponents match win", "opp mw", "opponent match win"),
+    "oomw": ("oomw", "oomw %", "opp opp match win", "opponents opponents match win", "oppopp mw"),
+    "archetype": ("archetype", "deck", "deck name", "arquetipo", "deck archetype"),
+    "deck_id": ("deck id", "hub deck", "hub deck id"),
+    "decklist": ("decklist", "deck list", "lista", "list"),
+}
+_FIELD_BY_HEADER = {alias: name for name, aliases in HEADER_ALIASES.items() for alias in aliases}
+
+
+@dataclass
+class StandingRow:
+    player_name: str
+    bandai_id: str = ""
+    rank: Optional[int] = None
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    points: Optional[int] = None
+    omw: float = 0.0
+    oomw: float = 0.0
+    archetype: str = ""
+    deck_id: Optional[int] = None
+    decklist: str = ""
+
+
+@dataclass
+class StandingsImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    removed: int = 0
+    players_created: int = 0
+    decks_linked: int = 0
+    decks_created: int = 0
+    loyalty_events: int = 0
+    warnings: List[str] = field(default_factory=list)
+
+
+# ----------------------------
+# Leitura
+# ----------------------------
+def _int(value, default=0) -> int:
+    try:
+        return int(float(str(value).strip()))
+    except (TypeError, ValueError):
+        return default
+
+
+def _percent(value) -> float:
+    """
+    "55.5%", "55,5" ou 0.555 -> 55.5 (o Hub guarda OMW%/OOMW% em 0-100).
+    """
+    text = str(value or "").strip().rstrip("%").replace(",", ".")
+    try:
+        number = float(text)
+    except ValueError:
+        return 0.0
+    return round(number * 100 if 0 < number <= 1 else number, 2)
+
+
+def _row_from_mapping(raw: Dict[str, object]) -> Optional[StandingRow]:
+    data = {}
+    for header, value in raw.items():
+        name = _FIELD_BY_HEADER.get(name_key(str(header)))
+        if name and name not in data:
+            data[name] = value
+
+    player_name = display_name(str(data.get("player_name") or ""))
+    if not player_name:
+        return None
+
+    row = StandingRow(
+        player_name=player_name,
+        bandai_id=str(data.get("bandai_id") or "").strip()[:50],
+        rank=_int(data["rank"], None) if data.get("rank") not in (None, "") else None,
+        wins=_int(data.get("wins")),
+        draws=_int(data.get("draws")),
+        losses=_int(data.get("losses")),
+        points=_int(data["points"], None) if data.get("points") not in (None, "") else None,
+        omw=_percent(data.get("omw")),
+        oomw=_percent(data.get("oomw")),
+        archetype=display_name(str(data.get("archetype") or "")),
+        deck_id=_int(data["deck_id"], None) if data.get("deck_id") not in (None, "") else None,
+        decklist=deck_text(data.get("decklist") or ""),
+    )
+    # "3-1-0" = vitórias-derrotas-empates (ordem do Bandai TCG+)
+    record = str(data.get("record") or "").replace("/", "-").split("-")
+    if len(record) >= 2 and not (row.wins or row.losses or row.draws):
+        row.wins, row.losses = _int(record[0]), _int(record[1])
+        row.draws = _int(record[2]) if len(record) > 2 else 0
+    return row
+
+
+def parse_standings(source: StandingsSource, fmt: Optional[str] = None) -> List[StandingRow]:
+    """
+    Lê o export (texto, bytes ou arquivo) em CSV ou JSON (detectado pelo
+    primeiro caractere, ou forçado com fmt="csv"/"json"). Linhas sem nome de
+    jogador são ignoradas. Levanta ValueError se a entrada não puder ser lida.
+    """
+    if hasattr(source, "read"):
+        source = source.read()
+    if isinstance(source, bytes):
+        source = source.decode("utf-8-sig", errors="replace")
+    text = source.lstrip("\ufeff")
+    fmt = fmt or ("json" if text.lstrip()[:1] in ("[", "{") else "csv")
+
+    if fmt == "json":
+        try:
+            data = json.loads(text)
+        except ValueError as exc:
+            raise ValueError(f"JSON inválido: {exc}") from exc
+        if isinstance(data, dict):
+            data = next((data[k] for k in ("standings", "players", "results", "data") if k in data), None)
+        if not isinstance(data, list):
+            raise ValueError("JSON sem lista de jogadores (use uma lista ou {\"standings\": [...]}).")
+        records: Iterable[Dict] = (r for r in data if isinstance(r, dict))
+    elif fmt == "csv":
+        sample = text[:4096]
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.DictReader(io.StringIO(text), dialect=dialect)
+        if not reader.fieldnames or not any(_FIELD_BY_HEADER.get(name_key(h)) == "player_name" for h in reader.fieldnames):
+            raise ValueError("CSV sem coluna de jogador (ex: Player, Nome, Jogador).")
+        records = reader
+    else:
+        raise ValueError(f"Formato desconhecido: {fmt}")
+
+    rows = [row for row in map(_row_from_mapping, records) if row is not None]
+    if not rows:
+        raise ValueError("Nenhum jogador encontrado no arquivo.")
+    return rows
+
+
+# ----------------------------
+# Gravação
+# ----------------------------
+def _resolve_row_players(rows: List[StandingRow], result: StandingsImportResult) -> Dict[int, Player]:
+    """
+    Linha -> Player: pelo ID Bandai quando houver, senão pelo nome (aliases).
+    O ID Bandai tem prioridade: um ID novo cujo nome cai num Player que já tem
+    outro ID é outra pessoa com o mesmo nome e ganha um Player próprio.
+    IDs Bandai novos são gravados no Player.
+    """
+    by_bandai = {
+        p.bandai_id: p
+        for p in Player.objects.filter(bandai_id__in=[r.bandai_id for r in rows if r.bandai_id])
+    }
+    before = Player.objects.count()
+    by_name = resolve_players(r.player_name for r in rows if not (r.bandai_id and r.bandai_id in by_bandai))
+    result.players_created = Player.objects.count() - before
+
+    players: Dict[int, Player] = {}
+    tag, homonyms = [], []
+    for i, row in enumerate(rows):
+        player = by_bandai.get(row.bandai_id) if row.bandai_id else None
+        if player is None:
+            player = by_name[name_key(row.player_name)]
+            if row.bandai_id and player.bandai_id and player.bandai_id != row.bandai_id:
+                # homônimo: sem alias (o nome continua levando ao Player original)
+                player = Player(name=row.player_name, bandai_id=row.bandai_id)
+                homonyms.append(player)
+                by_bandai[row.bandai_id] = player
+            elif row.bandai_id and not player.bandai_id:
+                player.bandai_id = row.bandai_id
+                by_bandai[row.bandai_id] = player
+                tag.append(player)
+        players[i] = player
+    Player.objects.bulk_update(tag, ["bandai_id"], batch_size=UPSERT_BATCH_SIZE)
+    Player.objects.bulk_create(homonyms, batch_size=UPSERT_BATCH_SIZE)
+    result.players_created += len(homonyms)
+    return players
+
+
+def _entry_name(row: StandingRow, taken: Set[str]) -> str:
+    """
+    Nome da inscrição, único no torneio (unique torneio + nome): homônimos
+    levam o ID Bandai (ou um número) junto.
+    """
+    name = row.player_name
+    suffixes = ([row.bandai_id] if row.bandai_id else []) + [str(n) for n in range(2, 1000)]
+    for suffix in suffixes:
+        if name not in taken:
+            break
+        tail = f" ({suffix})"
+        name = row.player_name[:120 - len(tail)] + tail
+    taken.add(name)
+    return name
+
+
+def _canonical_archetypes(rows: List[StandingRow]) -> Dict[str, str]:
+    """
+    Nome digitado -> nome do catálogo de arquétipos (sem caixa/acento).
+    Nomes fora do catálogo ficam como vieram.
+    """
+    catalog = {name_key(name): name for name in Archetype.objects.values_list("name", flat=True)}
+    return {r.archetype: catalog.get(name_key(r.archetype), r.archetype)[:120] for r in rows if r.archetype}
+
+
+def _link_decks(
+    tournament: Tournament,
+    rows: List[StandingRow],
+    players: Dict[int, Player],
+    deck_owner,
+    result: StandingsImportResult,
+) -> Dict[int, Deck]:
+    """
+    Linha -> Deck: ID de deck do Hub (precisa existir) ou decklist em texto,
+    criada no usuário do jogador ou, sem usuário, no `deck_owner`.
+    """
+    decks: Dict[int, Deck] = {}
+    wanted_ids = {r.deck_id for r in rows if r.deck_id}
+    existing = Deck.objects.in_bulk(wanted_ids) if wanted_ids else {}
+
+    users = User.objects.in_bulk({p.user_id for p in players.values() if p.user_id})
+    to_create: Dict[object, List[int]] = {}
+    parsed: Dict[int, ParsedDecklist] = {}
+    for i, row in enumerate(rows):
+        if row.deck_id:
+            if row.deck_id in existing:
+                decks[i] = existing[row.deck_id]
+            else:
+                result.warnings.append(f"{row.player_name}: deck #{row.deck_id} não existe")
+            continue
+        if not row.decklist.strip():
+            continue
+        owner = users.get(players[i].user_id) or deck_owner
+        if owner is None:
+            result.warnings.append(f"{row.player_name}: decklist ignorada (jogador sem usuário e sem dono padrão)")
+            continue
+        entry = parse_entry((row.player_name, row.player_name, "", row.archetype, row.decklist))
+        if entry.error or not entry.lines:
+            result.warnings.append(f"{row.player_name}: decklist inválida ({entry.error or 'vazia'})")
+            continue
+        parsed[i] = entry
+        to_create.setdefault(owner, []).append(i)
+
+    for owner, indexes in to_create.items():
+        created = bulk_create_decks(owner, [parsed[i] for i in indexes], default_name=tournament.name).decks
+        decks.update(zip(indexes, created))
+        result.decks_created += len(created)
+
+    result.decks_linked = len(decks)
+    return decks
+
+
+def _award_loyalty(tournament: Tournament, entries: List[TournamentPlayer], result: StandingsImportResult) -> None:
+    """
+    Pontos de fidelidade do torneio por usuário. Reimportar o mesmo torneio só
+    lança a diferença (positiva ou negativa) em relação ao que já foi dado.
+    """
+    marker = f"Torneio #{tournament.pk}: "
+    target: Dict[int, int] = {}
+    for tp in entries:
+        if tp.player.user_id:
+            target[tp.player.user_id] = LOYALTY_PARTICIPATION_POINTS + LOYALTY_WIN_POINTS * tp.wins
+
+    given = dict(
+        LoyaltyEvent.objects.filter(tipo=LoyaltyEvent.TORNEIO, descricao__startswith=marker)
+        .values("user_id").order_by().annotate(total=Sum("pontos")).values_list("user_id", "total")
+    )
+    events = [
+        LoyaltyEvent(
+            user_id=user_id,
+            tipo=LoyaltyEvent.TORNEIO,
+            pontos=points - given.get(user_id, 0),
+            descricao=(marker + tournament.name)[:255],
+        )
+        for user_id, points in target.items()
+        if points != given.get(user_id, 0)
+    ]
+    LoyaltyEvent.objects.bulk_create(events, batch_size=UPSERT_BATCH_SIZE)
+    result.loyalty_events = len(events)
+
+
+def import_standings(
+    tournament: Tournament,
+    rows: List[StandingRow],
+    deck_owner=None,
+    replace: bool = False,
+    award_loyalty: bool = True,
+    finish: bool = True,
+) -> StandingsImportResult:
+    """
+    Cria/atualiza as inscrições do torneio a partir das linhas do export.
+    replace=True remove quem não está no arquivo. finish=True marca o torneio
+    como finalizado. Rankings são enfileirados uma vez, no commit (worker).
+    """
+    result = StandingsImportResult(rows=len(rows))
+    created_decks: List[int] = []
+
+    with transaction.atomic(), suspend_ranking_updates():
+        players = _resolve_row_players(rows, result)
+        archetypes = _canonical_archetypes(rows)
+        decks = _link_decks(tournament, rows, players, deck_owner, result)
+        created_decks = [d.pk for i, d in decks.items() if not rows[i].deck_id]
+
+        current = {tp.player_id: tp for tp in TournamentPlayer.objects.filter(tournament=tournament)}
+        old_archetypes = {tp.deck_archtype_name for tp in current.values()}
+        # nomes já usados por inscrições (de outros jogadores) do torneio
+        taken = {tp.player_name for tp in current.values()}
+
+        entries: Dict[int, TournamentPlayer] = {}
+        for i, row in enumerate(rows):
+            player = players[i]
+            if player.pk in entries:
+                result.warnings.append(f"{row.player_name}: jogador repetido no arquivo (mantida a 1ª linha)")
+                continue
+            existing = current.get(player.pk)
+            points = row.points
+            if points is None:
+                points = (
+                    row.wins * tournament.win_points
+                    + row.draws * tournament.draw_points
+                    + row.losses * tournament.loss_points
+                )
+            entries[player.pk] = TournamentPlayer(
+                tournament=tournament,
+                player=player,
+                # mesmo nome da inscrição que já existe: o upsert casa pela unique (torneio, nome)
+                player_name=existing.player_name if existing else _entry_name(row, taken),
+                user_id=player.user_id or (existing.user_id if existing else None),
+                deck_id=decks[i].pk if i in decks else (existing.deck_id if existing else None),
+                deck_archtype_name=archetypes.get(row.archetype, "")
+                or (existing.deck_archtype_name if existing else ""),
+                wins=row.wins,
+                draws=row.draws,
+                losses=row.losses,
+                points=points,
+                omw=row.omw,
+                oomw=row.oomw,
+            )
+            if existing:
+                result.updated += 1
+            else:
+                result.created += 1
+
+        TournamentPlayer.objects.bulk_create(
+            list(entries.values()),
+            batch_size=UPSERT_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["tournament", "player_name"],
+            update_fields=[
+                "player", "user", "deck", "deck_archtype_name",
+                "wins", "draws", "losses", "points", "omw", "oomw",
+            ],
+        )
+
+        gone = [pk for pk in current if pk not in entries]
+        if replace and gone:
+            result.removed, _ = TournamentPlayer.objects.filter(tournament=tournament, player_id__in=gone).delete()
+
+        if finish and tournament.status != "FINISHED":
+            tournament.status = "FINISHED"
+            tournament.save(update_fields=["status"])
+
+        if award_loyalty:
+            _award_loyalty(tournament, list(entries.values()), result)
+
+        # bulk_create não dispara sinais: agenda os rankings aqui (1 recálculo no fim)
+        bump_results_version(tournament.pk)
+        schedule_ranking_update(
+            tournament.pk,
+            player_ids=set(entries) | set(current),
+            archetypes={tp.deck_archtype_name for tp in entries.values()} | old_archetypes,
+        )
+
+        if created_decks:
+            schedule_refresh(created_decks)
+        if decks:
+            # inscrições com deck e sem arquétipo no export: classificadas pelo worker
+            schedule_archetype_classification([tournament.pk])
+
+    return result
@@ -1 +1,438 @@
-from django.test import TestCase
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from cards.models import BanlistRule, CardCopyRule, DigimonCard
+from core.jobs import run_pending
+from core.models import PendingJob
+from decks.card_index import rebuild_card_index
+from decks.models import Archetype, Deck, DeckCard
+from decks.rules import bump_rules_version
+from decks.similarity import publish_matrix
+from loyalty.models import LoyaltyEvent
+
+from .jobs import RANKING_UPDATE, SEASON_REBUILD, _classify_archetypes
+from .models import ArchetypeRanking, Match, Player, PlayerRanking, Season, Tournament, TournamentPlayer
+from .pairing import PairingPlayer, pair_round
+from .players import merge_players, name_key, resolve_player, similar_players
+from .services import illegal_decklists, refresh_standings, set_result, start_next_round
+from .standings_import import import_standings, parse_standings
+from .tiebreakers import MatchGraph, as_percent
+
+
+class IllegalDecklistsTests(TestCase):
+    """
+    Decks das inscrições validados com a banlist vigente na data do torneio.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user("tamer")
+        card = DigimonCard.objects.create(cardnumber="BT1-010", name="Agumon", card_type="Digimon")
+        cls.deck = Deck.objects.create(user=user, nome="Red")
+        DeckCard.objects.create(deck=cls.deck, card=card, quantidade=50)
+        CardCopyRule.objects.create(cardnumber="BT1-010", max_copies=50)
+        BanlistRule.objects.create(cardnumber="BT1-010", effective_from=date(2026, 3, 1))
+
+    def setUp(self):
+        # o bump das regras roda no commit, que o TestCase nunca faz
+        bump_rules_version()
+
+    def _tournament(self, day):
+        tournament = Tournament.objects.create(name="Semanal", game="DIGIMON", date=day)
+        TournamentPlayer.objects.create(tournament=tournament, player_name="Tai", deck=self.deck)
+        TournamentPlayer.objects.create(tournament=tournament, player_name="Sem deck")
+        return tournament
+
+    def test_uses_rules_in_force_on_tournament_date(self):
+        self.assertEqual(illegal_decklists(self._tournament(date(2026, 2, 1))), [])
+
+        [item] = illegal_decklists(self._tournament(date(2026, 3, 1)))
+        self.assertEqual(item["player"].player_name, "Tai")
+        self.assertIn("BT1-010 está proibida pela banlist.", item["violations"])
+
+
+class ArchetypeClassificationTests(TestCase):
+    """
+    Inscrições com deck e sem arquétipo recebem o arquétipo mais próximo
+    (matriz de similaridade montada fora do request).
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user("tamer")
+        cls.red = Archetype.objects.create(name="Red Hybrid")
+        cls.cards = {
+            cn: DigimonCard.objects.create(cardnumber=cn, name=cn, card_type="Digimon")
+            for cn in ("BT1-010", "BT1-011", "BT2-050", "BT2-051")
+        }
+        reference = Deck.objects.create(user=cls.user, nome="Referência", arquetipo=cls.red)
+        cls._fill(reference, {"BT1-010": 4, "BT1-011": 4})
+        rebuild_card_index([reference.pk])
+
+    @classmethod
+    def _fill(cls, deck, counts):
+        for cn, qty in counts.items():
+            DeckCard.objects.create(deck=deck, card=cls.cards[cn], codigo_carta=cn, quantidade=qty)
+
+    def test_blank_archetypes_are_filled_above_threshold(self):
+        publish_matrix()
+        tournament = Tournament.objects.create(name="Semanal", game="DIGIMON", date=date(2026, 3, 1))
+        close = Deck.objects.create(user=self.user, nome="Parecido")
+        self._fill(close, {"BT1-010": 4, "BT1-011": 3})
+        far = Deck.objects.create(user=self.user, nome="Outro")
+        self._fill(far, {"BT2-050": 4, "BT2-051": 4})
+        TournamentPlayer.objects.create(tournament=tournament, player_name="Tai", deck=close)
+        TournamentPlayer.objects.create(tournament=tournament, player_name="Matt", deck=far)
+        TournamentPlayer.objects.create(tournament=tournament, player_name="Sora", deck=close, deck_archtype_name="Outro")
+
+        _classify_archetypes([str(tournament.pk)])
+
+        names = dict(TournamentPlayer.objects.filter(tournament=tournament).values_list("player_name", "deck_archtype_name"))
+        self.assertEqual(names, {"Tai": "Red Hybrid", "Matt": "", "Sora": "Outro"})
+
+
+class RankingJobTests(TestCase):
+    """
+    Resultados salvos só enfileiram a reagregação; o worker atualiza os rankings.
+    """
+
+    def test_results_are_aggregated_by_the_worker(self):
+        ana = Player.objects.create(name="Ana")
+        first = Tournament.objects.create(name="Semanal", game="DIGIMON", date=date(2026, 3, 1))
+        second = Tournament.objects.create(name="Semanal", game="DIGIMON", date=date(2026, 3, 8))
+        with self.captureOnCommitCallbacks(execute=True):
+            # o mesmo jogador digitado de dois jeitos conta uma vez no arquétipo
+            TournamentPlayer.objects.create(
+                tournament=first, player=ana, player_name="Ana", deck_archtype_name="Red", points=9
+            )
+            TournamentPlayer.objects.create(
+                tournament=second, player=ana, player_name="ana s.", deck_archtype_name="Red", points=6
+            )
+
+        self.assertFalse(PlayerRanking.objects.exists())
+        self.assertEqual(
+            set(PendingJob.objects.filter(kind=RANKING_UPDATE).values_list("key", flat=True)),
+            {f"p|2026-03-01|{ana.pk}", f"p|2026-03-08|{ana.pk}", "a|2026-03-01|Red", "a|2026-03-08|Red"},
+        )
+
+        run_pending([RANKING_UPDATE])
+
+        self.assertEqual(PlayerRanking.objects.get(season=None, player=ana).total_points, 15)
+        red = ArchetypeRanking.objects.get(season=None, deck_archetype_name="Red")
+        self.assertEqual((red.uses, red.players), (2, 1))
+
+    def test_new_season_is_built_by_the_worker(self):
+        tournament = Tournament.objects.create(name="Semanal", game="DIGIMON", date=date(2026, 3, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            TournamentPlayer.objects.create(tournament=tournament, player_name="Tai", deck_archtype_name="Red")
+        with self.captureOnCommitCallbacks(execute=True):
+            season = Season.objects.create(
+                name="2026", slug="2026", start_date=date(2026, 1, 1), end_date=date(2026, 12, 31)
+            )
+        self.assertFalse(ArchetypeRanking.objects.filter(season=season).exists())
+
+        run_pending([SEASON_REBUILD])
+
+        self.assertEqual(ArchetypeRanking.objects.get(season=season, deck_archetype_name="Red").uses, 1)
+
+
+class LiveStandingsTests(TestCase):
+    """
+    Short poll da classificação: 304 pelo ETag enquanto nenhum resultado muda.
+    """
+
+    def test_etag_changes_only_with_results(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            tournament = Tournament.objects.create(name="Semanal", game="DIGIMON", date=date(2026, 3, 1))
+        url = reverse("tournament_standings_json", kwargs={"pk": tournament.pk})
+
+        resp = self.client.get(url)
+        self.assertEqual(resp.status_code, 200)
+        etag = resp["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            TournamentPlayer.objects.create(tournament=tournament, player_name="Tai", points=3)
+
+        resp = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual([p["player_name"] for p in resp.json()["players"]], ["Tai"])
+
+
+class StandingsParseTests(TestCase):
+    """
+    Leitura do export (CSV/JSON): aliases de cabeçalho, campanha e percentuais.
+    """
+
+    def test_csv_with_aliases_record_and_percent(self):
+        rows = parse_standings(
+            "Posição;Jogador;Member Number;Campanha;OMW %;OOMW %;Deck\n"
+            "1;  João   Silva ;0001;3-1-0;62,5%;0.55;Red Hybrid\n"
+            ";;;;;;\n"
+        )
+        self.assertEqual(len(rows), 1)
+        row = rows[0]
+        self.assertEqual((row.rank, row.player_name, row.bandai_id), (1, "João Silva", "0001"))
+        self.assertEqual((row.wins, row.losses, row.draws), (3, 1, 0))
+        self.assertEqual((row.omw, row.oomw), (62.5, 55.0))
+        self.assertEqual(row.archetype, "Red Hybrid")
+        self.assertIsNone(row.points)
+
+    def test_json_wrapped_list(self):
+        rows = parse_standings(
+            '{"standings": [{"player": "Tai", "wins": 2, "losses": 1, "points": 6, "bandai id": "9"}, {"wins": 1}]}'
+        )
+        self.assertEqual([(r.player_name, r.wins, r.losses, r.points, r.bandai_id) for r in rows], [("Tai", 2, 1, 6, "9")])
+
+    def test_unreadable_sources_raise(self):
+        with self.assertRaises(ValueError):
+            parse_standings("Foo,Bar\n1,2\n")
+        with self.assertRaises(ValueError):
+            parse_standings('{"outra": 1}')
+        with self.assertRaises(ValueError):
+            parse_standings("[1, 2")
+
+
+class StandingsImportTests(TestCase):
+    """
+    Gravação do export: upsert, replace, fidelidade por diferença e homônimos
+    separados pelo ID Bandai.
+    """
+
+    def setUp(self):
+        self.tournament = Tournament.objects.create(name="Regional", game="DIGIMON", date=date(2026, 3, 1))
+
+    def _import(self, text, **kwargs):
+        return import_standings(self.tournament, parse_standings(text), **kwargs)
+
+    def test_same_name_different_bandai_ids_are_two_players(self):
+        result = self._import("Player,Member Number,Record\nJoao Silva,111,3-0\nJoao Silva,222,2-1\n")
+
+        self.assertEqual(result.warnings, [])
+        entries = {tp.player.bandai_id: tp for tp in TournamentPlayer.objects.filter(tournament=self.tournament)}
+        self.assertEqual(set(entries), {"111", "222"})
+        self.assertEqual(entries["111"].player_name, "Joao Silva")
+        self.assertEqual(entries["222"].player_name, "Joao Silva (222)")
+        self.assertNotEqual(entries["111"].player_id, entries["222"].player_id)
+
+        # reimportar casa pelos IDs e mantém as duas inscrições
+        result = self._import("Player,Member Number,Record\nJoao Silva,222,3-0\nJoao Silva,111,2-1\n")
+        self.assertEqual((result.created, result.updated), (0, 2))
+        wins = dict(TournamentPlayer.objects.filter(tournament=self.tournament).values_list("player__bandai_id", "wins"))
+        self.assertEqual(wins, {"111": 2, "222": 3})
+
+    def test_reimport_updates_and_replace_removes(self):
+        self._import("Player,W,L,D\nTai,3,0,0\nMatt,1,2,0\n")
+        result = self._import("Player,W,L,D\nTai,2,1,0\n")
+        self.assertEqual((result.created, result.updated, result.removed), (0, 1, 0))
+        self.assertEqual(TournamentPlayer.objects.filter(tournament=self.tournament).count(), 2)
+        self.assertEqual(TournamentPlayer.objects.get(tournament=self.tournament, player_name="Tai").points, 6)
+
+        result = self._import("Player,W,L,D\nTai,2,1,0\n", replace=True)
+        self.assertEqual(result.removed, 1)
+        self.assertEqual(list(TournamentPlayer.objects.filter(tournament=self.tournament).values_list("player_name", flat=True)), ["Tai"])
+        self.tournament.refresh_from_db()
+        self.assertEqual(self.tournament.status, "FINISHED")
+
+    def test_loyalty_is_topped_up_by_difference(self):
+        user = User.objects.create_user("tai")
+        Player.objects.create(name="Tai", user=user, bandai_id="7")
+
+        self._import("Player,Member Number,W\nTai,7,2\n")
+        self._import("Player,Member Number,W\nTai,7,2\n")
+        self.assertEqual(sum(LoyaltyEvent.objects.filter(user=user).values_list("pontos", flat=True)), 20)
+
+        result = self._import("Player,Member Number,W\nTai,7,3\n")
+        self.assertEqual(result.loyalty_events, 1)
+        self.assertEqual(list(LoyaltyEvent.objects.filter(user=user).values_list("pontos", flat=True).order_by("id")), [20, 5])
+
+
+class PairingTests(SimpleTestCase):
+    """
+    Pareamento suíço puro (sem banco).
+    """
+
+    @staticmethod
+    def _players(*specs):
+        # (id, pontos, oponentes, já teve BYE?)
+        return [PairingPlayer(id=pk, points=pts, opponents=frozenset(opp), had_bye=bye) for pk, pts, opp, bye in specs]
+
+    def test_avoids_rematch_when_possible(self):
+        players = self._players((1, 3, {2}, False), (2, 3, {1}, False), (3, 0, set(), False), (4, 0, set(), False))
+        result = pair_round(players, seed=7)
+        self.assertEqual(result.rematches, 0)
+        self.assertIsNone(result.bye)
+        self.assertNotIn({1, 2}, [set(pair) for pair in result.pairs])
+        self.assertEqual(sorted(pk for pair in result.pairs for pk in pair), [1, 2, 3, 4])
+
+    def test_bye_goes_to_lowest_player_without_previous_bye(self):
+        players = self._players(
+            (1, 9, set(), False), (2, 6, set(), False), (3, 3, set(), False), (4, 1, set(), True), (5, 0, set(), True)
+        )
+        result = pair_round(players)
+        self.assertEqual(result.bye, 3)
+        self.assertEqual(result.rematches, 0)
+
+    def test_next_bye_candidate_avoids_rematch(self):
+        # com o BYE no último (3), a única mesa possível seria revanche 1x2
+        players = self._players((1, 6, {2}, False), (2, 3, {1}, False), (3, 0, set(), False))
+        result = pair_round(players)
+        self.assertEqual((result.bye, result.rematches), (2, 0))
+        self.assertEqual([set(pair) for pair in result.pairs], [{1, 3}])
+
+    def test_greedy_fallback_counts_rematches(self):
+        everyone = {1, 2, 3, 4}
+        players = self._players(*[(pk, 3, everyone - {pk}, False) for pk in sorted(everyone)])
+        result = pair_round(players)
+        self.assertEqual(result.rematches, 2)
+        self.assertEqual(sorted(pk for pair in result.pairs for pk in pair), [1, 2, 3, 4])
+
+
+class RoundFlowTests(TestCase):
+    def test_next_round_refused_while_table_unconfirmed(self):
+        tournament = Tournament.objects.create(name="Semanal", game="DIGIMON", date=date(2026, 3, 1))
+        for name in ("Tai", "Matt", "Sora", "Izzy"):
+            TournamentPlayer.objects.create(tournament=tournament, player_name=name)
+
+        first = start_next_round(tournament)
+        matches = list(first.matches.all())
+        set_result(matches[0], 2, 0)
+        with self.assertRaisesMessage(ValueError, "1 partida(s) sem resultado confirmado"):
+            start_next_round(tournament)
+
+        set_result(matches[1], 2, 1)
+        self.assertEqual(start_next_round(tournament).number, 2)
+
+
+class TiebreakerTests(SimpleTestCase):
+    """
+    MW% com piso de 33%, BYE fora dos oponentes, OMW% e OOMW%.
+    """
+
+    def setUp(self):
+        self.graph = MatchGraph(
+            [1, 2, 3, 4],
+            [
+                (1, 2, 2, 0),
+                (3, 4, 2, 1),
+                (1, 3, 2, 0),
+                (2, 4, 1, 1),       # empate
+                (4, None, 2, 0),    # BYE do 4
+            ],
+        )
+
+    def test_match_win_floor_and_bye(self):
+        g = self.graph
+        self.assertEqual(g.mwp(1), 1.0)
+        self.assertEqual(g.mwp(2), 0.33)                    # 1 ponto em 2 partidas: piso
+        self.assertAlmostEqual(g.mwp(4), 4 / 9)             # BYE conta como vitória jogada
+        self.assertEqual(sorted(g.nodes[4].opponents), [2, 3])
+
+    def test_opponents_percentages(self):
+        g = self.graph
+        self.assertAlmostEqual(g.omw(1), (0.33 + 0.5) / 2)
+        self.assertAlmostEqual(g.omw(2), (1.0 + 4 / 9) / 2)
+        self.assertAlmostEqual(g.omw(4), (0.5 + 0.33) / 2)
+        self.assertAlmostEqual(g.oomw(1), (g.omw(2) + g.omw(3)) / 2)
+        self.assertAlmostEqual(g.oomw(2), (g.omw(1) + g.omw(4)) / 2)
+        self.assertEqual(as_percent(g.omw(1)), 41.5)
+
+    def test_affected_covers_two_levels(self):
+        g = MatchGraph([1, 2, 3, 4, 5, 6], [(1, 2, 2, 0), (2, 3, 2, 0), (3, 4, 2, 0), (5, 6, 2, 0)])
+        self.assertEqual(g.affected([1]), {1, 2, 3})
+        self.assertEqual(g.affected(None), {1, 2, 3, 4, 5, 6})
+
+
+class IncrementalStandingsTests(TestCase):
+    def test_set_result_matches_full_recompute(self):
+        tournament = Tournament.objects.create(name="Semanal", game="DIGIMON", date=date(2026, 3, 1))
+        for name in ("Tai", "Matt", "Sora", "Izzy", "Mimi", "Joe", "TK"):
+            TournamentPlayer.objects.create(tournament=tournament, player_name=name)
+
+        scores = [(2, 0), (1, 2), (2, 1), (0, 2)]
+        for _ in range(3):
+            new_round = start_next_round(tournament)
+            for match, (s1, s2) in zip(new_round.matches.filter(player2__isnull=False), scores):
+                set_result(match, s1, s2)
+            tournament.refresh_from_db()
+
+        # correção de uma mesa antiga: só a vizinhança é recalculada
+        first_table = Match.objects.filter(tournament=tournament, round__number=1, table_number=1).get()
+        set_result(first_table, 0, 2)
+
+        fields = ("id", "wins", "draws", "losses", "points", "omw", "oomw")
+        incremental = list(TournamentPlayer.objects.filter(tournament=tournament).order_by("id").values_list(*fields))
+        self.assertEqual(refresh_standings(tournament), 0)
+        full = list(TournamentPlayer.objects.filter(tournament=tournament).order_by("id").values_list(*fields))
+        self.assertEqual(incremental, full)
+        self.assertTrue(any(row[5] for row in full))
+
+
+class PlayerIdentityTests(TestCase):
+    """
+    Nome digitado -> Player (chave, usuário x alias), mesclagem e sugestões.
+    """
+
+    def test_name_key_ignores_accents_case_and_punctuation(self):
+        self.assertEqual(name_key("  João   Silva "), "joao silva")
+        self.assertEqual(name_key("JOAO-SILVA"), name_key("joao_silva."))
+
+    def test_resolve_player_prefers_user_over_alias(self):
+        user = User.objects.create_user("tai")
+        own = Player.objects.create(name="Tai", user=user)
+        other = resolve_player("Taichi")                  # cria Player + alias
+
+        self.assertEqual(resolve_player("taichi"), other)
+        self.assertEqual(resolve_player("TAICHI", user=user), own)
+        self.assertEqual(Player.objects.count(), 2)
+
+        # alias de um Player sem usuário: a inscrição logada liga o usuário a ele
+        matt = User.objects.create_user("matt")
+        self.assertEqual(resolve_player("Taichi", user=matt), other)
+        other.refresh_from_db()
+        self.assertEqual(other.user, matt)
+
+    def test_merge_moves_entries_aliases_user_and_reschedules_rankings(self):
+        user = User.objects.create_user("joao")
+        target = resolve_player("Joao Silva")
+        source = resolve_player("Joao Silvaa")
+        source.user = user
+        source.save()
+        tournament = Tournament.objects.create(name="Semanal", game="DIGIMON", date=date(2026, 3, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            TournamentPlayer.objects.create(tournament=tournament, player=source, player_name="Joao Silvaa")
+        PendingJob.objects.all().delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            moved = merge_players(target, [source])
+
+        self.assertEqual(moved, 1)
+        self.assertFalse(Player.objects.filter(pk=source.pk).exists())
+        self.assertEqual(resolve_player("joao silvaa"), target)
+        target.refresh_from_db()
+        self.assertEqual(target.user, user)
+        self.assertEqual(TournamentPlayer.objects.get(tournament=tournament).player, target)
+        self.assertTrue(
+            PendingJob.objects.filter(kind=RANKING_UPDATE, key=f"p|2026-03-01|{target.pk}").exists()
+        )
+
+    def test_similar_players_respects_tournaments_and_users(self):
+        first = Tournament.objects.create(name="Semanal", game="DIGIMON", date=date(2026, 3, 1))
+        second = Tournament.objects.create(name="Semanal", game="DIGIMON", date=date(2026, 3, 8))
+
+        def player(name, tournament, user=None):
+            p = Player.objects.create(name=name, user=user)
+            TournamentPlayer.objects.create(tournament=tournament, player=p, player_name=name)
+            return p
+
+        joao = player("Joao Silva", first)
+        typo = player("Joao Silvaa", second)
+        player("Joao Silvab", first)                       # mesmo torneio do "Joao Silva"
+        player("Mariana Souza", first, User.objects.create_user("mari"))
+        player("Mariana Souzaa", second, User.objects.create_user("mari2"))   # outro usuário
+
+        pairs = [(s.target_id, s.source_id) for s in similar_players()]
+        self.assertEqual(pairs, [(joao.pk, typo.pk)])
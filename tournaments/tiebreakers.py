@@ -0,0 +1,106 @@
+# tournaments/tiebreakers.py
+"""
+Desempates padrão (estilo Bandai / MTG) a partir do grafo de partidas:
+
+  MW%   = pontos / (pontos de vitória x partidas jogadas), mínimo de 33%
+  OMW%  = média do MW% dos oponentes (BYE não conta como oponente)
+  OOMW% = média do OMW% dos oponentes
+
+Montar o grafo é O(partidas). Quando só uma mesa muda, os valores só podem
+mudar nos dois jogadores, nos oponentes deles (OMW%) e nos oponentes dos
+oponentes (OOMW%), então só essa vizinhança é recalculada.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+MWP_FLOOR = 0.33
+
+
+@dataclass
+class PlayerNode:
+    wins: int = 0
+    draws: int = 0
+    losses: int = 0
+    opponents: List[int] = field(default_factory=list)
+
+    @property
+    def played(self) -> int:
+        return self.wins + self.draws + self.losses
+
+
+class MatchGraph:
+    """
+    Registro e oponentes de cada jogador, montado das partidas confirmadas
+    (player1_id, player2_id, score_p1, score_p2); player2_id None = BYE.
+    """
+
+    def __init__(self, player_ids: Iterable[int], rows: Iterable[Tuple[int, Optional[int], int, int]],
+                 win_points: int = 3, draw_points: int = 1, loss_points: int = 0):
+        self.win_points = win_points
+        self.draw_points = draw_points
+        self.loss_points = loss_points
+        self.nodes: Dict[int, PlayerNode] = {pk: PlayerNode() for pk in player_ids}
+        self._mwp: Dict[int, float] = {}
+        self._omw: Dict[int, float] = {}
+
+        for p1, p2, s1, s2 in rows:
+            a = self.nodes.setdefault(p1, PlayerNode())
+            if p2 is None:
+                a.wins += 1
+                continue
+            b = self.nodes.setdefault(p2, PlayerNode())
+            a.opponents.append(p2)
+            b.opponents.append(p1)
+            if s1 > s2:
+                a.wins += 1
+                b.losses += 1
+            elif s1 < s2:
+                a.losses += 1
+                b.wins += 1
+            else:
+                a.draws += 1
+                b.draws += 1
+
+    def points(self, pk: int) -> int:
+        node = self.nodes[pk]
+        return node.wins * self.win_points + node.draws * self.draw_points + node.losses * self.loss_points
+
+    def mwp(self, pk: int) -> float:
+        if pk not in self._mwp:
+            node = self.nodes[pk]
+            raw = self.points(pk) / (self.win_points * node.played) if node.played else 0.0
+            self._mwp[pk] = max(MWP_FLOOR, raw)
+        return self._mwp[pk]
+
+    def omw(self, pk: int) -> float:
+        if pk not in self._omw:
+            opponents = self.nodes[pk].opponents
+            self._omw[pk] = sum(self.mwp(o) for o in opponents) / len(opponents) if opponents else 0.0
+        return self._omw[pk]
+
+    def oomw(self, pk: int) -> float:
+        opponents = self.nodes[pk].opponents
+        return sum(self.omw(o) for o in opponents) / len(opponents) if opponents else 0.0
+
+    def neighbours(self, players: Iterable[int]) -> Set[int]:
+        result: Set[int] = set()
+        for pk in players:
+            result.update(self.nodes[pk].opponents)
+        return result
+
+    def affected(self, touched: Optional[Iterable[int]] = None) -> Set[int]:
+        """
+        Jogadores cujo registro/OMW%/OOMW% pode ter mudado quando o resultado
+        dos `touched` mudou (None = todos).
+        """
+        if touched is None:
+            return set(self.nodes)
+        level0 = {pk for pk in touched if pk in self.nodes}
+        level1 = level0 | self.neighbours(level0)
+        return level1 | self.neighbours(level1)
+
+
+def as_percent(value: float) -> float:
+    return round(value * 100, 2)
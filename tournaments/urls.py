@@ -2,6 +2,7 @@ from django.urls import path
 from .views import (
     tournaments_home,
     tournament_detail,
+    tournament_standings_json,
     tournament_ranking,
     tournament_admin_panel,
     tournament_my_match,
@@ -13,6 +14,7 @@ from .views import (
 urlpatterns = [
     path("", tournaments_home, name="tournaments_home"),
     path("<int:pk>/", tournament_detail, name="tournament_detail"),
+    path("<int:pk>/classificacao.json", tournament_standings_json, name="tournament_standings_json"),
     path("<int:pk>/painel/", tournament_admin_panel, name="tournament_admin_panel"),
     path("<int:pk>/minha-partida/", tournament_my_match, name="tournament_my_match"),
     path("ranking/", tournament_ranking, name="tournament_ranking"),
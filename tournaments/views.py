@@ -1,10 +1,25 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404, redirect
-from django.db.models import Sum, Count, Avg
+from django.core.paginator import Paginator
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.cache import cache_control
 from django.utils import timezone
 
-from .models import Tournament, TournamentPlayer, Season
+from .live import results_version, standings_etag, standings_snapshot
+from .models import ArchetypeRanking, Match, PlayerRanking, Round, Tournament, TournamentPlayer, Season
+from .services import (
+    confirm_result,
+    dispute_result,
+    illegal_decklists,
+    player_matches,
+    refresh_standings,
+    report_result,
+    set_result,
+    start_next_round,
+)
+from .standings_import import import_standings, parse_standings
 
 
 def tournaments_home(request):
@@ -15,71 +30,82 @@ def tournaments_home(request):
 def tournament_detail(request, pk):
     tournament = get_object_or_404(Tournament, pk=pk)
 
-    standings = TournamentPlayer.objects.filter(tournament=tournament).order_by(
-        "-points", "-omw", "-oomw", "player_name"
-    )
-
-    players_count = standings.count()
+    # mesma fonte do JSON ao vivo: sem reordenar a tabela a cada refresh
+    snapshot = standings_snapshot(tournament.pk)
 
     return render(
         request,
         "tournaments/tournament_detail.html",
         {
             "tournament": tournament,
-            "standings": standings,
-            "players_count": players_count,
+            "standings": snapshot["players"],
+            "standings_version": snapshot["version"],
+            "players_count": len(snapshot["players"]),
         },
     )
 
 
-def tournament_ranking(request):
-    # Ranking geral por jogador (somando resultados de todos os torneios)
-    results = (
-        TournamentPlayer.objects.values("player_name")
-        .annotate(
-            tournaments_played=Count("id"),
-            total_points=Sum("points"),
-            total_wins=Sum("wins"),
-            total_draws=Sum("draws"),
-            total_losses=Sum("losses"),
-            avg_omw=Avg("omw"),
-            avg_oomw=Avg("oomw"),
-        )
-        .order_by("-total_points", "-total_wins", "player_name")
-    )
+@cache_control(public=True, no_cache=True)
+def tournament_standings_json(request, pk):
+    """
+    Classificação ao vivo em JSON, com ETag pela versão dos resultados
+    (a página consulta a cada poucos segundos com If-None-Match).
+    Enquanto nada muda, cada pedido custa uma leitura de cache e devolve 304.
+    """
+    version = results_version(pk)
+    etag = standings_etag(pk, version)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        snapshot = standings_snapshot(pk, version)
+        if snapshot is None:
+            raise Http404("Torneio não encontrado.")
+        response = JsonResponse(snapshot)
+    response["ETag"] = etag
+    return response
 
-    # Ranking de decks por arquétipo (somando uso + pontos)
-    deck_stats = (
-        TournamentPlayer.objects.exclude(deck_archtype_name="")
-        .values("deck_archtype_name")
-        .annotate(
-            total_uses=Count("id"),
-            sum_points=Sum("points"),
-            sum_wins=Sum("wins"),
-            sum_draws=Sum("draws"),
-            sum_losses=Sum("losses"),
-        )
-        .order_by("-total_uses", "-sum_points", "deck_archtype_name")
-    )
+
+RANKING_PAGE_SIZE = 50
+
+
+def _ranking_page(request, qs):
+    # tabelas materializadas já vêm na ordem do índice: a página é um LIMIT/OFFSET
+    return Paginator(qs, RANKING_PAGE_SIZE).get_page(request.GET.get("page"))
+
+
+def tournament_ranking(request):
+    # Ranking geral (season vazio), mantido por tournaments.rankings
+    ranking = _ranking_page(request, PlayerRanking.objects.filter(season=None).select_related("player"))
+    deck_stats = ArchetypeRanking.objects.filter(season=None)[:RANKING_PAGE_SIZE]
 
     return render(
         request,
         "tournaments/tournament_ranking.html",
         {
-            "results": results,
+            "ranking": ranking,
+            "page_obj": ranking,
             "deck_stats": deck_stats,
         },
     )
 
 
+def _int(raw, default=0) -> int:
+    try:
+        return int(raw)
+    except (TypeError, ValueError):
+        return default
+
+
 @login_required
 def tournament_admin_panel(request, pk):
     """
-    Painel admin simples para o torneio (sem rounds/matches).
-    Serve para:
-      - Encerrar inscrições (mudar status)
-      - Forçar status RUNNING/FINISHED
-      - Recalcular standings (caso você edite pontos no admin)
+    Painel do organizador:
+      - Encerrar inscrições e parear a 1ª rodada
+      - Parear a próxima rodada (suíço) quando todas as mesas estiverem confirmadas
+      - Lançar/corrigir o placar de uma mesa
+      - Recalcular standings (registro + OMW%/OOMW%) do torneio inteiro
+      - Importar o resultado final (export Bandai TCG+ em CSV/JSON)
+      - Finalizar o torneio
+    Também lista os decks vinculados que violam as regras vigentes na data do torneio.
     """
     tournament = get_object_or_404(Tournament, pk=pk)
 
@@ -90,10 +116,23 @@ def tournament_admin_panel(request, pk):
     if request.method == "POST":
         action = request.POST.get("action", "").strip()
 
-        if action == "close_registration":
-            tournament.status = "RUNNING"
-            tournament.save()
-            messages.success(request, "Inscrições encerradas. Torneio marcado como EM ANDAMENTO.")
+        if action in ("close_registration", "next_round"):
+            try:
+                new_round = start_next_round(tournament)
+            except ValueError as exc:
+                messages.error(request, str(exc))
+            else:
+                messages.success(request, f"Rodada {new_round.number} pareada.")
+            return redirect("tournament_admin_panel", pk=tournament.pk)
+
+        if action == "set_result":
+            match = get_object_or_404(Match, pk=_int(request.POST.get("match_id")), tournament=tournament)
+            try:
+                set_result(match, _int(request.POST.get("score_p1")), _int(request.POST.get("score_p2")))
+            except ValueError as exc:
+                messages.error(request, str(exc))
+            else:
+                messages.success(request, f"Mesa {match.table_number}: resultado confirmado.")
             return redirect("tournament_admin_panel", pk=tournament.pk)
 
         if action == "finish":
@@ -102,10 +141,33 @@ def tournament_admin_panel(request, pk):
             messages.success(request, "Torneio finalizado.")
             return redirect("tournament_admin_panel", pk=tournament.pk)
 
+        if action == "import_standings":
+            upload = request.FILES.get("standings")
+            if upload is None:
+                messages.error(request, "Envie o arquivo de classificação (CSV ou JSON).")
+                return redirect("tournament_admin_panel", pk=tournament.pk)
+            try:
+                rows = parse_standings(upload)
+            except ValueError as exc:
+                messages.error(request, str(exc))
+                return redirect("tournament_admin_panel", pk=tournament.pk)
+            result = import_standings(tournament, rows, replace=bool(request.POST.get("replace")))
+            messages.success(
+                request,
+                f"Resultado importado: {result.created} inscrição(ões) criada(s), "
+                f"{result.updated} atualizada(s), {result.removed} removida(s).",
+            )
+            for warning in result.warnings[:10]:
+                messages.warning(request, warning)
+            return redirect("tournament_admin_panel", pk=tournament.pk)
+
         if action == "recalc":
-            # Se você lança resultados via admin, isso não “calcula rounds” (porque não existe),
-            # mas mantém o painel útil pra reordenar e conferir standings.
-            messages.success(request, "Standings atualizados (ordenação aplicada).")
+            # torneio sem rodadas (resultado lançado à mão) mantém os valores digitados
+            if not tournament.rounds.exists():
+                messages.warning(request, "Torneio sem rodadas: vitórias e OMW%/OOMW% são os lançados no admin.")
+            else:
+                changed = refresh_standings(tournament)
+                messages.success(request, f"Standings recalculados ({changed} jogador(es) alterado(s)).")
             return redirect("tournament_admin_panel", pk=tournament.pk)
 
         messages.warning(request, "Ação inválida.")
@@ -115,6 +177,10 @@ def tournament_admin_panel(request, pk):
     standings = TournamentPlayer.objects.filter(tournament=tournament).order_by(
         "-points", "-omw", "-oomw", "player_name"
     )
+    current_round = Round.objects.filter(tournament=tournament, number=tournament.current_round).first()
+    matches_current = (
+        current_round.matches.select_related("player1", "player2") if current_round else Match.objects.none()
+    )
 
     return render(
         request,
@@ -123,6 +189,9 @@ def tournament_admin_panel(request, pk):
             "tournament": tournament,
             "players": players,
             "standings": standings,
+            "current_round": current_round,
+            "matches_current": matches_current,
+            "illegal_decklists": illegal_decklists(tournament),
         },
     )
 
@@ -130,18 +199,57 @@ def tournament_admin_panel(request, pk):
 @login_required
 def tournament_my_match(request, pk):
     """
-    No seu modelo atual (sem Match/Round), não existe “minha partida”.
-    Então deixamos uma tela segura pra não quebrar o app.
+    Mesa do jogador logado na rodada atual: informar placar, aceitar ou contestar.
     """
     tournament = get_object_or_404(Tournament, pk=pk)
-    return render(
-        request,
-        "tournaments/tournament_my_match.html",
-        {
-            "tournament": tournament,
-            "info": "Ainda não existe sistema de rodadas/pareamentos neste modelo atual.",
-        },
+    current_round = Round.objects.filter(tournament=tournament, number=tournament.current_round).first()
+    context = {"tournament": tournament, "current_round": current_round}
+
+    if current_round is None:
+        context["no_round"] = True
+        return render(request, "tournaments/tournament_my_match.html", context)
+
+    player = TournamentPlayer.objects.filter(tournament=tournament, user=request.user).first()
+    if player is None:
+        context["not_registered"] = True
+        return render(request, "tournaments/tournament_my_match.html", context)
+
+    match = (
+        player_matches(player).filter(round=current_round)
+        .select_related("player1", "player2", "tournament").first()
     )
+    if match is None:
+        context["no_match"] = True
+        return render(request, "tournaments/tournament_my_match.html", context)
+
+    i_am_p1 = match.player1_id == player.pk
+    if request.method == "POST" and not match.is_bye:
+        # este template não mostra `messages`: o retorno vai em error/info
+        action = request.POST.get("action", "").strip()
+        waiting_me = match.status == "SUBMITTED" and match.submitted_by_id != request.user.id
+        try:
+            if action == "report":
+                report_result(
+                    match, player, _int(request.POST.get("my_score")), _int(request.POST.get("opp_score")), request.user
+                )
+                context["info"] = "Resultado enviado. Aguardando o oponente."
+            elif action == "accept" and waiting_me:
+                confirm_result(match)
+                context["info"] = "Resultado confirmado."
+            elif action == "dispute" and waiting_me:
+                dispute_result(match)
+                context["info"] = "Resultado contestado. O organizador vai resolver."
+            else:
+                context["error"] = "Ação inválida."
+        except ValueError as exc:
+            context["error"] = str(exc)
+
+    context.update({
+        "match": match,
+        "i_am_p1": i_am_p1,
+        "opponent": match.player2 if i_am_p1 else match.player1,
+    })
+    return render(request, "tournaments/tournament_my_match.html", context)
 
 
 # -------------------------
@@ -155,55 +263,21 @@ def season_list(request):
 
 def season_player_ranking(request, slug):
     season = get_object_or_404(Season, slug=slug)
-
-    qs = TournamentPlayer.objects.filter(
-        tournament__date__gte=season.start_date,
-        tournament__date__lte=season.end_date,
-    )
-
-    results = (
-        qs.values("player_name")
-        .annotate(
-            tournaments_played=Count("id"),
-            total_points=Sum("points"),
-            total_wins=Sum("wins"),
-            total_draws=Sum("draws"),
-            total_losses=Sum("losses"),
-            avg_omw=Avg("omw"),
-            avg_oomw=Avg("oomw"),
-        )
-        .order_by("-total_points", "-total_wins", "player_name")
-    )
+    ranking = _ranking_page(request, PlayerRanking.objects.filter(season=season).select_related("player"))
 
     return render(
         request,
         "tournaments/season_player_ranking.html",
-        {"season": season, "results": results},
+        {"season": season, "ranking": ranking, "page_obj": ranking},
     )
 
 
 def season_deck_ranking(request, slug):
     season = get_object_or_404(Season, slug=slug)
-
-    qs = TournamentPlayer.objects.filter(
-        tournament__date__gte=season.start_date,
-        tournament__date__lte=season.end_date,
-    ).exclude(deck_archtype_name="")
-
-    deck_stats = (
-        qs.values("deck_archtype_name")
-        .annotate(
-            total_uses=Count("id"),
-            sum_points=Sum("points"),
-            sum_wins=Sum("wins"),
-            sum_draws=Sum("draws"),
-            sum_losses=Sum("losses"),
-        )
-        .order_by("-total_uses", "-sum_points", "deck_archtype_name")
-    )
+    deck_stats = _ranking_page(request, ArchetypeRanking.objects.filter(season=season))
 
     return render(
         request,
         "tournaments/season_deck_ranking.html",
-        {"season": season, "deck_stats": deck_stats},
+        {"season": season, "deck_stats": deck_stats, "page_obj": deck_stats},
     )